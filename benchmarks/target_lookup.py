@@ -0,0 +1,76 @@
+"""
+Lookups and removals on a Target with 10,000 residues: the indexed find_* and remove_* methods
+against the linear scans they replaced.
+
+    python benchmarks/target_lookup.py
+"""
+import random
+import timeit
+from dash_molstar.utils import Target
+
+chain_count, residue_count, atom_names = 10, 1000, ['N', 'CA', 'C', 'O', 'CB']
+
+def build_target() -> Target:
+    return Target({'chains': [{
+        'name': chr(ord('A') + chain),
+        'residues': [{
+            'name': 'ALA', 'index': number, 'number': number, 'ins_code': '',
+            'atoms': [{'name': name, 'index': (chain * residue_count + number) * 5 + i} for i, name in enumerate(atom_names)]
+        } for number in range(1, residue_count + 1)]
+    } for chain in range(chain_count)]})
+
+def linear_find_atom(target, chain_name, residue_number, atom_name, ins_code=""):
+    # the lookup path before the indexes were added
+    for chain in target.chains:
+        if chain.name == chain_name:
+            for residue in chain.residues:
+                if residue.number == residue_number and (residue.ins_code or "") == ins_code:
+                    for atom in residue.atoms:
+                        if atom.name == atom_name:
+                            return atom
+    return None
+
+def linear_remove(removals, items) -> float:
+    # the removal path before items knew their position: an identity scan and a del from the list
+    start = timeit.default_timer()
+    for item in removals:
+        for position, other in enumerate(items):
+            if other is item:
+                del items[position]
+                break
+    return timeit.default_timer() - start
+
+def main():
+    target = build_target()
+    random.seed(0)
+    queries = [(chr(ord('A') + random.randrange(chain_count)), random.randint(1, residue_count), random.choice(atom_names)) for _ in range(500)]
+    for query in queries:
+        assert target.find_atom(*query) is linear_find_atom(target, *query)
+    linear = min(timeit.repeat(lambda: [linear_find_atom(target, *q) for q in queries], number=1, repeat=5))
+    indexed = min(timeit.repeat(lambda: [target.find_atom(*q) for q in queries], number=1, repeat=5))
+    print(f"{len(queries)} find_atom calls on {chain_count * residue_count} residues")
+    print(f"  linear scan: {linear * 1000:8.2f} ms")
+    print(f"  indexed:     {indexed * 1000:8.2f} ms  ({linear / indexed:.0f}x faster)")
+
+    # remove every other residue, then every atom of the residues left, one call at a time
+    removals = [(chr(ord('A') + chain), number) for chain in range(chain_count) for number in range(1, residue_count + 1, 2)]
+    residues = [target.find_residue(*removal) for removal in removals]
+    linear = linear_remove(list(residues), [residue for chain in target.chains for residue in chain.residues])
+    start = timeit.default_timer()
+    for chain_name, number in removals:
+        target.find_chain(chain_name).remove_residue(number)
+    indexed = timeit.default_timer() - start
+    assert len(target.residues) == chain_count * residue_count // 2
+    print(f"{len(removals)} remove_residue calls")
+    print(f"  linear scan: {linear * 1000:8.2f} ms")
+    print(f"  indexed:     {indexed * 1000:8.2f} ms  ({linear / indexed:.0f}x faster)")
+
+    atoms = [(residue, atom) for residue in target.residues for atom in residue.atoms]
+    start = timeit.default_timer()
+    for residue, atom in atoms:
+        residue.remove_atom(atom)
+    print(f"{len(atoms)} remove_atom calls: {(timeit.default_timer() - start) * 1000:.2f} ms")
+    assert not target.atoms
+
+if __name__ == '__main__':
+    main()
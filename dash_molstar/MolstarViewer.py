@@ -52,8 +52,17 @@ Keyword arguments:
     The structure region to let the camera focus on in the molstar
     viewer.
 
+- fps (number; optional):
+    The frames per second of the playback. Default is 30.
+
 - frame (number; optional):
-    The trajectory frame in the molstar viewer.
+    The trajectory frame in the molstar viewer. The frames of a
+    streamed trajectory are counted from the start of the file.
+
+- framethrottle (number; optional):
+    Minimum time in milliseconds between two updates of `frame` sent
+    to dash while playing. Set to 0 to send every frame. Default is
+    250ms.
 
 - hover (dict; optional):
     The structure region to be hovered in the molstar viewer.
@@ -63,9 +72,39 @@ Keyword arguments:
     displayed.   The layout is not allowed to be changed once the
     component has been initialized.
 
+- loadconcurrency (number; optional):
+    The maximum number of `data` entries downloaded and decompressed
+    at the same time. The entries are still added to the viewer one by
+    one, in their order. Default is 4.
+
+- loadtimings (dict; optional):
+    Timings of the last update of `data` in milliseconds, set by the
+    viewer: the `total` time, and for every loaded entry the time to
+    `fetch` and decompress it and the time to `commit` it to the
+    viewer.
+
+- loop (boolean; optional):
+    Whether the playback starts over at the end of the range. Default
+    is True.
+
 - measurement (boolean | number | string | dict | list; optional):
     The measurements in the molstar viewer.
 
+- playbackrange (list of numbers; optional):
+    The frames to play as `[start, stop]`, the stop frame is not
+    included. Default is the whole trajectory.
+
+- playing (boolean; optional):
+    Whether the trajectory is playing. The viewer advances `frame` by
+    itself at `fps` frames per second, without any callback, and sets
+    `playing` to False when it stops at the end of a range that does
+    not `loop`.
+
+- prefetchframes (number; optional):
+    Number of frames of a streamed trajectory downloaded ahead of the
+    playhead. The downloaded windows are kept in a cache of about the
+    same size. Default is 100.
+
 - screenshot (dict; optional):
     The screenshot object containing the options for taking
     screenshot of the current view in molstar viewer.
@@ -73,6 +112,25 @@ Keyword arguments:
 - selection (dict; optional):
     The structure region to be selected in the molstar viewer.
 
+- selectioncoordinates (boolean; optional):
+    Whether to include the atom coordinates in the `selection` and
+    `focus` sent back to Dash. Default is True.
+
+- selectiongranularity (a value equal to: 'chain', 'residue', 'atom'; optional):
+    The level of detail of the `selection` and `focus` sent back to
+    Dash: 'chain' lists the chains only, 'residue' the residues
+    without their atoms, and 'atom' every atom. Default is 'atom'.
+
+- selectionmaxatoms (number; optional):
+    The maximum number of atoms listed in the `selection` and `focus`
+    sent back to Dash. Larger selections are sent with 'residue'
+    granularity. Unlimited by default.
+
+- shapeclick (dict; optional):
+    The last clicked instance of a batch of spheres or cylinders, set
+    by the viewer: the `label` of the batch and the index of the
+    `instance`.
+
 - updatefocusonframechange (boolean; optional):
     Update focus data when frame index have changed.
 
@@ -95,18 +153,30 @@ Keyword arguments:
         hover: typing.Optional[dict] = None,
         focus: typing.Optional[dict] = None,
         frame: typing.Optional[NumberType] = None,
+        playing: typing.Optional[bool] = None,
+        fps: typing.Optional[NumberType] = None,
+        loop: typing.Optional[bool] = None,
+        playbackrange: typing.Optional[typing.Sequence[NumberType]] = None,
+        prefetchframes: typing.Optional[NumberType] = None,
+        framethrottle: typing.Optional[NumberType] = None,
         measurement: typing.Optional[typing.Any] = None,
         camera: typing.Optional[typing.Any] = None,
         cameradebounce: typing.Optional[NumberType] = None,
         cameraresponddrag: typing.Optional[bool] = None,
         screenshot: typing.Optional[dict] = None,
+        selectiongranularity: typing.Optional[Literal["chain", "residue", "atom"]] = None,
+        selectioncoordinates: typing.Optional[bool] = None,
+        selectionmaxatoms: typing.Optional[NumberType] = None,
+        loadconcurrency: typing.Optional[NumberType] = None,
+        loadtimings: typing.Optional[dict] = None,
+        shapeclick: typing.Optional[dict] = None,
         updatefocusonframechange: typing.Optional[bool] = None,
         updateselectiononframechange: typing.Optional[bool] = None,
         **kwargs
     ):
-        self._prop_names = ['id', 'camera', 'cameradebounce', 'cameraresponddrag', 'className', 'data', 'focus', 'frame', 'hover', 'layout', 'measurement', 'screenshot', 'selection', 'style', 'updatefocusonframechange', 'updateselectiononframechange']
+        self._prop_names = ['id', 'camera', 'cameradebounce', 'cameraresponddrag', 'className', 'data', 'focus', 'fps', 'frame', 'framethrottle', 'hover', 'layout', 'loadconcurrency', 'loadtimings', 'loop', 'measurement', 'playbackrange', 'playing', 'prefetchframes', 'screenshot', 'selection', 'selectioncoordinates', 'selectiongranularity', 'selectionmaxatoms', 'shapeclick', 'style', 'updatefocusonframechange', 'updateselectiononframechange']
         self._valid_wildcard_attributes =            []
-        self.available_properties = ['id', 'camera', 'cameradebounce', 'cameraresponddrag', 'className', 'data', 'focus', 'frame', 'hover', 'layout', 'measurement', 'screenshot', 'selection', 'style', 'updatefocusonframechange', 'updateselectiononframechange']
+        self.available_properties = ['id', 'camera', 'cameradebounce', 'cameraresponddrag', 'className', 'data', 'focus', 'fps', 'frame', 'framethrottle', 'hover', 'layout', 'loadconcurrency', 'loadtimings', 'loop', 'measurement', 'playbackrange', 'playing', 'prefetchframes', 'screenshot', 'selection', 'selectioncoordinates', 'selectiongranularity', 'selectionmaxatoms', 'shapeclick', 'style', 'updatefocusonframechange', 'updateselectiononframechange']
         self.available_wildcard_properties =            []
         _explicit_args = kwargs.pop('_explicit_args')
         _locals = locals()
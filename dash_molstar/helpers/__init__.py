@@ -2,8 +2,13 @@
 # Also re-exports molstar_helper functions for convenience
 
 from ..utils.target import Target
+from ..utils.target_array import TargetArray
 from ..utils.representations import Representation
 from ..utils.camera import Camera
 from ..utils.screenshot import Screenshot, default_axes_params
+from ..utils.assets import AssetStore, asset_store
+from ..utils.trajectory import TrajectoryFile
+from ..utils.trajectory_server import TrajectoryServer, trajectory_server
+from ..utils.poses import PoseLibrary
 from ..utils import shapes
 from .molstar_helper import *
\ No newline at end of file
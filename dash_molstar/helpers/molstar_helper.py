@@ -1,22 +1,174 @@
 from io import IOBase
 import os
 from urllib.parse import urlparse
-import base64
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import copy
+import hashlib
+import json
+import re
+import zlib
+import numpy as np
 from ..utils.representations import Representation
 from ..utils.target import Target
+from ..utils.target_array import TargetArray
 from ..utils.camera import Camera
 from ..utils.screenshot import Screenshot
+from ..utils.cache import PayloadCache
+from ..utils.assets import AssetStore, asset_store
+from ..utils.trajectory_server import TrajectoryServer, trajectory_server
+from ..utils.bcif import encode_bcif, encode_atom_site, supported_bcif_formats
+from ..utils.atom_site import read_atom_site
+from ..utils.trajectory import TrajectoryFile, reduce_trajectory
+from ..utils.fileio import map_file, iter_chunks, encode_base64, decode_text
+from ..utils.codec import encode_quantized
 from ..utils import shapes
 
 
 supported_formats = {
-    'mol': ["cif", "cifcore", "pdb", "pdbqt", "gro", "xyz", "mol", "sdf", "mol2", "lammps_data", "lammps_traj_data"],
+    'mol': ["cif", "cifcore", "bcif", "pdb", "pdbqt", "gro", "xyz", "mol", "sdf", "mol2", "lammps_data", "lammps_traj_data"],
     'snapshot': ["json", "molj", "molx", "zip"],
     'coords': ["dcd", "xtc", "trr", "nctraj", "lammpstrj"],
     'volume': ["ccp4", "dsn6", "cube", "dx", "dscif", "segcif"]
 }
+# compression methods understood by the browser's DecompressionStream
+supported_compressions = ["gzip", "deflate"]
+# executors parse_molecules can run in
+supported_executors = ["thread", "process"]
+# encodings parse_molecule can convert structures into
+supported_encodings = ["bcif"]
+
+# opt-in cache for file payloads, see `enable_cache()`
+_payload_cache = None
+# residue numbers accepted by `get_targets()`, with an optional insertion code
+_residue_number = re.compile(r'^\s*(-?\d+)\s*([A-Za-z]?)\s*$')
+
+def enable_cache(max_bytes=256 * 1024 * 1024):
+    """
+    Enable caching of the payloads produced by `parse_molecule()` and `parse_coordinate()` for file paths.
+    Cached entries are keyed by the absolute path, modification time, size and format of the file,
+    so an edited file is always read again.
+
+    Parameters
+    ----------
+    `max_bytes` — int (optional)
+        The byte budget of the cache. Least recently used payloads are evicted once the budget
+        is exceeded. (default: `256 MB`)
+
+    Returns
+    -------
+    `PayloadCache`
+        The cache instance, whose `stats` property reports hits, misses and evictions.
+    """
+    global _payload_cache
+    if _payload_cache is None:
+        _payload_cache = PayloadCache(max_bytes)
+    else:
+        _payload_cache.max_bytes = max_bytes
+    return _payload_cache
+
+def disable_cache():
+    """
+    Disable the payload cache and release all cached payloads.
+    """
+    global _payload_cache
+    if _payload_cache is not None:
+        _payload_cache.clear()
+    _payload_cache = None
+
+def get_cache():
+    """
+    Get the payload cache enabled by `enable_cache()`.
+
+    Returns
+    -------
+    `PayloadCache` | `None`
+        The cache instance, or `None` if caching is disabled.
+    """
+    return _payload_cache
+
+def _read_file(path, fmt, kind, reader):
+    # read a file through the payload cache when it is enabled
+    if _payload_cache is None:
+        return reader(path)
+    key = PayloadCache.file_key(path, kind, fmt)
+    return _payload_cache.get_or_load(key, lambda: reader(path))
+
+def _read_base64(path):
+    # encode straight from the mapped file, so only the encoded string is allocated
+    with map_file(path) as view:
+        return encode_base64(view)
+
+def _read_compressed(path, compress):
+    with map_file(path) as view:
+        return _compress(view, compress)
+
+def _check_compression(compress):
+    if compress and compress not in supported_compressions:
+        raise ValueError(f"Invalid compression \"{compress}\". Supported compressions are {supported_compressions}.")
+
+def _compress(data, compress):
+    # compress the payload chunk by chunk and encode it with base64 so that it can be sent in the callback JSON.
+    # "deflate" in DecompressionStream is the zlib format, the gzip header written by zlib has no mtime,
+    # which keeps the output deterministic for identical input
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31 if compress == 'gzip' else 15)
+    parts = [compressor.compress(chunk) for chunk in iter_chunks(data)]
+    parts.append(compressor.flush())
+    return encode_base64(b''.join(parts))
+
+def _molecule_payload(content, fmt, encode=None, compress=None, raw=False):
+    # turn the content of a structure file into the payload sent to the viewer, `content` is either
+    # text or a bytes-like object such as the view of a mapped file. binary payloads are base64
+    # encoded unless they are served as raw bytes
+    if encode == 'bcif':
+        content = encode_bcif(bytes(content) if isinstance(content, memoryview) else content, fmt)
+    if compress:
+        return _compress(content.encode() if isinstance(content, str) else content, compress)
+    if isinstance(content, str):
+        return content
+    return bytes(content) if raw else encode_base64(content)
+
+def _read_molecule(path, fmt, binary, encode=None, compress=None, raw=False):
+    with map_file(path) as view:
+        # text is decoded straight from the mapped file, everything else is converted from the bytes
+        content = view if binary or compress else decode_text(view)
+        return _molecule_payload(content, fmt, encode, compress, raw)
+
+def _entry_hash(entry):
+    # content hash of a `data` entry, the viewer only reloads entries whose hash has changed
+    digest = hashlib.sha1()
+    for key in sorted(entry):
+        value = entry[key]
+        if key in ('id', 'hash'): continue
+        digest.update(key.encode())
+        if isinstance(value, dict) and 'hash' in value:
+            value = value['hash']
+        if isinstance(value, str):
+            digest.update(value.encode())
+        elif isinstance(value, bytes):
+            digest.update(value)
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _set_id(entry, id):
+    entry['hash'] = _entry_hash(entry)
+    entry['id'] = entry['hash'] if id is None else id
+    return entry
+
+def _process_preset(preset):
+    # convert the Target objects in preset into dicts
+    for key in ['target', 'focus', 'targets', 'glycosylation']:
+        if key in preset.keys():
+            if not isinstance(preset[key], list): preset[key] = [preset[key]]
+            preset[key] = [t.to_dict() if isinstance(t, (Target, TargetArray)) else t for t in preset[key]]
+    if 'colors' in preset.keys():
+        if not isinstance(preset['colors'], list): preset['colors'] = [preset['colors']]
+        for color in preset['colors']:
+            if not isinstance(color['targets'], list): color['targets'] = [color['targets']]
+            color['targets'] = [t.to_dict() if isinstance(t, (Target, TargetArray)) else t for t in color['targets']]
 
-def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, matrix=None):
+def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, matrix=None, serve=False, compress=None, encode=None, id=None):
     """
     Parse the molecule for `data` parameter of molstar viewer.
 
@@ -29,7 +181,7 @@ def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, m
         Otherwise the format has to be specified manually.
     `fmt` — str (optional)
         Format of the input molecule. 
-        Supported formats include `cif`, `cifcore`, `pdb`, `pdbqt`, `gro`, `xyz`, `mol`, `sdf`, `mol2`, `lammps_data`, `lammps_traj_data` (default: `None`)
+        Supported formats include `cif`, `cifcore`, `bcif`, `pdb`, `pdbqt`, `gro`, `xyz`, `mol`, `sdf`, `mol2`, `lammps_data`, `lammps_traj_data` (default: `None`)
     `component` — dict | List[dict] (optional)
         Component to be created in molstar. 
         If not specified, molstar will use its default settings. (default: `None`)
@@ -40,6 +192,22 @@ def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, m
     `matrix` — numpy.ndarray (optional)
         The homogeneous transformation matrix for the molecule. 
         Only rigid transformations are allowed.
+    `serve` — bool | AssetStore (optional)
+        If set, the file content is registered in an asset store under its content hash and the
+        returned payload points the viewer at the URL of the asset instead of inlining the file.
+        The store has to be mounted on the server with `asset_store.init_app(app)`. The file is written to
+        the directory of the store, so every worker process sharing it can serve the file. (default: `False`)
+    `compress` — str (optional)
+        Compress the file content with `gzip` or `deflate` before sending it to the viewer, where it is
+        decompressed by the browser. Text formats usually shrink 4-6 times. Ignored if `serve` is set. (default: `None`)
+    `encode` — str (optional)
+        Convert the structure into another format before sending it to the viewer. Set to `bcif` to encode
+        `pdb`, `pdbqt`, `cif` or `gro` input as BinaryCIF, which is smaller and parsed much faster by molstar.
+        Only the atoms (the `_atom_site` category) are kept. (default: `None`)
+    `id` — str (optional)
+        A stable key of the entry in `data`. The viewer keeps the entries whose key and content are
+        unchanged when `data` is updated, and only loads, removes or replaces the others.
+        If not specified, the hash of the content is used. (default: `None`)
 
     Returns
     -------
@@ -50,14 +218,15 @@ def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, m
     ------
     `RuntimeError`
         If the input format is not supported by molstar viewer, raises RuntimeError.
+    `ValueError`
+        If the compression or encoding is not supported, raises ValueError.
     """
     # provided a filename as input
     if os.path.isfile(inp):
         # if format is not specified, infer from filename
         if not fmt:
             name, fmt = os.path.splitext(inp)
-        with open(inp, 'r') as f:
-            data = f.read()
+        data = None
     else:
         # provided a file-like object as input
         if isinstance(inp, IOBase):
@@ -65,42 +234,120 @@ def parse_molecule(inp, fmt=None, component=None, preset={'kind': 'standard'}, m
         # provided file content as input
         else:
             data = inp
-        if type(data) == bytes: data = data.decode()
     if not fmt: raise RuntimeError("The format must be specified if you didn't provide a file name.")
     fmt = fmt.strip('.').lower()
     if fmt not in supported_formats['mol']:
         raise RuntimeError(f"The input molecule file format \"{fmt}\" is not supported by molstar.")
+    _check_compression(compress)
+    if encode and encode not in supported_encodings:
+        raise ValueError(f"Invalid encoding \"{encode}\". Supported encodings are {supported_encodings}.")
+    if encode and fmt not in supported_bcif_formats:
+        raise RuntimeError(f"Encoding \"{fmt}\" files into BinaryCIF is not supported. Supported formats are {supported_bcif_formats}.")
+    binary = fmt == 'bcif' or encode == 'bcif'
+    # an empty AssetStore is falsy, so resolve the store before testing `serve`
+    store = serve if isinstance(serve, AssetStore) else (asset_store if serve else None)
+    serve = store is not None
+    if serve: compress = None
+    if data is None:
+        # binary payloads are registered as raw bytes when serving
+        kind = ':'.join(['mol'] + [k for k in (encode, compress, 'raw' if serve and binary else None) if k])
+        data = _read_file(inp, fmt, kind, lambda path: _read_molecule(path, fmt, binary, encode, compress, serve))
+    else:
+        if type(data) == bytes and not binary: data = data.decode()
+        data = _molecule_payload(data, fmt, encode, compress, serve)
+    if encode: fmt = encode
     if fmt == 'cif': fmt = 'mmcif'
     if fmt == 'cifcore': fmt = 'cifCore'
-    # processing preset
-    if 'target' in preset.keys():
-        if not isinstance(preset['target'], list): preset['target'] = [preset['target']]
-        preset['target'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['target']]
-    if 'focus' in preset.keys():
-        if not isinstance(preset['focus'], list): preset['focus'] = [preset['focus']]
-        preset['focus'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['focus']]
-    if 'targets' in preset.keys():
-        if not isinstance(preset['targets'], list): preset['targets'] = [preset['targets']]
-        preset['targets'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['targets']]
-    if 'glycosylation' in preset.keys():
-        if not isinstance(preset['glycosylation'], list): preset['glycosylation'] = [preset['glycosylation']]
-        preset['glycosylation'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['glycosylation']]
-    if 'colors' in preset.keys():
-        if not isinstance(preset['colors'], list): preset['colors'] = [preset['colors']]
-        for color in preset['colors']:
-            if not isinstance(color['targets'], list): color['targets'] = [color['targets']]
-            color['targets'] = [t.to_dict() if isinstance(t, Target) else t for t in color['targets']]
+    _process_preset(preset)
     d = {
         "type": 'mol',
         "data": data,
         "format": fmt,
         "preset": preset,
-        "matrix": None if matrix is None else matrix.T.flatten().tolist()
+        "matrix": None if matrix is None else np.asarray(matrix).T.flatten().tolist()
     }
+    if serve:
+        # let the viewer fetch the file from the asset route instead of inlining it
+        if not store.mounted:
+            raise RuntimeError("The asset store is not mounted. Call `asset_store.init_app(app)` before serving files.")
+        d['type'] = 'url'
+        d['urlfor'] = 'mol'
+        d['data'] = store.url_for(store.register(data, 'application/octet-stream' if binary else 'text/plain'))
+    if compress: d['compression'] = compress
     if component: d['component'] = component
-    return d
+    return _set_id(d, id)
 
-def parse_url(url, fmt=None, component=None, mol=True, preset={'kind': 'standard'}, matrix=None):
+def parse_molecules(inputs, fmt=None, workers=None, executor='thread', **kwargs):
+    """
+    Parse many molecules at once with a pool of workers, e.g. a set of docking poses.
+    Every input is parsed with `parse_molecule()`, so the results are the same as parsing them one by one.
+
+    Parameters
+    ----------
+    `inputs` — List[str | file-like object]
+        The file paths to the molecules or the file contents of the molecules.
+    `fmt` — str (optional)
+        Format of all input molecules. If not specified, the format is inferred from each file name. (default: `None`)
+    `workers` — int (optional)
+        The number of workers. Set to `1` to parse the molecules in the current thread.
+        If not specified, the default of the executor is used. (default: `None`)
+    `executor` — str (optional)
+        Either `thread` or `process`. Threads are enough when reading files dominates, processes also spread
+        the CPU bound work such as `encode='bcif'` over all cores. Inputs and keyword arguments have to be
+        picklable for processes. With `serve`, the processes write the files to the directory of the asset store,
+        from where the server sends them. (default: `'thread'`)
+    `**kwargs`
+        Other parameters passed to `parse_molecule()`, e.g. `component`, `preset`, `compress` or `encode`.
+
+    Returns
+    -------
+    `List[dict | None]`
+        The values for the `data` parameter in input order, `None` for the inputs that failed.
+    `Dict[int, Exception]`
+        The errors raised by the failed inputs, keyed by their index.
+
+    Raises
+    ------
+    `ValueError`
+        If the executor is not supported or an `id` is given, raises ValueError.
+    `RuntimeError`
+        If `serve` is requested but the asset store is not mounted, raises RuntimeError.
+    """
+    if executor not in supported_executors:
+        raise ValueError(f"Invalid executor \"{executor}\". Supported executors are {supported_executors}.")
+    if kwargs.get('id') is not None:
+        raise ValueError("The molecules can not share one `id`, their content hashes are used instead.")
+    serve = kwargs.get('serve')
+    if executor == 'process' and (isinstance(serve, AssetStore) or serve):
+        # the processes get a copy of the store that writes to the same directory
+        store = serve if isinstance(serve, AssetStore) else asset_store
+        if not store.mounted:
+            raise RuntimeError("The asset store is not mounted. Call `asset_store.init_app(app)` before serving files.")
+        kwargs['serve'] = store
+    if 'preset' in kwargs:
+        # normalize the shared preset once instead of once per molecule
+        kwargs['preset'] = copy.copy(kwargs['preset'])
+        _process_preset(kwargs['preset'])
+    inputs = list(inputs)
+    results, errors = [None] * len(inputs), {}
+    if workers == 1:
+        for i, inp in enumerate(inputs):
+            try:
+                results[i] = parse_molecule(inp, fmt, **kwargs)
+            except Exception as e:
+                errors[i] = e
+        return results, errors
+    pool = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    with pool(max_workers=workers) as p:
+        futures = [p.submit(parse_molecule, inp, fmt, **kwargs) for inp in inputs]
+        for i, future in enumerate(futures):
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                errors[i] = e
+    return results, errors
+
+def parse_url(url, fmt=None, component=None, mol=True, preset={'kind': 'standard'}, matrix=None, id=None):
     """
     Parse the URL for `data` parameter of molstar viewer. 
     The url can be either a structure or a molstar state/session file.
@@ -112,7 +359,7 @@ def parse_url(url, fmt=None, component=None, mol=True, preset={'kind': 'standard
     `fmt` — str (optional)
         Format of the input content. (default: `None`)
 
-        Supported formats for structures include `cif`, `cifcore`, `pdb`, `pdbqt`, `gro`, `xyz`, `mol`, `sdf`, `mol2`, `lammps_data`, `lammps_traj_data`
+        Supported formats for structures include `cif`, `cifcore`, `bcif`, `pdb`, `pdbqt`, `gro`, `xyz`, `mol`, `sdf`, `mol2`, `lammps_data`, `lammps_traj_data`
 
         Supported formats for states and sessions include `json`, `molj`, `molx`, `zip`
 
@@ -130,6 +377,9 @@ def parse_url(url, fmt=None, component=None, mol=True, preset={'kind': 'standard
     `matrix` — numpy.ndarray (optional)
         The homogeneous transformation matrix for the molecule.
         Only rigid transformations are allowed.
+    `id` — str (optional)
+        A stable key of the entry in `data`, see `parse_molecule`. If not specified, the hash of the URL
+        and the options is used. (default: `None`)
 
     Returns
     -------
@@ -152,40 +402,24 @@ def parse_url(url, fmt=None, component=None, mol=True, preset={'kind': 'standard
         raise RuntimeError(f"The input file format \"{fmt}\" is not supported by molstar.")
     if fmt == 'cif': fmt = 'mmcif'
     if fmt == 'cifcore': fmt = 'cifCore'
-    # processing preset
-    if 'target' in preset.keys():
-        if not isinstance(preset['target'], list): preset['target'] = [preset['target']]
-        preset['target'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['target']]
-    if 'focus' in preset.keys():
-        if not isinstance(preset['focus'], list): preset['focus'] = [preset['focus']]
-        preset['focus'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['focus']]
-    if 'targets' in preset.keys():
-        if not isinstance(preset['targets'], list): preset['targets'] = [preset['targets']]
-        preset['targets'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['targets']]
-    if 'glycosylation' in preset.keys():
-        if not isinstance(preset['glycosylation'], list): preset['glycosylation'] = [preset['glycosylation']]
-        preset['glycosylation'] = [t.to_dict() if isinstance(t, Target) else t for t in preset['glycosylation']]
-    if 'colors' in preset.keys():
-        if not isinstance(preset['colors'], list): preset['colors'] = [preset['colors']]
-        for color in preset['colors']:
-            if not isinstance(color['targets'], list): color['targets'] = [color['targets']]
-            color['targets'] = [t.to_dict() if isinstance(t, Target) else t for t in color['targets']]
+    _process_preset(preset)
     d = {
         "type": 'url',
         "urlfor": urlfor,
         "data": url,
         "format": fmt,
         "preset": preset,
-        "matrix": None if matrix is None else matrix.T.flatten().tolist()
+        "matrix": None if matrix is None else np.asarray(matrix).T.flatten().tolist()
     }
     if component: d['component'] = component
-    return d
+    return _set_id(d, id)
 
-def parse_coordinate(inp, fmt=None):
+def parse_coordinate(inp, fmt=None, compress=None):
     """
     Parse the coordinate file for loading a structure. This method encode the binary coordinate file
     into string with base64, so it is not recommended if you are about load a trajectory that is larger
-    than 10 MB. For loading biger trajectories, try passing a url to molstar.
+    than 10 MB. For loading biger trajectories, try passing a url to molstar or streaming the file with
+    `get_trajectory(..., stream=True)`.
 
     Parameters
     ----------
@@ -197,6 +431,9 @@ def parse_coordinate(inp, fmt=None):
     `fmt` — str (optional)
         Format of the input molecule. 
         Supported formats include `dcd`, `xtc`, `trr`, `nctraj`, `lammpstrj` (default: `None`)
+    `compress` — str (optional)
+        Compress the coordinates with `gzip` or `deflate` before encoding them with base64.
+        The browser decompresses them before loading the trajectory. (default: `None`)
 
     Returns
     -------
@@ -213,8 +450,7 @@ def parse_coordinate(inp, fmt=None):
         # if format is not specified, infer from filename
         if not fmt:
             name, fmt = os.path.splitext(inp)
-        with open(inp, 'rb') as f:
-            data = f.read()
+        data = None
     else:
         # provided a file-like object as input
         if isinstance(inp, IOBase):
@@ -222,18 +458,80 @@ def parse_coordinate(inp, fmt=None):
         # provided file content as input
         else:
             data = inp
-    assert type(data) == bytes
+        assert type(data) == bytes
     if not fmt: raise RuntimeError("The format must be specified if you didn't provide a file name.")
     fmt = fmt.strip('.').lower()
     if fmt not in supported_formats['coords']:
         raise RuntimeError(f"The input coordinate file format \"{fmt}\" is not supported by molstar.")
-    return {
+    _check_compression(compress)
+    if data is None:
+        if compress:
+            encoded = _read_file(inp, fmt, f'coord:{compress}', lambda path: _read_compressed(path, compress))
+        else:
+            encoded = _read_file(inp, fmt, 'coord', _read_base64)
+    elif compress:
+        encoded = _compress(data, compress)
+    else:
+        encoded = encode_base64(data)
+    d = {
         'type': 'coord',
         "format": fmt,
-        "data": base64.b64encode(data).decode('utf-8')
+        "data": encoded
     }
+    if compress: d['compression'] = compress
+    return d
+
+def quantize_coordinate(inp, precision=0.01, compress='deflate', start=0, stop=None, stride=1):
+    """
+    Encode the frames of a trajectory as fixed-point integers for loading a structure, see `encode_quantized`.
+
+    The first frame is sent in full and the other frames as 16-bit (or 32-bit if needed) differences
+    to it, so the payload is 2 to 4 times smaller than the frames as `float32` before compression and
+    compresses much better. The viewer decodes the frames back into coordinates, every coordinate
+    is off by at most `precision / 2`.
 
-def get_trajectory(topology, coordinate):
+    Parameters
+    ----------
+    `inp` — str | numpy.ndarray
+        The path to a `dcd`, `trr` or `xtc` file, or the coordinates in angstroms with shape (nframes, natoms, 3).
+    `precision` — float (optional)
+        The precision of the coordinates in angstroms. (default: `0.01`)
+    `compress` — str (optional)
+        Compress the encoded frames with `gzip` or `deflate`, or send them without compression if `None`. (default: `'deflate'`)
+    `start` — int (optional)
+        The first frame to encode. (default: `0`)
+    `stop` — int (optional)
+        The frame after the last one to encode, until the end of the trajectory if not specified. (default: `None`)
+    `stride` — int (optional)
+        Encode every `stride`-th frame. (default: `1`)
+
+    Returns
+    -------
+    `dict`
+        The value for the `coordinate` parameter of helper function `get_trajectory()`.
+
+    Raises
+    ------
+    `RuntimeError`
+        Raised if the coordinate file format can not be read
+    `ValueError`
+        Raised if the coordinates have the wrong shape, the precision is not positive or the compression is not supported
+    """
+    _check_compression(compress)
+    if isinstance(inp, (str, os.PathLike)):
+        coords = TrajectoryFile(inp).read(start, stop, stride)
+    else:
+        coords = np.asarray(inp)[start:stop:stride]
+    data = encode_quantized(coords, precision)
+    d = {
+        'type': 'coord',
+        'format': 'quantized',
+        'data': _compress(data, compress) if compress else encode_base64(data)
+    }
+    if compress: d['compression'] = compress
+    return d
+
+def get_trajectory(topology, coordinate, id=None, stream=False, window=100, start=0, stop=None, stride=1, atoms=None):
     """
     Load a trajectory into molstar viewer.
 
@@ -241,21 +539,106 @@ def get_trajectory(topology, coordinate):
     ----------
     `topology` — dict
         The topology of molecule. Generated with helper function `parse_molecule()` or `parse_url()`
-    `coordinate` — dict
-        The coordinates of the trajectory. Generated with helper function `parse_coordinate()` or `parse_url()`
+    `coordinate` — dict | str
+        The coordinates of the trajectory. Generated with helper function `parse_coordinate()`, `quantize_coordinate()` or `parse_url()`.
+        When streaming, the path to a `dcd`, `trr` or `xtc` file.
+    `id` — str (optional)
+        A stable key of the entry in `data`, see `parse_molecule`. (default: `None`)
+    `stream` — bool | TrajectoryServer (optional)
+        If set, the coordinate file is registered in a trajectory server and the viewer only
+        downloads the window of frames around the current `frame`. Pass a `TrajectoryServer` to
+        use a server other than the default `trajectory_server`. The server has to be mounted
+        with `trajectory_server.init_app(app)`. Registrations are shared with the other worker
+        processes through the directory of the server, see `TrajectoryServer`. (default: `False`)
+    `window` — int (optional)
+        Number of frames the viewer downloads at a time when streaming. (default: `100`)
+    `start` — int (optional)
+        The first frame to load. (default: `0`)
+    `stop` — int (optional)
+        The frame after the last one to load, until the end of the trajectory if not specified. (default: `None`)
+    `stride` — int (optional)
+        Load every `stride`-th frame. (default: `1`)
+    `atoms` — Target | TargetArray | dict | List | numpy.ndarray (optional)
+        Only load these atoms, given as targets or as the indices of the atoms in the topology.
+        The topology is reduced to the same atoms and sent as BinaryCIF. (default: all atoms)
+
+        Selecting frames or atoms requires the path to a `dcd`, `trr` or `xtc` file as the `coordinate`,
+        the reduced trajectory is written once and cached, see `reduce_trajectory`.
 
     Returns
     -------
     `dict`
         The value for the `data` parameter.
+
+    Raises
+    ------
+    `RuntimeError`
+        Raised if the trajectory server is not mounted or the coordinate format can not be streamed
+    `ValueError`
+        Raised if streaming or selecting frames or atoms is requested for anything but a coordinate file path,
+        or the window or stride is not positive
     """
-    return {
+    if start != 0 or stop is not None or stride != 1 or atoms is not None:
+        if not isinstance(coordinate, (str, os.PathLike)) or not os.path.isfile(coordinate):
+            raise ValueError("Selecting frames or atoms requires the path to the coordinate file.")
+        indices = None
+        if atoms is not None:
+            topology, indices = _reduce_topology(topology, atoms, TrajectoryFile(coordinate).natoms)
+        coordinate = reduce_trajectory(coordinate, start=start, stop=stop, stride=stride, atoms=indices)
+        if not stream: coordinate = parse_coordinate(coordinate)
+    # an empty TrajectoryServer is falsy, so resolve the server before testing `stream`
+    server = stream if isinstance(stream, TrajectoryServer) else (trajectory_server if stream else None)
+    if server is not None:
+        if not server.mounted:
+            raise RuntimeError("The trajectory server is not mounted. Call `trajectory_server.init_app(app)` before streaming trajectories.")
+        if not isinstance(coordinate, (str, os.PathLike)) or not os.path.isfile(coordinate):
+            raise ValueError("Streaming requires the path to the coordinate file.")
+        if window < 1: raise ValueError("The window must contain at least one frame.")
+        key = server.register(coordinate)
+        index = server.index(key)
+        coordinate = {
+            'type': 'stream',
+            'format': index.fmt,
+            'data': server.url_for(key),
+            'frames': index.frames,
+            'window': int(window)
+        }
+    return _set_id({
         'type': 'traj',
         'topo': topology,
         'coords': coordinate
-    }
-
-def get_volume(url_obj, isovalues, entryId, isBinary, isLazy=False):
+    }, id)
+
+def _reduce_topology(topology, atoms, natoms):
+    # the topology with only the selected atoms as BinaryCIF, and the indices of these atoms
+    if not isinstance(topology, dict) or topology.get('type') != 'mol' or topology.get('compression') \
+            or topology.get('format') not in ('pdb', 'pdbqt', 'gro', 'mmcif'):
+        raise ValueError("Selecting atoms requires a PDB, GRO or mmCIF topology parsed by `parse_molecule()` without `serve`, `compress` or `encode`.")
+    columns = read_atom_site(topology['data'], topology['format'])
+    # the coordinates belong to the first model of the topology
+    models = np.ma.filled(columns['pdbx_PDB_model_num'], 1)
+    first = models == models[0]
+    if int(first.sum()) != natoms:
+        raise ValueError(f"The topology has {int(first.sum())} atoms but the trajectory has {natoms}.")
+    targets = atoms if isinstance(atoms, list) else [atoms]
+    if all(isinstance(t, (Target, TargetArray, dict)) for t in targets):
+        # imported here since the structure module imports the helpers through the utils package
+        from ..structure import AtomTable
+        indices = np.flatnonzero(AtomTable.read(topology['data'], topology['format']).mask(targets))
+    else:
+        indices = np.asarray(atoms)
+        if indices.dtype == bool: indices = np.flatnonzero(indices)
+        indices = indices.astype(np.int64).reshape(-1)
+        if indices.size and (indices.min() < 0 or indices.max() >= natoms):
+            raise ValueError(f"Atom indices out of range, the topology has {natoms} atoms.")
+    keep = np.flatnonzero(first)[indices]
+    reduced = {name: values[keep] for name, values in columns.items()}
+    d = {key: value for key, value in topology.items() if key not in ('id', 'hash')}
+    d['data'] = encode_base64(encode_atom_site(reduced))
+    d['format'] = 'bcif'
+    return _set_id(d, None), indices
+
+def get_volume(url_obj, isovalues, entryId, isBinary, isLazy=False, id=None):
     """
     Load a volume into molstar viewer with a URL. Volume file can only be loaded with URL due to its usually large file size. The format can be either specified or inferred from the file extension.
 
@@ -277,6 +660,8 @@ def get_volume(url_obj, isovalues, entryId, isBinary, isLazy=False):
         Whether the volume file is in binary format.
     `isLazy` — bool (optional)
         Whether to load the volume lazily. (default: `False`)
+    `id` — str (optional)
+        A stable key of the entry in `data`, see `parse_molecule`. (default: `None`)
 
     Returns
     -------
@@ -285,14 +670,14 @@ def get_volume(url_obj, isovalues, entryId, isBinary, isLazy=False):
     """
     if type(isovalues) != list: isovalues = [isovalues]
     if type(entryId) != list: entryId = [entryId]
-    return {
+    return _set_id({
         'type': 'volume',
         'source': url_obj,
         'isovalues': isovalues,
         'entryId': entryId,
         'isBinary': isBinary,
         'isLazy': isLazy
-    }
+    }, id)
 
 def get_targets(chain, residue=None, atom=None, auth=False):
     """
@@ -302,8 +687,9 @@ def get_targets(chain, residue=None, atom=None, auth=False):
     ----------
     `chain` — str
         Name of the target chain
-    `residue` — int | List[int] (optional)
-        Residue index of the target residues, corresponding to the structure file. (default: `None`)
+    `residue` — int | str | List[int | str] (optional)
+        Residue index of the target residues, corresponding to the structure file.
+        Strings may end with an insertion code, e.g. `'52A'`. (default: `None`)
     `atom` — int | List[int] (optional)
         Index of the target atom(s), corresponding to the structure file but started from 0. (default: `None`)
     `auth` — bool (optional)
@@ -313,6 +699,11 @@ def get_targets(chain, residue=None, atom=None, auth=False):
     -------
     `Target`
         Selected chains, residues or atoms.
+
+    Raises
+    ------
+    `ValueError`
+        If a residue string is not a number with an optional insertion code.
     """
     target = Target()
     target.auth = auth
@@ -322,13 +713,13 @@ def get_targets(chain, residue=None, atom=None, auth=False):
         for res in residue:
             if type(res) == int: target.chains[-1].add_residue(res)
             elif type(res) == str:
-                try:
-                    num = eval(res)
-                    target.chains[-1].add_residue(num)
-                except:
-                    num = eval(res[:-1])
-                    ins = res[-1]
-                    target.chains[-1].add_residue(num, ins_code=ins)
+                # residue numbers may end with an insertion code, e.g. '52A'
+                match = _residue_number.match(res)
+                if not match:
+                    raise ValueError(f"Invalid residue number: {res}")
+                num, ins = int(match.group(1)), match.group(2)
+                if ins: target.chains[-1].add_residue(num, ins_code=ins)
+                else: target.chains[-1].add_residue(num)
             if atom is not None:
                 if type(atom) != list: atom = [atom]
                 for a in atom:
@@ -362,11 +753,11 @@ def create_component(label, targets, representation=Representation()):
     if type(representation) != list: representation = [representation]
     return {
         'label': label,
-        'targets': [t.to_dict() if isinstance(t, Target) else t for t in targets],
+        'targets': [t.to_dict() if isinstance(t, (Target, TargetArray)) else t for t in targets],
         'representation': [r.to_dict() if isinstance(r, Representation) else r for r in representation]
     }
 
-def get_selection(targets, select=True, add=False):
+def get_selection(targets, select=True, add=False, compact=False):
     """
     Select specific targets in the molstar viewer. The returned value can be passed to either `selection` or 
     `hover` parameters.
@@ -382,6 +773,9 @@ def get_selection(targets, select=True, add=False):
     `add` — bool (optional)
         If set to False, the viewer will clear the selections in corresponding mode before adding new selections.
         Otherwise the new selections will be added to existed ones. (default: `False`)
+    `compact` — bool (optional)
+        Send the targets as residue and atom ranges, see `Target.to_dict`. Recommended for large selections.
+        (default: `False`)
 
     Returns
     -------
@@ -392,11 +786,11 @@ def get_selection(targets, select=True, add=False):
     else: modifier = 'set'
     if type(targets) != list: targets = [targets]
     return {
-        'targets': [t.to_dict() if isinstance(t, Target) else t for t in targets],
+        'targets': [t.to_dict(compact=compact) if isinstance(t, (Target, TargetArray)) else t for t in targets],
         'modifier': modifier
     }
 
-def get_focus(targets, analyse=False):
+def get_focus(targets, analyse=False, compact=False):
     """
     Let the camera focus on the specified targets. 
     If `analyse` were set to true, non-covalent interactions within 5 angstroms will be analyzed.
@@ -407,6 +801,8 @@ def get_focus(targets, analyse=False):
         List of targets, whose value should be generated by helper function `get_targets`
     `analyse` — bool (optional)
         Whether to analyse the non-covalent interactions of targets to its surroundings within 5 angstroms  (default: `False`)
+    `compact` — bool (optional)
+        Send the targets as residue and atom ranges, see `Target.to_dict`. (default: `False`)
 
     Returns
     -------
@@ -415,7 +811,7 @@ def get_focus(targets, analyse=False):
     """
     if type(targets) != list: targets = [targets]
     return {
-        'targets': [t.to_dict() if isinstance(t, Target) else t for t in targets],
+        'targets': [t.to_dict(compact=compact) if isinstance(t, (Target, TargetArray)) else t for t in targets],
         'analyse': analyse
     }
 
@@ -464,10 +860,10 @@ def get_measurement(targets, type='label', options=None, add=False):
         raise ValueError(f"At least {minimum_required[type]} required by the measurement \"{type}\", only {len(targets)} provided.")
 
     for t in range(minimum_required[type]):
-        if not isinstance(targets[t], Target) or not targets[t].valid:
+        if not isinstance(targets[t], (Target, TargetArray)) or not targets[t].valid:
             raise TypeError(f"Target {t} is not a valid Target object. Use helper function `get_targets` to generate targets.")
     return {
-        'targets': [t.to_dict() if isinstance(t, Target) else t for t in targets],
+        'targets': [t.to_dict() if isinstance(t, (Target, TargetArray)) else t for t in targets],
         'type': type,
         'mode': 'add' if add else 'set',
     }
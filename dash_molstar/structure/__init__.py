@@ -0,0 +1,3 @@
+from .table import AtomTable, missing_seq_id
+from .spatial import SpatialIndex
+from .selection import Selection, compile_selection
@@ -0,0 +1,277 @@
+import fnmatch
+import re
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+
+# residue names of the predefined selections
+protein_residues = [
+    'ALA', 'ARG', 'ASN', 'ASP', 'CYS', 'GLN', 'GLU', 'GLY', 'HIS', 'ILE', 'LEU', 'LYS', 'MET', 'PHE', 'PRO', 'SER',
+    'THR', 'TRP', 'TYR', 'VAL', 'SEC', 'PYL', 'MSE', 'HID', 'HIE', 'HIP', 'HSD', 'HSE', 'HSP', 'CYX', 'ASH', 'GLH', 'LYN'
+]
+nucleic_residues = ['A', 'C', 'G', 'U', 'I', 'DA', 'DC', 'DG', 'DT', 'DI', 'DU']
+water_residues = ['HOH', 'WAT', 'H2O', 'DOD', 'SOL', 'TIP', 'TIP3', 'TIP4', 'SPC']
+backbone_atoms = ['N', 'CA', 'C', 'O']
+
+# keywords followed by values, mapped to the AtomTable column they match
+_value_keywords = {
+    'chain': 'chain',
+    'authchain': 'auth_chain',
+    'resname': 'res_name',
+    'name': 'atom_name',
+    'element': 'element',
+    'elem': 'element',
+    'resid': 'seq_id',
+    'resnum': 'auth_seq_id',
+    'index': 'index',
+}
+_numeric_keywords = ['resid', 'resnum', 'index']
+_flags = ['all', 'none', 'protein', 'nucleic', 'water', 'hetero', 'hydrogen', 'backbone', 'sidechain', 'ligand']
+_reserved = ['and', 'or', 'not', 'within', 'of', '(', ')'] + list(_value_keywords) + _flags
+_token = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|\'([^\']*)\'|([^\s()]+))')
+_range = re.compile(r'^(-?\d+)(?:(?:-|:|\.\.)(-?\d+))?([A-Za-z]?)$')
+
+class Selection(object):
+    """
+    A compiled selection expression. Use `compile_selection` to create one, the same expression
+    is only parsed once.
+
+    Expressions combine the following terms with `and`, `or`, `not` and parentheses:
+
+    - `chain A B`, `authchain A` — label or author chain names
+    - `resname LIG`, `name CA CB`, `element C N` — residue, atom and element names, `*` and `?` are wildcards
+    - `resid 10-250`, `resnum 10-250 52A` — label or author residue numbers. A value is a number, an
+      inclusive range written as `10-250`, `10:250` or `10..250`, or for `resnum` a single number
+      with an insertion code such as `52A`. Ranges with insertion codes like `10-20A` are rejected
+    - `index 0-99` — atom indices, starting from 0
+    - `protein`, `nucleic`, `water`, `hetero`, `hydrogen`, `backbone`, `sidechain`, `ligand`, `all`, `none`
+    - `within 6 of <term>` — atoms within a distance of the term
+
+    e.g. `chain A and resnum 10-250 and not hydrogen` or `within 6 of resname LIG`.
+    """
+    def __init__(self, expression: str, tree: Tuple):
+        self.__expression = expression
+        self.__tree = tree
+
+    def __repr__(self):
+        return f"Selection({self.__expression!r})"
+
+    @property
+    def expression(self) -> str:
+        return self.__expression
+
+    @property
+    def tree(self) -> Tuple:
+        """The parsed expression as nested tuples"""
+        return self.__tree
+
+    def evaluate(self, table) -> np.ndarray:
+        """
+        Evaluate the selection on an `AtomTable`.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            A boolean array with one value per atom.
+        """
+        return _evaluate(self.__tree, table)
+
+@lru_cache(maxsize=512)
+def compile_selection(expression: str) -> Selection:
+    """
+    Parse a selection expression, see `Selection` for the syntax. The results are cached by expression.
+
+    Raises
+    ------
+    `ValueError`
+        If the expression is invalid.
+    """
+    tokens = _tokenize(expression)
+    parser = _Parser(expression, tokens)
+    tree = parser.parse()
+    return Selection(expression, tree)
+
+def _tokenize(expression: str) -> List[Tuple[str, bool, int]]:
+    # (token, quoted, position), quoted tokens are never keywords
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _token.match(expression, position)
+        if not match:
+            raise ValueError(f"Invalid selection \"{expression}\" at position {position}.")
+        if match.group(1) or match.group(2):
+            tokens.append((match.group(1) or match.group(2), False, match.start(1) if match.group(1) else match.start(2)))
+        elif match.group(3) is not None or match.group(4) is not None:
+            value = match.group(3) if match.group(3) is not None else match.group(4)
+            tokens.append((value, True, match.start()))
+        else:
+            tokens.append((match.group(5), False, match.start(5)))
+        position = match.end()
+    return tokens
+
+class _Parser(object):
+    # recursive descent parser, `or` binds weaker than `and`, which binds weaker than `not` and `within`
+    def __init__(self, expression: str, tokens: List[Tuple[str, bool, int]]):
+        self.expression = expression
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self) -> Tuple:
+        if not self.tokens:
+            raise ValueError("The selection is empty.")
+        tree = self.parse_or()
+        if self.position < len(self.tokens):
+            self.error("Unexpected")
+        return tree
+
+    def peek(self) -> str:
+        if self.position < len(self.tokens):
+            token, quoted, start = self.tokens[self.position]
+            return None if quoted else token.lower()
+        return None
+
+    def error(self, message: str):
+        if self.position < len(self.tokens):
+            token, quoted, start = self.tokens[self.position]
+            raise ValueError(f"{message} \"{token}\" at position {start} of selection \"{self.expression}\".")
+        raise ValueError(f"{message} end of selection \"{self.expression}\".")
+
+    def parse_or(self) -> Tuple:
+        tree = self.parse_and()
+        while self.peek() == 'or':
+            self.position += 1
+            tree = ('or', tree, self.parse_and())
+        return tree
+
+    def parse_and(self) -> Tuple:
+        tree = self.parse_not()
+        while self.peek() == 'and':
+            self.position += 1
+            tree = ('and', tree, self.parse_not())
+        return tree
+
+    def parse_not(self) -> Tuple:
+        keyword = self.peek()
+        if keyword == 'not':
+            self.position += 1
+            return ('not', self.parse_not())
+        if keyword == 'within':
+            self.position += 1
+            radius = self.number()
+            if self.peek() != 'of':
+                self.error("Expected \"of\" but got")
+            self.position += 1
+            return ('within', radius, self.parse_not())
+        return self.parse_term()
+
+    def parse_term(self) -> Tuple:
+        keyword = self.peek()
+        if keyword == '(':
+            self.position += 1
+            tree = self.parse_or()
+            if self.peek() != ')':
+                self.error("Expected \")\" but got")
+            self.position += 1
+            return tree
+        if keyword in _flags:
+            self.position += 1
+            return ('flag', keyword)
+        if keyword in _value_keywords:
+            self.position += 1
+            values = self.values(keyword)
+            return ('values', _value_keywords[keyword], values)
+        self.error("Unexpected")
+
+    def number(self) -> float:
+        if self.position < len(self.tokens):
+            token = self.tokens[self.position][0]
+            try:
+                value = float(token)
+            except ValueError:
+                self.error("Expected a number but got")
+            self.position += 1
+            return value
+        self.error("Expected a number but got")
+
+    def values(self, keyword: str) -> Tuple:
+        values = []
+        while self.position < len(self.tokens):
+            token, quoted, start = self.tokens[self.position]
+            if not quoted and token.lower() in _reserved:
+                break
+            if keyword in _numeric_keywords:
+                match = _range.match(token)
+                if not match or (keyword != 'resnum' and match.group(3)):
+                    self.error(f"Invalid value for \"{keyword}\":")
+                if match.group(2) is not None and match.group(3):
+                    self.error(f"Insertion codes can not be combined with a range in \"{keyword}\":")
+                first = int(match.group(1))
+                last = int(match.group(2)) if match.group(2) is not None else first
+                values.append((first, last, match.group(3)))
+            else:
+                values.append(token)
+            self.position += 1
+        if not values:
+            self.error(f"Expected a value for \"{keyword}\" but got")
+        return tuple(values)
+
+def _evaluate(tree: Tuple, table) -> np.ndarray:
+    kind = tree[0]
+    if kind == 'and':
+        return _evaluate(tree[1], table) & _evaluate(tree[2], table)
+    if kind == 'or':
+        return _evaluate(tree[1], table) | _evaluate(tree[2], table)
+    if kind == 'not':
+        return ~_evaluate(tree[1], table)
+    if kind == 'within':
+        return table.within_mask(tree[1], _evaluate(tree[2], table))
+    if kind == 'flag':
+        return _flag(tree[1], table)
+    column = tree[1]
+    if column in ('seq_id', 'auth_seq_id', 'index'):
+        return _match_numbers(table, column, tree[2])
+    return _match_strings(table[column], tree[2])
+
+def _match_strings(values: np.ndarray, patterns: Tuple) -> np.ndarray:
+    # patterns are matched against the unique values only
+    unique, inverse = np.unique(values, return_inverse=True)
+    matched = np.zeros(len(unique), dtype=bool)
+    plain = [pattern for pattern in patterns if not any(char in pattern for char in '*?[')]
+    matched |= np.isin(unique, plain)
+    for pattern in patterns:
+        if pattern not in plain:
+            matched |= np.array([fnmatch.fnmatchcase(value, pattern) for value in unique.tolist()], dtype=bool)
+    return matched[inverse.ravel()]
+
+def _match_numbers(table, column: str, ranges: Tuple) -> np.ndarray:
+    values = table[column]
+    mask = np.zeros(len(values), dtype=bool)
+    for first, last, ins_code in ranges:
+        if ins_code:
+            mask |= (values == first) & (table.ins_code == ins_code)
+        else:
+            mask |= (values >= min(first, last)) & (values <= max(first, last))
+    return mask
+
+def _flag(name: str, table) -> np.ndarray:
+    if name == 'all':
+        return np.ones(len(table), dtype=bool)
+    if name == 'none':
+        return np.zeros(len(table), dtype=bool)
+    if name == 'protein':
+        return _match_strings(table.res_name, tuple(protein_residues))
+    if name == 'nucleic':
+        return _match_strings(table.res_name, tuple(nucleic_residues))
+    if name == 'water':
+        return _match_strings(table.res_name, tuple(water_residues))
+    if name == 'hetero':
+        return table.hetero.copy()
+    if name == 'hydrogen':
+        return _match_strings(table.element, ('H', 'D'))
+    if name == 'backbone':
+        return _flag('protein', table) & _match_strings(table.atom_name, tuple(backbone_atoms))
+    if name == 'sidechain':
+        return _flag('protein', table) & ~_match_strings(table.atom_name, tuple(backbone_atoms + ['OXT']))
+    # ligand
+    return table.hetero & ~_flag('water', table)
@@ -0,0 +1,153 @@
+from typing import Tuple
+import numpy as np
+
+class SpatialIndex(object):
+    """
+    A cell list over atomic coordinates for radius and nearest neighbour queries.
+
+    The coordinates are binned into cubic cells and sorted by cell once, a query only measures
+    the distances to the atoms in the cells around the query points. Only occupied cells are
+    stored, so sparse assemblies do not allocate an empty grid.
+
+    Parameters
+    ----------
+    `coords` — numpy.ndarray
+        The coordinates, shape `(n, 3)`.
+    `cell_size` — float (optional)
+        Edge length of the cells in angstroms. Queries are fastest when the radius is close to
+        the cell size. (default: `5.0`)
+    """
+    def __init__(self, coords: np.ndarray, cell_size: float = 5.0):
+        if cell_size <= 0:
+            raise ValueError("The cell size must be positive.")
+        coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+        self.__cell_size = float(cell_size)
+        self.__origin = coords.min(axis=0) if len(coords) else np.zeros(3, dtype=np.float32)
+        cells = self._cells(coords)
+        self.__shape = (cells.max(axis=0) + 1) if len(coords) else np.ones(3, dtype=np.int64)
+        keys = self._keys(cells)
+        self.__order = np.argsort(keys, kind='stable')
+        self.__coords = coords[self.__order]
+        sorted_keys = keys[self.__order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(coords) else np.zeros(0, dtype=np.int64)
+        self.__cell_keys = sorted_keys[starts]
+        self.__cell_starts = np.r_[starts, len(coords)].astype(np.int64)
+
+    def __len__(self):
+        return len(self.__order)
+
+    @property
+    def cell_size(self) -> float:
+        return self.__cell_size
+
+    def query_radius(self, points: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Find the atoms within `radius` of any of the points.
+
+        Parameters
+        ----------
+        `points` — numpy.ndarray
+            The query points, shape `(m, 3)`.
+        `radius` — float
+            The distance cutoff in angstroms.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            The sorted positions of the atoms in the indexed coordinates.
+        """
+        if radius < 0:
+            raise ValueError("The radius must not be negative.")
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        query, atoms = self._pairs(points, int(np.ceil(radius / self.__cell_size)))
+        close = self._distances(points, query, atoms) <= np.float32(radius) ** 2
+        return np.unique(self.__order[atoms[close]])
+
+    def query_knn(self, points: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `k` nearest atoms of every point.
+
+        Parameters
+        ----------
+        `points` — numpy.ndarray
+            The query points, shape `(m, 3)`.
+        `k` — int (optional)
+            The number of neighbours. (default: `1`)
+
+        Returns
+        -------
+        `Tuple[numpy.ndarray, numpy.ndarray]`
+            The distances and the positions of the neighbours in the indexed coordinates,
+            both of shape `(m, k)` and sorted by distance.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        if not 0 < k <= len(self):
+            raise ValueError(f"k must be between 1 and the number of atoms ({len(self)}).")
+        distances = np.empty((len(points), k), dtype=np.float32)
+        indices = np.empty((len(points), k), dtype=np.int64)
+        cells = self._cells(points)
+        # start from the cells next to the grid for points outside of it
+        outside = np.maximum(np.maximum(-cells, cells - self.__shape + 1), 0).max(axis=1)
+        reach = np.maximum(outside, 1)
+        pending = np.arange(len(points))
+        while pending.size:
+            # once the cells around a point are about as many as the occupied cells, measuring all atoms is cheaper
+            brute = (2 * reach[pending] + 1) ** 3 >= len(self.__cell_keys)
+            for point in pending[brute]:
+                diff = self.__coords - points[point]
+                squared = np.einsum('ij,ij->i', diff, diff)
+                nearest = np.argpartition(squared, k - 1)[:k]
+                nearest = nearest[np.argsort(squared[nearest], kind='stable')]
+                distances[point] = np.sqrt(squared[nearest])
+                indices[point] = self.__order[nearest]
+            pending = pending[~brute]
+            for point_reach in np.unique(reach[pending]):
+                group = pending[reach[pending] == point_reach]
+                query, atoms = self._pairs(points[group], int(point_reach))
+                squared = self._distances(points[group], query, atoms)
+                # the searched cells contain every atom within reach cells, closer atoms can not be missed
+                limit = (point_reach * self.__cell_size) ** 2
+                exact = np.bincount(query[squared <= limit], minlength=group.size) >= k
+                order = np.lexsort((squared, query))
+                query, atoms, squared = query[order], atoms[order], squared[order]
+                starts = np.searchsorted(query, np.arange(group.size))
+                done = np.flatnonzero(exact)
+                rows = starts[done][:, None] + np.arange(k)
+                distances[group[done]] = np.sqrt(squared[rows])
+                indices[group[done]] = self.__order[atoms[rows]]
+                reach[group[~exact]] *= 2
+                pending = np.setdiff1d(pending, group[done])
+        return distances, indices
+
+    def _cells(self, coords: np.ndarray) -> np.ndarray:
+        return np.floor((coords - self.__origin) / self.__cell_size).astype(np.int64)
+
+    def _keys(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[:, 0] * self.__shape[1] + cells[:, 1]) * self.__shape[2] + cells[:, 2]
+
+    def _pairs(self, points: np.ndarray, reach: int) -> Tuple[np.ndarray, np.ndarray]:
+        # pair every query point with the sorted positions of the atoms in the cells around it
+        steps = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+        # skip the corner cells that are further than reach cells from every point of the center cell
+        gaps = np.maximum(np.abs(offsets) - 1, 0)
+        offsets = offsets[(gaps ** 2).sum(axis=1) <= reach ** 2]
+        cells = (self._cells(points)[:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+        query = np.repeat(np.arange(len(points)), len(offsets))
+        inside = np.all((cells >= 0) & (cells < self.__shape), axis=1)
+        cells, query = cells[inside], query[inside]
+        keys = self._keys(cells)
+        slots = np.searchsorted(self.__cell_keys, keys)
+        slots[slots == len(self.__cell_keys)] = 0
+        occupied = self.__cell_keys[slots] == keys if len(self.__cell_keys) else np.zeros(len(keys), dtype=bool)
+        slots, query = slots[occupied], query[occupied]
+        starts = self.__cell_starts[slots]
+        counts = self.__cell_starts[slots + 1] - starts
+        total = int(counts.sum())
+        # concatenation of arange(start, start + count) for every occupied cell
+        atoms = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+        return np.repeat(query, counts), atoms
+
+    def _distances(self, points: np.ndarray, query: np.ndarray, atoms: np.ndarray) -> np.ndarray:
+        diff = self.__coords[atoms] - points[query]
+        return np.einsum('ij,ij->i', diff, diff)
@@ -0,0 +1,426 @@
+from io import IOBase
+import os
+from typing import Dict, List, Optional, Union
+import numpy as np
+from ..utils.atom_site import read_atom_site
+from ..utils.target import Target, Boundary
+from ..utils.target_array import TargetArray, missing
+from .spatial import SpatialIndex
+from .selection import Selection, compile_selection
+
+# label_seq_id of atoms outside of polymers, e.g. ligands and waters
+missing_seq_id = np.iinfo(np.int32).min
+
+# atom_site columns read into the table
+_atom_site_columns = {
+    'chain': 'label_asym_id',
+    'auth_chain': 'auth_asym_id',
+    'seq_id': 'label_seq_id',
+    'auth_seq_id': 'auth_seq_id',
+    'ins_code': 'pdbx_PDB_ins_code',
+    'res_name': 'label_comp_id',
+    'atom_name': 'label_atom_id',
+    'element': 'type_symbol',
+    'alt_id': 'label_alt_id',
+    'group': 'group_PDB',
+    'model': 'pdbx_PDB_model_num',
+    'x': 'Cartn_x',
+    'y': 'Cartn_y',
+    'z': 'Cartn_z',
+}
+
+class AtomTable(object):
+    """
+    The atoms of a structure as NumPy columns, the base for selecting, filtering and analysing
+    structures on the server.
+
+    Every atom keeps its `index` in the loaded model, which is the atom index used by `Target`.
+    Indexing the table with a boolean mask or an array of positions returns a new table with the
+    selected atoms, and `to_target` turns it into a `Target` for the viewer.
+
+    Columns
+    -------
+    `chain`, `auth_chain` — label and author chain names (str)
+    `seq_id`, `auth_seq_id` — label and author residue numbers (int32). `seq_id` is `missing_seq_id` outside of polymers
+    `ins_code` — insertion code (str)
+    `res_name`, `atom_name`, `element` — residue name, atom name and element symbol (str)
+    `hetero` — whether the atom is a HETATM (bool)
+    `xyz` — coordinates in angstroms, shape `(n, 3)` (float32)
+    `index` — index of the atom in the model, starting from 0 (int64)
+    """
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.__columns = columns
+        self.__residue_ids = None
+        self.__spatial_index = None
+
+    @classmethod
+    def read(cls, inp: Union[str, bytes, IOBase], fmt: Optional[str] = None, model: Optional[int] = None) -> 'AtomTable':
+        """
+        Read the atoms of a structure file.
+
+        Parameters
+        ----------
+        `inp` — str | bytes | file-like object
+            The file path to the structure or the file content of the structure.
+        `fmt` — str (optional)
+            Format of the structure, one of `cif`, `pdb`, `pdbqt`, `gro`, `mol`, `sdf`, `mol2` or `xyz`.
+            Inferred from the file name if not specified. (default: `None`)
+        `model` — int (optional)
+            The model number to read from multi-model files. (default: the first model)
+
+        Returns
+        -------
+        `AtomTable`
+            The atoms of the model.
+
+        Raises
+        ------
+        `RuntimeError`
+            If the format can not be read.
+        """
+        if isinstance(inp, str) and os.path.isfile(inp):
+            if not fmt:
+                name, fmt = os.path.splitext(inp)
+            with open(inp, 'rb') as f:
+                data = f.read()
+        else:
+            data = inp.read() if isinstance(inp, IOBase) else inp
+        if not fmt: raise RuntimeError("The format must be specified if you didn't provide a file name.")
+        atom_site = read_atom_site(data, fmt, columns=_atom_site_columns.values())
+        columns = {name: atom_site[source] for name, source in _atom_site_columns.items() if source in atom_site}
+        return cls.from_columns(columns, model)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], model: Optional[int] = None) -> 'AtomTable':
+        # build the table from atom_site style columns, filling in the optional ones
+        n = len(columns['x'])
+        models = np.asarray(columns.get('model', np.ones(n, dtype=np.int32)))
+        keep = models == (models[0] if model is None and n else model)
+        def column(name, default):
+            values = columns.get(name)
+            return default() if values is None else values
+        seq_id = column('seq_id', lambda: np.full(n, missing_seq_id, dtype=np.int32))
+        auth_seq_id = column('auth_seq_id', lambda: np.ma.filled(seq_id, 0))
+        table = {
+            'chain': column('chain', lambda: np.full(n, 'A')),
+            'seq_id': np.ma.filled(seq_id, missing_seq_id).astype(np.int32),
+            'auth_seq_id': np.ma.filled(auth_seq_id, 0).astype(np.int32),
+            'ins_code': column('ins_code', lambda: np.full(n, '')),
+            'res_name': column('res_name', lambda: np.full(n, 'UNL')),
+            'atom_name': column('atom_name', lambda: np.full(n, '')),
+            'element': column('element', lambda: np.full(n, '')),
+            'alt_id': column('alt_id', lambda: np.full(n, '')),
+            'hetero': column('group', lambda: np.full(n, 'ATOM')) == 'HETATM',
+            'xyz': np.stack([columns['x'], columns['y'], columns['z']], axis=1).astype(np.float32),
+        }
+        table['auth_chain'] = column('auth_chain', lambda: table['chain'])
+        table = {name: np.ascontiguousarray(values[keep]) for name, values in table.items()}
+        table['index'] = np.arange(int(keep.sum()), dtype=np.int64)
+        return cls(table)
+
+    def __len__(self):
+        return len(self.__columns['index'])
+
+    def __getitem__(self, key) -> Union[np.ndarray, 'AtomTable']:
+        if isinstance(key, str):
+            return self.__columns[key]
+        return AtomTable({name: values[key] for name, values in self.__columns.items()})
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.__columns.keys())
+
+    @property
+    def chain(self) -> np.ndarray:
+        return self.__columns['chain']
+
+    @property
+    def auth_chain(self) -> np.ndarray:
+        return self.__columns['auth_chain']
+
+    @property
+    def seq_id(self) -> np.ndarray:
+        return self.__columns['seq_id']
+
+    @property
+    def auth_seq_id(self) -> np.ndarray:
+        return self.__columns['auth_seq_id']
+
+    @property
+    def ins_code(self) -> np.ndarray:
+        return self.__columns['ins_code']
+
+    @property
+    def res_name(self) -> np.ndarray:
+        return self.__columns['res_name']
+
+    @property
+    def atom_name(self) -> np.ndarray:
+        return self.__columns['atom_name']
+
+    @property
+    def element(self) -> np.ndarray:
+        return self.__columns['element']
+
+    @property
+    def hetero(self) -> np.ndarray:
+        return self.__columns['hetero']
+
+    @property
+    def xyz(self) -> np.ndarray:
+        return self.__columns['xyz']
+
+    @property
+    def index(self) -> np.ndarray:
+        return self.__columns['index']
+
+    @property
+    def residue_ids(self) -> np.ndarray:
+        """A number for every atom that is shared by the atoms of the same residue"""
+        if self.__residue_ids is None:
+            n = len(self)
+            changed = np.zeros(n, dtype=bool)
+            if n: changed[0] = True
+            for name in ('chain', 'auth_chain', 'seq_id', 'auth_seq_id', 'ins_code'):
+                values = self.__columns[name]
+                changed[1:] |= values[1:] != values[:-1]
+            self.__residue_ids = np.cumsum(changed) - 1
+        return self.__residue_ids
+
+    def select_mask(self, expression: Union[str, Selection]) -> np.ndarray:
+        """
+        Get a boolean mask of the atoms matching a selection expression, see `select`.
+        """
+        if not isinstance(expression, Selection):
+            expression = compile_selection(expression)
+        return expression.evaluate(self)
+
+    def select(self, expression: Union[str, Selection], granularity: str = 'atom', auth: bool = False) -> Target:
+        """
+        Select atoms with an expression such as `"chain A and resnum 10-250 and not hydrogen"`
+        or `"within 6 of resname LIG"`. The expression is parsed once and cached, see `Selection`
+        for the syntax.
+
+        Parameters
+        ----------
+        `expression` — str | Selection
+            The selection expression.
+        `granularity` — str (optional)
+            `atom`, `residue` or `chain`, see `to_target`. (default: `'atom'`)
+        `auth` — bool (optional)
+            Whether the target should use the author chain names and residue numbers. (default: `False`)
+
+        Returns
+        -------
+        `Target`
+            The selected atoms, residues or chains.
+
+        Raises
+        ------
+        `ValueError`
+            If the expression is invalid.
+        """
+        return self.to_target(self.select_mask(expression), granularity, auth)
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """The cell list over the coordinates, built on first use"""
+        if self.__spatial_index is None:
+            self.__spatial_index = SpatialIndex(self.xyz)
+        return self.__spatial_index
+
+    def within_mask(self, radius: float, of, include_self: bool = True) -> np.ndarray:
+        """
+        Get a boolean mask of the atoms within `radius` of the reference atoms, see `within`.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        reference = self._reference(of)
+        points = reference if reference.dtype == np.float32 else self.xyz[reference]
+        if len(points):
+            mask[self.spatial_index.query_radius(points, radius)] = True
+        if not include_self and reference.dtype != np.float32:
+            mask[reference] = False
+        return mask
+
+    def within(self, radius: float, of, include_self: bool = True, granularity: str = 'residue', auth: bool = False) -> Target:
+        """
+        Find the atoms within a distance of the reference atoms, e.g. the pocket around a ligand.
+
+        Parameters
+        ----------
+        `radius` — float
+            The distance cutoff in angstroms.
+        `of` — numpy.ndarray | Target | dict | List[Target | dict]
+            The reference atoms as a boolean mask, the positions of the atoms, targets, or coordinates of shape `(m, 3)`.
+        `include_self` — bool (optional)
+            Whether the reference atoms are part of the result. (default: `True`)
+        `granularity` — str (optional)
+            `atom`, `residue` or `chain`, see `to_target`. (default: `'residue'`)
+        `auth` — bool (optional)
+            Whether the target should use the author chain names and residue numbers. (default: `False`)
+
+        Returns
+        -------
+        `Target`
+            The atoms, residues or chains within the distance.
+        """
+        return self.to_target(self.within_mask(radius, of, include_self), granularity, auth)
+
+    def nearest(self, of, k: int = 1, granularity: str = 'atom', auth: bool = False) -> Target:
+        """
+        Find the `k` nearest atoms of every reference atom.
+
+        Parameters
+        ----------
+        `of` — numpy.ndarray | Target | dict | List[Target | dict]
+            The reference atoms, see `within`.
+        `k` — int (optional)
+            The number of neighbours per reference atom, the reference atoms themselves included. (default: `1`)
+        `granularity` — str (optional)
+            `atom`, `residue` or `chain`, see `to_target`. (default: `'atom'`)
+        `auth` — bool (optional)
+            Whether the target should use the author chain names and residue numbers. (default: `False`)
+
+        Returns
+        -------
+        `Target`
+            The nearest atoms, or the residues or chains they belong to.
+        """
+        reference = self._reference(of)
+        if reference.dtype != np.float32: reference = self.xyz[reference]
+        if not len(reference): return self.to_target(np.zeros(0, dtype=np.int64), granularity, auth)
+        distances, positions = self.spatial_index.query_knn(reference, k)
+        return self.to_target(np.unique(positions), granularity, auth)
+
+    def _reference(self, of) -> np.ndarray:
+        # positions of the reference atoms, or float32 coordinates of reference points
+        if isinstance(of, (Target, TargetArray, dict)) or (isinstance(of, list) and of and isinstance(of[0], (Target, TargetArray, dict))):
+            return np.flatnonzero(self.mask(of))
+        of = np.asarray(of)
+        if of.dtype == bool:
+            return np.flatnonzero(of)
+        if of.dtype.kind == 'f':
+            return of.astype(np.float32).reshape(-1, 3)
+        return of.astype(np.int64)
+
+    def boundary(self) -> Boundary:
+        """The bounding box and sphere of the atoms"""
+        return Boundary(self.xyz)
+
+    def mask(self, targets: Union[Target, Dict, List[Union[Target, Dict]]]) -> np.ndarray:
+        """
+        Get a boolean mask of the atoms in the targets.
+
+        Parameters
+        ----------
+        `targets` — Target | TargetArray | dict | List[Target | TargetArray | dict]
+            The targets, e.g. generated by helper function `get_targets` or returned by the viewer.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            A boolean array with one value per atom.
+        """
+        if not isinstance(targets, list): targets = [targets]
+        mask = np.zeros(len(self), dtype=bool)
+        for target in targets:
+            if isinstance(target, Target):
+                target = TargetArray.from_target(target)
+            elif not isinstance(target, TargetArray):
+                target = TargetArray(target)
+            residue_starts, atom_starts = target.residue_starts, target.atom_starts
+            atom_counts = np.diff(atom_starts)
+            for chain in range(len(target)):
+                if target.auth:
+                    in_chain = self.auth_chain == target.chain_auth_names[chain]
+                else:
+                    in_chain = self.chain == target.chain_names[chain]
+                first, last = residue_starts[chain], residue_starts[chain + 1]
+                if first == last:
+                    mask |= in_chain
+                    continue
+                whole = np.arange(first, last)[atom_counts[first:last] == 0]
+                indices = target.residue_indices[whole]
+                # residues outside of polymers have no label residue number, they are matched by the author one
+                by_number = whole if target.auth else whole[indices == missing]
+                by_index = indices[indices != missing] if not target.auth else indices[:0]
+                if by_number.size:
+                    keys = self._residue_keys(target.residue_numbers[by_number], target.residue_ins_codes[by_number])
+                    mask |= in_chain & np.isin(self._residue_keys(self.auth_seq_id, self.ins_code), keys)
+                if by_index.size:
+                    mask |= in_chain & np.isin(self.seq_id, by_index)
+                atoms = target.atom_indices[atom_starts[first]:atom_starts[last]]
+                atoms = atoms[atoms != missing]
+                if atoms.size:
+                    mask |= in_chain & np.isin(self.index, atoms)
+        return mask
+
+    def to_target(self, mask: Optional[np.ndarray] = None, granularity: str = 'atom', auth: bool = False) -> Target:
+        """
+        Convert the atoms into a `Target` grouped by chain and residue.
+
+        Parameters
+        ----------
+        `mask` — numpy.ndarray (optional)
+            A boolean mask or the positions of the atoms to convert. (default: all atoms)
+        `granularity` — str (optional)
+            `atom` lists every atom, `residue` selects whole residues and `chain` whole chains. (default: `'atom'`)
+        `auth` — bool (optional)
+            Whether the target should use the author chain names and residue numbers. (default: `False`)
+
+        Returns
+        -------
+        `Target`
+            The selected atoms, residues or chains.
+        """
+        if granularity not in ('atom', 'residue', 'chain'):
+            raise ValueError(f"Invalid granularity \"{granularity}\". Supported values are 'atom', 'residue' and 'chain'.")
+        positions = np.arange(len(self)) if mask is None else np.asarray(mask)
+        if positions.dtype == bool: positions = np.flatnonzero(positions)
+        chains = []
+        if positions.size == 0:
+            target = Target()
+            target.auth = auth
+            return target
+        residue_ids = self.residue_ids[positions]
+        # start positions of the residues and the chains within the selection
+        residue_starts = np.flatnonzero(np.r_[True, residue_ids[1:] != residue_ids[:-1]])
+        chain_keys = np.char.add(np.char.add(self.chain[positions[residue_starts]], '\x00'), self.auth_chain[positions[residue_starts]])
+        chain_starts = np.flatnonzero(np.r_[True, chain_keys[1:] != chain_keys[:-1]])
+        residue_ends = np.r_[residue_starts[1:], positions.size]
+        chain_ends = np.r_[chain_starts[1:], residue_starts.size]
+        for chain_start, chain_end in zip(chain_starts, chain_ends):
+            first = positions[residue_starts[chain_start]]
+            chain = {'name': str(self.chain[first]), 'auth_name': str(self.auth_chain[first]), 'residues': []}
+            if granularity != 'chain':
+                for start, end in zip(residue_starts[chain_start:chain_end], residue_ends[chain_start:chain_end]):
+                    chain['residues'].append(self._residue(positions[start:end], granularity == 'atom'))
+            chains.append(chain)
+        target = Target({'chains': chains})
+        target.auth = auth
+        return target
+
+    def _residue(self, positions: np.ndarray, with_atoms: bool) -> Dict:
+        first = positions[0]
+        seq_id = int(self.seq_id[first])
+        residue = {
+            'name': str(self.res_name[first]),
+            'index': None if seq_id == missing_seq_id else seq_id,
+            'number': int(self.auth_seq_id[first]),
+            'ins_code': str(self.ins_code[first]),
+            'atoms': []
+        }
+        if with_atoms:
+            xyz = self.xyz[positions].tolist()
+            residue['atoms'] = [
+                {'name': name, 'index': index, 'x': x, 'y': y, 'z': z}
+                for name, index, (x, y, z) in zip(self.atom_name[positions].tolist(), self.index[positions].tolist(), xyz)
+            ]
+        return residue
+
+    @staticmethod
+    def _residue_keys(numbers: np.ndarray, ins_codes: np.ndarray) -> np.ndarray:
+        # a single integer for the residue number and the insertion code
+        codes, inverse = np.unique(ins_codes, return_inverse=True)
+        ords = np.array([ord(code[0]) if code else 0 for code in codes.tolist()], dtype=np.int64)
+        return numbers.astype(np.int64) * 0x110000 + ords[inverse.ravel()]
@@ -2,11 +2,21 @@
 # Recommended: from dash_molstar.helpers import Camera, Target, Representation, shapes
 
 from .target import Target
+from .target_array import TargetArray
 from .representations import Representation
 from .camera import Camera
 from .screenshot import Screenshot, default_axes_params
 from . import shapes
 from .np import named_params
+from .cache import PayloadCache
+from .assets import AssetStore, asset_store
+from .trajectory import FrameIndex, TrajectoryFile, index_frames, reduce_trajectory
+from .trajectory_server import TrajectoryServer, trajectory_server
+from .atom_site import read_atom_site
+from .bcif import encode_bcif, encode_atom_site
+from .fileio import map_file, encode_base64, decode_text
+from .codec import encode_array, decode_array, encode_quantized, decode_quantized
+from .poses import PoseLibrary
 
 # Re-export molstar_helper for backward compatibility
 from ..helpers import molstar_helper
@@ -15,6 +25,7 @@ from ..helpers import molstar_helper
 
 __all__ = [
     "Target",
+    "TargetArray",
     "Representation",
     "Camera",
     "shapes",
@@ -22,4 +33,24 @@ __all__ = [
     "Screenshot",
     "default_axes_params",
     "named_params",
+    "PayloadCache",
+    "AssetStore",
+    "asset_store",
+    "FrameIndex",
+    "TrajectoryFile",
+    "index_frames",
+    "reduce_trajectory",
+    "TrajectoryServer",
+    "trajectory_server",
+    "read_atom_site",
+    "encode_bcif",
+    "encode_atom_site",
+    "map_file",
+    "encode_base64",
+    "decode_text",
+    "encode_array",
+    "decode_array",
+    "encode_quantized",
+    "decode_quantized",
+    "PoseLibrary",
 ]
\ No newline at end of file
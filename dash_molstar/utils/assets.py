@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional, Tuple, Union
+from .cache import PayloadCache
+from .fileio import private_dir
+
+_key_pattern = re.compile(r'[0-9a-f]{64}')
+
+class AssetStore(object):
+    """
+    A content-addressed store for structure files served over HTTP by the Dash/Flask server.
+
+    Registered files are written to `directory` under their SHA-256 hash and served from
+    `<prefix>_molstar/assets/<hash>`. Since the content of a URL never changes, the
+    route answers with a strong ETag and long-lived cache headers, honours
+    `If-None-Match` and supports `Range` requests.
+
+    The directory is shared by all processes using it, so any worker of a multi-process
+    server (e.g. gunicorn or uwsgi) can serve a file registered by another one. The most
+    recently used files are also kept in memory, bounded by `max_bytes`. Files dropped from
+    memory are read from the directory again and checked against their hash. The files on
+    disk are bounded by `max_disk_bytes`, the least recently used ones are deleted first,
+    after which their URLs answer with 404 until they are registered again. Workers on
+    different machines need a shared `directory`, e.g. a network file system.
+
+    Parameters
+    ----------
+    `max_bytes` — int (optional)
+        The size of the in-memory copies of the files. (default: `512 MB`)
+    `directory` — str (optional)
+        The directory the files are written to. By default, a directory only the current user
+        can access, named after the app it is mounted on, see `private_dir`. (default: `None`)
+    `max_disk_bytes` — int (optional)
+        The size of the files in the directory. (default: `4 GB`)
+    """
+    route = '_molstar/assets/'
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, directory: Optional[str] = None, max_disk_bytes: int = 4 * 1024 ** 3):
+        if max_disk_bytes <= 0:
+            raise ValueError("max_disk_bytes must be a positive integer")
+        self._assets = PayloadCache(max_bytes)
+        self._directory = directory
+        self._max_disk_bytes = int(max_disk_bytes)
+        self._requests_prefix = '/'
+        self._mounted = False
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __getstate__(self):
+        # a store sent to another process shares the directory, not the in-memory copies
+        return {
+            'max_bytes': self._assets.max_bytes,
+            'directory': self.directory,
+            'max_disk_bytes': self._max_disk_bytes,
+            'requests_prefix': self._requests_prefix,
+            'mounted': self._mounted,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'], state['directory'], state['max_disk_bytes'])
+        self._requests_prefix = state['requests_prefix']
+        self._mounted = state['mounted']
+
+    def __contains__(self, key: str):
+        return key in self._assets or self._load(key) is not None
+
+    @property
+    def mounted(self) -> bool:
+        return self._mounted
+
+    @property
+    def directory(self) -> str:
+        # resolved when the store is mounted, unless the store is used before that
+        if self._directory is None:
+            self._directory = private_dir('default', 'assets')
+        return self._directory
+
+    def init_app(self, app):
+        """
+        Mount the asset route on a Dash app or a Flask server.
+
+        Parameters
+        ----------
+        `app` — dash.Dash | flask.Flask
+            The app to serve the assets from. Path prefixes of Dash apps are respected.
+        """
+        server = getattr(app, 'server', app)
+        routes_prefix = '/'
+        config = getattr(app, 'config', None)
+        if server is not app and config is not None:
+            routes_prefix = config.get('routes_pathname_prefix') or '/'
+            self._requests_prefix = config.get('requests_pathname_prefix') or '/'
+        if self._directory is None:
+            self._directory = private_dir(server.name, 'assets')
+        server.add_url_rule(
+            f"{routes_prefix}{self.route}<key>",
+            endpoint=f"dash_molstar_assets_{id(self)}",
+            view_func=self._serve
+        )
+        self._mounted = True
+        return self
+
+    def register(self, data: Union[bytes, str], mimetype: str = 'text/plain') -> str:
+        """
+        Register the file content and return its content hash.
+        Registering the same content twice is a cheap no-op.
+        """
+        if isinstance(data, str): data = data.encode()
+        key = hashlib.sha256(data).hexdigest()
+        path = self._paths(key)[0]
+        if self._assets.get(key) is None or not os.path.isfile(path):
+            # written again if another process deleted the file to stay within its disk budget
+            data = bytes(data)
+            self._write(key, data, mimetype)
+            self._assets.put(key, (data, mimetype), size=len(data))
+        else:
+            os.utime(path)
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._load(key)
+        return None if entry is None else entry[0]
+
+    def url_for(self, key: str) -> str:
+        return f"{self._requests_prefix}{self.route}{key}"
+
+    def remove(self, key: str) -> bool:
+        removed = self._assets.remove(key)
+        if not _key_pattern.fullmatch(key): return removed
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self):
+        """Remove all files of the store, from memory and from the directory."""
+        self._assets.clear()
+        for name, _ in self._files():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        path = os.path.join(self.directory, key)
+        return path, path + '.type'
+
+    def _files(self):
+        # the files of the store in the directory with their stat results
+        if not os.path.isdir(self.directory): return []
+        files = []
+        for entry in os.scandir(self.directory):
+            if _key_pattern.fullmatch(entry.name.split('.')[0]):
+                try:
+                    files.append((entry.name, entry.stat()))
+                except FileNotFoundError:
+                    pass
+        return files
+
+    def _write(self, key: str, data: bytes, mimetype: str):
+        # written through temporary files and renamed, so other processes never read a partial file.
+        # the mimetype is written first, so it exists whenever the file does
+        path, type_path = self._paths(key)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        for target, content in ((type_path, mimetype.encode()), (path, data)):
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(temp_path, target)
+            except BaseException:
+                if os.path.exists(temp_path): os.remove(temp_path)
+                raise
+        self._trim(keep=key)
+
+    def _trim(self, keep: str):
+        # delete the least recently used files until the directory fits into `max_disk_bytes`,
+        # loading a file from disk updates its modification time
+        files = sorted((info.st_mtime, name, info.st_size) for name, info in self._files())
+        total = sum(size for _, _, size in files)
+        for _, name, size in files:
+            if total <= self._max_disk_bytes: break
+            if name.split('.')[0] == keep: continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _load(self, key: str) -> Optional[Tuple[bytes, str]]:
+        # the in-memory copy, or the file written by any process sharing the directory
+        entry = self._assets.get(key)
+        if entry is not None or not _key_pattern.fullmatch(key): return entry
+        path, type_path = self._paths(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(type_path) as f:
+                mimetype = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        # a file that does not match its name is never served, it is deleted so registering the content writes it again
+        if hashlib.sha256(data).hexdigest() != key:
+            self.remove(key)
+            return None
+        entry = (data, mimetype)
+        self._assets.put(key, entry, size=len(data))
+        return entry
+
+    def _serve(self, key):
+        from flask import Response, abort, request
+        entry = self._load(key)
+        if entry is None:
+            abort(404)
+        data, mimetype = entry
+        response = Response(data, mimetype=mimetype)
+        response.set_etag(key)
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+        # handles If-None-Match (304) and Range (206/416) requests
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+
+# the store used by `parse_molecule(..., serve=True)`
+asset_store = AssetStore()
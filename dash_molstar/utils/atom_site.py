@@ -0,0 +1,326 @@
+import re
+from typing import Dict, Iterable, Optional, Union
+import numpy as np
+
+# formats that can be read into atom_site columns
+supported_atom_site_formats = ["cif", "mmcif", "pdb", "pdbqt", "gro", "mol", "sdf", "mol2", "xyz"]
+
+# columns parsed as numbers, all other columns are kept as strings
+int_columns = ['id', 'label_seq_id', 'auth_seq_id', 'pdbx_PDB_model_num']
+float_columns = ['Cartn_x', 'Cartn_y', 'Cartn_z', 'occupancy', 'B_iso_or_equiv']
+
+_cif_loop = re.compile(rb'^loop_\s*\n\s*_atom_site\.', re.M)
+_cif_header = re.compile(rb'[ \t]*_atom_site\.(\S+)[^\n]*\n')
+_cif_end = re.compile(rb'^(?:#|loop_|_|data_)', re.M)
+_cif_token = re.compile(rb"'(?:[^']|'(?!\s))*'|\"(?:[^\"]|\"(?!\s))*\"|\S+")
+
+def read_atom_site(data: Union[str, bytes], fmt: str, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Read the atoms of a structure file into columns named after the mmCIF `_atom_site` category.
+
+    Parameters
+    ----------
+    `data` — str | bytes
+        The content of the structure file.
+    `fmt` — str
+        Format of the content, one of `cif`, `mmcif`, `pdb`, `pdbqt`, `gro`, `mol`, `sdf`, `mol2` or `xyz`.
+        Only the first molecule of `mol`, `sdf` and `mol2` files is read.
+    `columns` — List[str] (optional)
+        Only read these columns, columns missing from the file are skipped. (default: all columns)
+
+    Returns
+    -------
+    `Dict[str, numpy.ndarray]`
+        The atom_site columns. Integer columns with missing values are returned as masked arrays.
+
+    Raises
+    ------
+    `RuntimeError`
+        If the format can not be read.
+    """
+    fmt = fmt.strip('.').lower()
+    if isinstance(data, str): data = data.encode()
+    if fmt in ('pdb', 'pdbqt'):
+        readers = _read_pdb(data)
+    elif fmt == 'gro':
+        readers = _read_gro(data)
+    elif fmt in ('cif', 'mmcif'):
+        readers = _read_cif(data)
+    elif fmt in ('mol', 'sdf'):
+        readers = _read_mol(data)
+    elif fmt == 'mol2':
+        readers = _read_mol2(data)
+    elif fmt == 'xyz':
+        readers = _read_xyz(data)
+    else:
+        raise RuntimeError(f"Reading atoms from \"{fmt}\" files is not supported. Supported formats are {supported_atom_site_formats}.")
+    names = readers.names if columns is None else [name for name in columns if name in readers.names]
+    return {name: readers[name] for name in names}
+
+class _Columns(object):
+    # columns that are read on first use, names starting with an underscore are shared intermediates
+    def __init__(self):
+        self._readers = {}
+        self._values = {}
+
+    @property
+    def names(self):
+        return [name for name in self._readers if not name.startswith('_')]
+
+    def add(self, name: str, reader):
+        self._readers[name] = reader
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._values:
+            self._values[name] = self._readers[name]()
+        return self._values[name]
+
+_powers = 10 ** np.arange(19, dtype=np.int64)
+# characters of plain decimal numbers, padding included
+_number_chars = np.zeros(256, dtype=bool)
+_number_chars[[ord(c) for c in '0123456789.+- \0']] = True
+
+def _fixed_width(lines: np.ndarray, width: int) -> np.ndarray:
+    # turn an array of byte strings into a (n, width) matrix of characters padded with spaces
+    mat = np.frombuffer(lines.astype(f'S{width}').tobytes(), dtype=np.uint8).reshape(-1, width).copy()
+    mat[mat == 0] = ord(' ')
+    return mat
+
+def _field(mat: np.ndarray, start: int, end: int) -> np.ndarray:
+    return np.ascontiguousarray(mat[:, start:end]).view(f'S{end - start}').ravel()
+
+def _strings(field: np.ndarray) -> np.ndarray:
+    # decode and strip every distinct value once, values of up to 8 bytes are compared as integers
+    size = field.dtype.itemsize
+    if size <= 8:
+        width = next(w for w in (1, 2, 4, 8) if w >= size)
+        chars = np.zeros((field.size, width), dtype=np.uint8)
+        chars[:, :size] = field.view(np.uint8).reshape(field.size, size)
+        keys, inverse = np.unique(chars.view(f'<u{width}').ravel(), return_inverse=True)
+        uniques = keys.view(f'S{width}').astype(f'S{size}')
+    else:
+        uniques, inverse = np.unique(field, return_inverse=True)
+    return np.char.strip(uniques).astype('U')[inverse.ravel()]
+
+def _numbers(field: np.ndarray, dtype) -> np.ndarray:
+    # parse plain decimal numbers column by column over the character matrix,
+    # which is several times faster than converting the strings one by one
+    chars = field.view(np.uint8).reshape(field.size, field.dtype.itemsize)
+    if chars.shape[1] > 18 or not _number_chars[chars].all():
+        return _parse_numbers(field, dtype)
+    n = chars.shape[0]
+    mantissa = np.zeros(n, dtype=np.int64)
+    decimals = np.zeros(n, dtype=np.int64)
+    seen_point = np.zeros(n, dtype=bool)
+    seen_digit = np.zeros(n, dtype=bool)
+    negative = np.zeros(n, dtype=bool)
+    for column in chars.T.copy():
+        digit = column - np.uint8(ord('0'))
+        is_digit = digit < 10
+        np.multiply(mantissa, 10, out=mantissa, where=is_digit)
+        np.add(mantissa, digit, out=mantissa, where=is_digit)
+        decimals += is_digit & seen_point
+        seen_digit |= is_digit
+        seen_point |= column == ord('.')
+        negative |= column == ord('-')
+    mantissa[negative] *= -1
+    if np.dtype(dtype).kind == 'f':
+        values = (mantissa / _powers[decimals]).astype(dtype)
+    else:
+        values = mantissa.astype(dtype)
+    return values if seen_digit.all() else np.ma.masked_array(values, mask=~seen_digit)
+
+def _parse_numbers(field: np.ndarray, dtype) -> np.ndarray:
+    field = np.char.strip(field)
+    blank = field == b''
+    if blank.any():
+        field = np.where(blank, b'0', field)
+        return np.ma.masked_array(field.astype(dtype), mask=blank)
+    return field.astype(dtype)
+
+def _elements(symbols: np.ndarray, atom_names: np.ndarray) -> np.ndarray:
+    # fill in the elements missing from the file
+    missing = symbols == ''
+    if missing.any():
+        return np.where(missing, _guess_elements(atom_names), symbols)
+    return symbols
+
+def _guess_elements(atom_names: np.ndarray) -> np.ndarray:
+    # the first letter of the atom name, ignoring leading digits such as in "1HB"
+    stripped = np.char.lstrip(atom_names, '0123456789')
+    return np.char.upper(np.char.ljust(stripped, 1).astype('U1'))
+
+def _entity_ids(asym_ids: np.ndarray, groups: np.ndarray, comp_ids: np.ndarray) -> np.ndarray:
+    # one entity per polymer chain, per hetero chain and one for all waters
+    kind = np.where(comp_ids == 'HOH', 'W', np.where(groups == 'HETATM', 'H', 'P'))
+    keys = np.char.add(np.char.add(kind, ':'), np.where(kind == 'W', '', asym_ids))
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return (order[inverse] + 1).astype('U')
+
+def _read_pdb(data: bytes) -> _Columns:
+    lines = np.array(data.splitlines())
+    if lines.size == 0:
+        lines = np.array([b''])
+    records = lines.astype('S6')
+    is_atom = (records == b'ATOM  ') | (records == b'HETATM')
+    model_num = np.cumsum(lines.astype('S5') == b'MODEL')[is_atom]
+    mat = _fixed_width(lines[is_atom], 80)
+    n = mat.shape[0]
+    c = _Columns()
+    c.add('_seq_id', lambda: _numbers(_field(mat, 22, 26), np.int32))
+    c.add('group_PDB', lambda: _strings(_field(mat, 0, 6)))
+    c.add('id', lambda: np.arange(1, n + 1, dtype=np.int32))
+    c.add('type_symbol', lambda: _elements(_strings(_field(mat, 76, 78)), c['label_atom_id']))
+    c.add('label_atom_id', lambda: _strings(_field(mat, 12, 16)))
+    c.add('label_alt_id', lambda: _strings(_field(mat, 16, 17)))
+    c.add('label_comp_id', lambda: _strings(_field(mat, 17, 20)))
+    c.add('label_asym_id', lambda: _strings(_field(mat, 21, 22)))
+    c.add('label_entity_id', lambda: _entity_ids(c['label_asym_id'], c['group_PDB'], c['label_comp_id']))
+    c.add('label_seq_id', lambda: np.ma.masked_array(np.ma.getdata(c['_seq_id']), mask=(c['group_PDB'] == 'HETATM') | np.ma.getmaskarray(c['_seq_id'])))
+    c.add('pdbx_PDB_ins_code', lambda: _strings(_field(mat, 26, 27)))
+    c.add('Cartn_x', lambda: _numbers(_field(mat, 30, 38), np.float32))
+    c.add('Cartn_y', lambda: _numbers(_field(mat, 38, 46), np.float32))
+    c.add('Cartn_z', lambda: _numbers(_field(mat, 46, 54), np.float32))
+    c.add('occupancy', lambda: np.ma.filled(_numbers(_field(mat, 54, 60), np.float32), 1.0))
+    c.add('B_iso_or_equiv', lambda: np.ma.filled(_numbers(_field(mat, 60, 66), np.float32), 0.0))
+    c.add('auth_seq_id', lambda: np.ma.filled(c['_seq_id'], 0))
+    c.add('auth_comp_id', lambda: c['label_comp_id'])
+    c.add('auth_asym_id', lambda: c['label_asym_id'])
+    c.add('auth_atom_id', lambda: c['label_atom_id'])
+    c.add('pdbx_PDB_model_num', lambda: np.maximum(model_num, 1).astype(np.int32))
+    return c
+
+def _read_gro(data: bytes) -> _Columns:
+    lines = data.splitlines()
+    try:
+        n = int(lines[1])
+    except (IndexError, ValueError):
+        raise RuntimeError("Invalid gro file: the second line should be the number of atoms.")
+    mat = _fixed_width(np.array(lines[2:2 + n]), 44)
+    c = _Columns()
+    c.add('_seq_id', lambda: np.ma.filled(_numbers(_field(mat, 0, 5), np.int32), 0))
+    c.add('group_PDB', lambda: np.full(n, 'ATOM'))
+    c.add('id', lambda: np.arange(1, n + 1, dtype=np.int32))
+    c.add('type_symbol', lambda: _guess_elements(c['label_atom_id']))
+    c.add('label_atom_id', lambda: _strings(_field(mat, 10, 15)))
+    c.add('label_alt_id', lambda: np.full(n, ''))
+    c.add('label_comp_id', lambda: _strings(_field(mat, 5, 10)))
+    c.add('label_asym_id', lambda: np.full(n, 'A'))
+    c.add('label_entity_id', lambda: _entity_ids(c['label_asym_id'], c['group_PDB'], c['label_comp_id']))
+    c.add('label_seq_id', lambda: c['_seq_id'])
+    c.add('pdbx_PDB_ins_code', lambda: np.full(n, ''))
+    # gro coordinates are in nanometers
+    c.add('Cartn_x', lambda: _numbers(_field(mat, 20, 28), np.float32) * 10)
+    c.add('Cartn_y', lambda: _numbers(_field(mat, 28, 36), np.float32) * 10)
+    c.add('Cartn_z', lambda: _numbers(_field(mat, 36, 44), np.float32) * 10)
+    c.add('occupancy', lambda: np.ones(n, dtype=np.float32))
+    c.add('B_iso_or_equiv', lambda: np.zeros(n, dtype=np.float32))
+    c.add('auth_seq_id', lambda: c['_seq_id'])
+    c.add('auth_comp_id', lambda: c['label_comp_id'])
+    c.add('auth_asym_id', lambda: c['label_asym_id'])
+    c.add('auth_atom_id', lambda: c['label_atom_id'])
+    c.add('pdbx_PDB_model_num', lambda: np.ones(n, dtype=np.int32))
+    return c
+
+def _read_cif(data: bytes) -> _Columns:
+    start = _cif_loop.search(data)
+    if start is None:
+        raise RuntimeError("No _atom_site loop found in the cif file.")
+    pos = start.end() - len(b'_atom_site.')
+    names = []
+    header = _cif_header.match(data, pos)
+    while header:
+        names.append(header.group(1).decode())
+        pos = header.end()
+        header = _cif_header.match(data, pos)
+    end = _cif_end.search(data, pos)
+    body = data[pos:end.start() if end else len(data)]
+    if b"'" in body or b'"' in body:
+        tokens = [t[1:-1] if t[:1] in (b"'", b'"') else t for t in _cif_token.findall(body)]
+    else:
+        tokens = body.split()
+    if len(tokens) % len(names) != 0:
+        raise RuntimeError("Invalid _atom_site loop: the number of values does not match the number of columns.")
+    values = np.array(tokens, dtype='S').reshape(-1, len(names))
+    c = _Columns()
+    for i, name in enumerate(names):
+        c.add(name, lambda column=values[:, i], name=name: _cif_column(column, name))
+    return c
+
+def _cif_column(column: np.ndarray, name: str) -> np.ndarray:
+    column = np.ascontiguousarray(column)
+    missing = (column == b'.') | (column == b'?')
+    if name in int_columns or name in float_columns:
+        parsed = _numbers(np.where(missing, b'0', column) if missing.any() else column, np.int32 if name in int_columns else np.float32)
+        return np.ma.masked_array(parsed, mask=missing) if missing.any() else parsed
+    column = _strings(column)
+    return np.where(missing, '', column) if missing.any() else column
+
+def _small_molecule(names: np.ndarray, elements: np.ndarray, xyz: np.ndarray, comp_ids=None, seq_ids=None) -> _Columns:
+    # small molecules have a single chain and, unless the file says otherwise, a single residue
+    n = len(names)
+    c = _Columns()
+    c.add('group_PDB', lambda: np.full(n, 'HETATM'))
+    c.add('id', lambda: np.arange(1, n + 1, dtype=np.int32))
+    c.add('type_symbol', lambda: elements)
+    c.add('label_atom_id', lambda: names)
+    c.add('label_alt_id', lambda: np.full(n, ''))
+    c.add('label_comp_id', lambda: np.full(n, 'UNL') if comp_ids is None else comp_ids)
+    c.add('label_asym_id', lambda: np.full(n, 'A'))
+    c.add('label_entity_id', lambda: np.full(n, '1'))
+    c.add('label_seq_id', lambda: np.ma.masked_all(n, dtype=np.int32))
+    c.add('pdbx_PDB_ins_code', lambda: np.full(n, ''))
+    c.add('Cartn_x', lambda: xyz[:, 0].copy())
+    c.add('Cartn_y', lambda: xyz[:, 1].copy())
+    c.add('Cartn_z', lambda: xyz[:, 2].copy())
+    c.add('occupancy', lambda: np.ones(n, dtype=np.float32))
+    c.add('B_iso_or_equiv', lambda: np.zeros(n, dtype=np.float32))
+    c.add('auth_seq_id', lambda: np.ones(n, dtype=np.int32) if seq_ids is None else seq_ids)
+    c.add('auth_comp_id', lambda: c['label_comp_id'])
+    c.add('auth_asym_id', lambda: c['label_asym_id'])
+    c.add('auth_atom_id', lambda: names)
+    c.add('pdbx_PDB_model_num', lambda: np.ones(n, dtype=np.int32))
+    return c
+
+def _read_mol(data: bytes) -> _Columns:
+    # the atom block of the first record of a V2000 mol/sdf file
+    lines = data.splitlines()
+    if len(lines) < 4 or b'V3000' in lines[3]:
+        raise RuntimeError("Only V2000 mol and sdf files can be read.")
+    n = int(lines[3][0:3])
+    mat = _fixed_width(np.array(lines[4:4 + n]), 34)
+    elements = _strings(_field(mat, 31, 34))
+    xyz = np.stack([_numbers(_field(mat, start, start + 10), np.float32) for start in (0, 10, 20)], axis=1)
+    # mol files have no atom names, name the atoms after their element and position like molstar does
+    names = np.char.add(elements, (np.arange(n) + 1).astype('U'))
+    return _small_molecule(names, elements, xyz)
+
+def _read_mol2(data: bytes) -> _Columns:
+    # the atoms of the first molecule in a mol2 file
+    start = data.find(b'@<TRIPOS>ATOM')
+    if start < 0:
+        raise RuntimeError("No @<TRIPOS>ATOM section found in the mol2 file.")
+    end = data.find(b'@<TRIPOS>', start + 1)
+    lines = data[start:end if end >= 0 else len(data)].splitlines()[1:]
+    rows = [line.split() for line in lines if line.strip()]
+    if any(len(row) < 6 for row in rows):
+        raise RuntimeError("Invalid mol2 file: atom lines need at least 6 fields.")
+    names = np.array([row[1] for row in rows], dtype='S').astype('U')
+    xyz = np.array([row[2:5] for row in rows], dtype='S').astype(np.float32).reshape(-1, 3)
+    elements = np.char.partition(np.array([row[5] for row in rows], dtype='S').astype('U'), '.')[:, 0]
+    seq_ids = np.array([row[6] if len(row) > 6 else b'1' for row in rows], dtype='S').astype(np.int32)
+    comp_ids = np.array([row[7] if len(row) > 7 else b'UNL' for row in rows], dtype='S').astype('U')
+    return _small_molecule(names, np.char.upper(elements), xyz, comp_ids, seq_ids)
+
+def _read_xyz(data: bytes) -> _Columns:
+    lines = data.splitlines()
+    try:
+        n = int(lines[0])
+    except (IndexError, ValueError):
+        raise RuntimeError("Invalid xyz file: the first line should be the number of atoms.")
+    rows = [line.split()[:4] for line in lines[2:2 + n]]
+    elements = np.char.upper(np.array([row[0] for row in rows], dtype='S').astype('U'))
+    xyz = np.array([row[1:4] for row in rows], dtype='S').astype(np.float32).reshape(-1, 3)
+    names = np.char.add(elements, (np.arange(n) + 1).astype('U'))
+    return _small_molecule(names, elements, xyz)
@@ -0,0 +1,269 @@
+import struct
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from .atom_site import read_atom_site, int_columns, float_columns
+
+# formats encode_bcif converts, small molecule formats are left out since BinaryCIF would drop their bonds
+supported_bcif_formats = ["cif", "mmcif", "pdb", "pdbqt", "gro"]
+
+# BinaryCIF data types
+INT8, INT16, INT32, UINT8, UINT16, UINT32, FLOAT32, FLOAT64 = 1, 2, 3, 4, 5, 6, 32, 33
+_dtypes = {INT8: '<i1', INT16: '<i2', INT32: '<i4', UINT8: '<u1', UINT16: '<u2', UINT32: '<u4', FLOAT32: '<f4', FLOAT64: '<f8'}
+
+# atom_site columns written to the BinaryCIF file, in this order
+atom_site_columns = [
+    'group_PDB', 'id', 'type_symbol', 'label_atom_id', 'label_alt_id', 'label_comp_id', 'label_asym_id',
+    'label_entity_id', 'label_seq_id', 'pdbx_PDB_ins_code', 'Cartn_x', 'Cartn_y', 'Cartn_z', 'occupancy',
+    'B_iso_or_equiv', 'auth_seq_id', 'auth_comp_id', 'auth_asym_id', 'auth_atom_id', 'pdbx_PDB_model_num'
+]
+# decimal places kept by the fixed point encoding of float columns
+float_precision = {'Cartn_x': 3, 'Cartn_y': 3, 'Cartn_z': 3, 'occupancy': 2, 'B_iso_or_equiv': 2}
+
+def encode_bcif(data: Union[str, bytes], fmt: str, header: str = 'DASH_MOLSTAR') -> bytes:
+    """
+    Convert a structure file into BinaryCIF. Only the `_atom_site` category is written,
+    which is all molstar needs to build the model.
+
+    Parameters
+    ----------
+    `data` — str | bytes
+        The content of the structure file.
+    `fmt` — str
+        Format of the content, one of `cif`, `mmcif`, `pdb`, `pdbqt` or `gro`.
+    `header` — str (optional)
+        The name of the data block (default: `'DASH_MOLSTAR'`)
+
+    Returns
+    -------
+    `bytes`
+        The BinaryCIF file content.
+    """
+    if fmt.strip('.').lower() not in supported_bcif_formats:
+        raise RuntimeError(f"Encoding \"{fmt}\" files into BinaryCIF is not supported. Supported formats are {supported_bcif_formats}.")
+    return encode_atom_site(read_atom_site(data, fmt), header)
+
+def encode_atom_site(columns: Dict[str, np.ndarray], header: str = 'DASH_MOLSTAR') -> bytes:
+    """
+    Write atom_site columns, as returned by `read_atom_site`, into a BinaryCIF file.
+    """
+    encoded = []
+    for name in atom_site_columns + [c for c in columns if c not in atom_site_columns]:
+        if name in columns:
+            encoded.append(encode_column(name, columns[name]))
+    row_count = len(columns['Cartn_x'])
+    return pack({
+        'version': '0.3.0',
+        'encoder': 'dash-molstar',
+        'dataBlocks': [{
+            'header': header,
+            'categories': [{'name': '_atom_site', 'columns': encoded, 'rowCount': row_count}]
+        }]
+    })
+
+def encode_column(name: str, values: np.ndarray) -> Dict:
+    """
+    Encode an atom_site column. Integers are delta/run-length encoded and packed into the smallest
+    integer type, floats are stored as fixed point integers and strings as an indexed string array.
+    """
+    mask = None
+    if np.ma.isMaskedArray(values):
+        if values.mask.any():
+            # 0 = value present, 1 = value not applicable ('.')
+            mask = _encode_integers(values.mask.astype(np.int32))
+        values = values.filled(0)
+    if name in float_columns or values.dtype.kind == 'f':
+        data = _encode_floats(values, float_precision.get(name, 3))
+    elif name in int_columns or values.dtype.kind in 'iu':
+        data = _encode_integers(values.astype(np.int32))
+    else:
+        data = _encode_strings(values.astype('U'))
+    return {'name': name, 'data': data, 'mask': mask}
+
+def _byte_array(values: np.ndarray, type: int) -> Tuple[bytes, Dict]:
+    return values.astype(_dtypes[type]).tobytes(), {'kind': 'ByteArray', 'type': type}
+
+def _delta(values: np.ndarray) -> Tuple[np.ndarray, Dict]:
+    if values.size == 0:
+        return values, {'kind': 'Delta', 'origin': 0, 'srcType': INT32}
+    output = np.empty_like(values)
+    output[0] = 0
+    output[1:] = np.diff(values)
+    return output, {'kind': 'Delta', 'origin': int(values[0]), 'srcType': INT32}
+
+def _run_length(values: np.ndarray) -> Tuple[np.ndarray, Dict]:
+    encoding = {'kind': 'RunLength', 'srcType': INT32, 'srcSize': int(values.size)}
+    if values.size == 0:
+        return values, encoding
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    lengths = np.diff(np.r_[starts, values.size])
+    output = np.empty(starts.size * 2, dtype=np.int32)
+    output[0::2] = values[starts]
+    output[1::2] = lengths
+    return output, encoding
+
+def _integer_packing(values: np.ndarray) -> Tuple[bytes, List[Dict]]:
+    # pack int32 values into 8 or 16 bit integers, values out of range are split into
+    # a run of limit values followed by the remainder
+    is_unsigned = values.size == 0 or int(values.min()) >= 0
+    best_size, best = values.size * 4, None
+    for byte_count in (1, 2):
+        limits = _packing_limits(byte_count, is_unsigned)
+        size = int(_packing_extra(values, *limits).sum() + values.size) * byte_count
+        if size < best_size:
+            best_size, best = size, byte_count
+    if best is None:
+        data, byte_array = _byte_array(values, INT32)
+        return data, [byte_array]
+    upper, lower = _packing_limits(best, is_unsigned)
+    type = (UINT8 if best == 1 else UINT16) if is_unsigned else (INT8 if best == 1 else INT16)
+    data, byte_array = _byte_array(_pack_integers(values, upper, lower), type)
+    packing = {'kind': 'IntegerPacking', 'byteCount': best, 'isUnsigned': bool(is_unsigned), 'srcSize': int(values.size)}
+    return data, [packing, byte_array]
+
+def _packing_limits(byte_count: int, is_unsigned: bool) -> Tuple[int, Optional[int]]:
+    if is_unsigned:
+        return (0xFF if byte_count == 1 else 0xFFFF), None
+    upper = 0x7F if byte_count == 1 else 0x7FFF
+    return upper, -upper - 1
+
+def _packing_extra(values: np.ndarray, upper: int, lower: Optional[int] = None) -> np.ndarray:
+    # number of limit values written before each value
+    values = values.astype(np.int64)
+    extra = np.zeros(values.size, dtype=np.int64)
+    positive = values >= upper
+    extra[positive] = values[positive] // upper
+    if lower is not None:
+        negative = values <= lower
+        extra[negative] = values[negative] // lower
+    return extra
+
+def _pack_integers(values: np.ndarray, upper: int, lower: Optional[int] = None) -> np.ndarray:
+    values = values.astype(np.int64)
+    extra = _packing_extra(values, upper, lower)
+    limit = np.where(values < 0, lower if lower is not None else 0, upper)
+    ends = np.cumsum(extra + 1) - 1
+    output = np.empty(int(ends[-1]) + 1 if values.size else 0, dtype=np.int64)
+    # fill the limit runs first, then put the remainder at the end of each run
+    output[np.repeat(ends - extra, extra) + _ranges(extra)] = np.repeat(limit, extra)
+    output[ends] = values - extra * limit
+    return output
+
+def _ranges(lengths: np.ndarray) -> np.ndarray:
+    # concatenation of arange(n) for every n in lengths
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(total, dtype=np.int64) - starts
+
+def _encode_integers(values: np.ndarray) -> Dict:
+    # choose the smallest of plain packing, run-length, delta and delta + run-length
+    best = None
+    for steps in ([], [_run_length], [_delta], [_delta, _run_length]):
+        data, encodings = values, []
+        for step in steps:
+            data, encoding = step(data)
+            encodings.append(encoding)
+        packed, packing = _integer_packing(data)
+        if best is None or len(packed) < len(best[0]):
+            best = (packed, encodings + packing)
+    return {'data': best[0], 'encoding': best[1]}
+
+def _encode_floats(values: np.ndarray, digits: int) -> Dict:
+    factor = 10 ** digits
+    fixed = np.round(values.astype(np.float64) * factor).astype(np.int32)
+    src_type = FLOAT64 if values.dtype == np.float64 else FLOAT32
+    encoded = _encode_integers(fixed)
+    encoded['encoding'] = [{'kind': 'FixedPoint', 'factor': factor, 'srcType': src_type}] + encoded['encoding']
+    return encoded
+
+def _encode_strings(values: np.ndarray) -> Dict:
+    strings, indices = np.unique(values, return_inverse=True)
+    lengths = np.array([len(s) for s in strings], dtype=np.int32)
+    offsets = np.r_[0, np.cumsum(lengths)].astype(np.int32)
+    offsets_encoded = _encode_integers(offsets)
+    data_encoded = _encode_integers(indices.astype(np.int32).ravel())
+    return {
+        'data': data_encoded['data'],
+        'encoding': [{
+            'kind': 'StringArray',
+            'dataEncoding': data_encoded['encoding'],
+            'stringData': ''.join(strings.tolist()),
+            'offsetEncoding': offsets_encoded['encoding'],
+            'offsets': offsets_encoded['data']
+        }]
+    }
+
+def pack(obj) -> bytes:
+    """
+    Serialize an object with MessagePack, the container format of BinaryCIF.
+    """
+    out = []
+    _pack(obj, out)
+    return b''.join(out)
+
+def _pack(obj, out: list):
+    if obj is None:
+        out.append(b'\xc0')
+    elif obj is True:
+        out.append(b'\xc3')
+    elif obj is False:
+        out.append(b'\xc2')
+    elif isinstance(obj, (int, np.integer)):
+        obj = int(obj)
+        if 0 <= obj < 0x80:
+            out.append(struct.pack('B', obj))
+        elif -0x20 <= obj < 0:
+            out.append(struct.pack('b', obj))
+        elif 0 <= obj <= 0xFFFFFFFF:
+            out.append(struct.pack('>BI', 0xce, obj))
+        elif -0x80000000 <= obj < 0:
+            out.append(struct.pack('>Bi', 0xd2, obj))
+        else:
+            out.append(struct.pack('>Bq', 0xd3, obj))
+    elif isinstance(obj, (float, np.floating)):
+        out.append(struct.pack('>Bd', 0xcb, float(obj)))
+    elif isinstance(obj, str):
+        data = obj.encode()
+        n = len(data)
+        if n < 32:
+            out.append(struct.pack('B', 0xa0 | n))
+        elif n <= 0xFF:
+            out.append(struct.pack('>BB', 0xd9, n))
+        elif n <= 0xFFFF:
+            out.append(struct.pack('>BH', 0xda, n))
+        else:
+            out.append(struct.pack('>BI', 0xdb, n))
+        out.append(data)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        n = len(obj)
+        if n <= 0xFF:
+            out.append(struct.pack('>BB', 0xc4, n))
+        elif n <= 0xFFFF:
+            out.append(struct.pack('>BH', 0xc5, n))
+        else:
+            out.append(struct.pack('>BI', 0xc6, n))
+        out.append(bytes(obj))
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(struct.pack('B', 0x90 | n))
+        elif n <= 0xFFFF:
+            out.append(struct.pack('>BH', 0xdc, n))
+        else:
+            out.append(struct.pack('>BI', 0xdd, n))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(struct.pack('B', 0x80 | n))
+        elif n <= 0xFFFF:
+            out.append(struct.pack('>BH', 0xde, n))
+        else:
+            out.append(struct.pack('>BI', 0xdf, n))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
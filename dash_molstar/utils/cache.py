@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class PayloadCache(object):
+    """
+    A thread-safe LRU cache for parsed payloads with a bounded byte budget.
+
+    Entries are evicted in least-recently-used order once the total size of the
+    cached values exceeds `max_bytes`. Values larger than the whole budget are
+    returned to the caller but never stored.
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer")
+        self._max_bytes = int(max_bytes)
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        if value <= 0:
+            raise ValueError("max_bytes must be a positive integer")
+        with self._lock:
+            self._max_bytes = int(value)
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of all cached values"""
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters for sizing the cache: hits, misses, evictions, entries, size and max_bytes"""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_bytes': self._max_bytes,
+            }
+
+    @staticmethod
+    def file_key(path: str, *extra: Hashable) -> tuple:
+        """
+        Build a cache key for a file on disk. The key changes whenever the file is
+        modified, so stale entries are never returned.
+        """
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size) + extra
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        if size is None: size = _sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            if size > self._max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            self._evict()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, calling `loader()` and caching its result on a miss.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def remove(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._size -= entry[1]
+            return True
+
+    def clear(self, reset_stats: bool = False):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if reset_stats:
+                self._hits = 0
+                self._misses = 0
+                self._evictions = 0
+
+    def _evict(self):
+        while self._size > self._max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+
+def _sizeof(value) -> int:
+    # the budget is in bytes, text is counted as UTF-8 without encoding ASCII strings such as base64 payloads
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode('utf-8'))
+    return len(value)
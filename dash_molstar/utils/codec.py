@@ -0,0 +1,135 @@
+import binascii
+import struct
+from typing import Any, Dict, Optional
+import numpy as np
+from .fileio import encode_base64
+
+# key of an encoded array in the payloads, the viewer decodes it into a typed array
+array_key = '__ndarray__'
+# data types understood by the viewer, read as Float32Array and Int32Array
+_wire_dtypes = {'float32': '<f4', 'int32': '<i4'}
+_int32 = np.iinfo(np.int32)
+_int16 = np.iinfo(np.int16)
+
+# header of the quantized coordinate format: magic, version, bytes per delta, atoms, frames, precision
+_QUANTIZED_MAGIC = b'DMQC'
+_QUANTIZED_HEADER = struct.Struct('<4sHHIIf')
+
+def encode_array(array, dtype: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Encode a numeric array as a base64 little-endian blob for the viewer.
+
+    The viewer turns the blob into a typed array without parsing any numbers, which is much
+    faster than sending large arrays as JSON lists. The data is sent in C order, arrays with
+    more than one dimension are flattened by the viewer.
+
+    Parameters
+    ----------
+    `array` — numpy.ndarray | array-like
+        The numbers to be encoded.
+    `dtype` — str (optional)
+        Data type sent to the viewer, `'float32'` or `'int32'`. Integer and boolean arrays are
+        sent as `'int32'` and others as `'float32'` by default. (default: `None`)
+
+    Returns
+    -------
+    `dict`
+        The encoded array with its `dtype` and `shape`.
+
+    Raises
+    ------
+    `TypeError`
+        Raised if the array is not numeric
+    `ValueError`
+        Raised if the data type is not supported or an integer does not fit into 32 bits
+    """
+    array = np.asarray(array)
+    if array.dtype.kind not in 'biuf': raise TypeError(f"Arrays of type {array.dtype} can not be encoded!")
+    if dtype is None: dtype = 'int32' if array.dtype.kind in 'biu' else 'float32'
+    if dtype not in _wire_dtypes: raise ValueError(f"The data type \"{dtype}\" is not supported, use 'float32' or 'int32'!")
+    if dtype == 'int32' and array.dtype.kind in 'iu' and array.size and (array.min() < _int32.min or array.max() > _int32.max):
+        raise ValueError("Integers must fit into 32 bits!")
+    data = np.ascontiguousarray(array, dtype=_wire_dtypes[dtype]).reshape(-1).view(np.uint8)
+    return {array_key: encode_base64(data.data), 'dtype': dtype, 'shape': list(array.shape)}
+
+def decode_array(payload: Dict[str, Any]) -> np.ndarray:
+    """
+    Decode an array encoded by `encode_array`.
+
+    Parameters
+    ----------
+    `payload` — dict
+        The encoded array.
+
+    Returns
+    -------
+    `numpy.ndarray`
+        The array with its original shape.
+    """
+    if not is_encoded(payload): raise ValueError("The payload is not an encoded array!")
+    data = binascii.a2b_base64(payload[array_key])
+    return np.frombuffer(data, dtype=_wire_dtypes[payload['dtype']]).reshape(payload['shape'])
+
+def is_encoded(value) -> bool:
+    """Whether `value` is an array encoded by `encode_array`."""
+    return isinstance(value, dict) and array_key in value
+
+def encode_quantized(coords, precision: float = 0.01) -> bytes:
+    """
+    Encode the frames of a trajectory as fixed-point integers, the first frame in full and the
+    others as differences to it.
+
+    Coordinates are rounded to multiples of `precision`, so no coordinate moves by more than
+    `precision / 2`. The differences are stored as 16-bit integers if they all fit and as 32-bit
+    integers otherwise, which makes the payload 2 to 4 times smaller than `float32` before any
+    compression, and the small integers compress much better than floats.
+
+    Layout (little-endian): a 20 byte header (`DMQC`, version, bytes per difference, number of
+    atoms, number of frames, precision), the first frame as `int32`, then the differences of the
+    other frames. Every frame is stored as all x, then all y, then all z values.
+
+    Parameters
+    ----------
+    `coords` — numpy.ndarray
+        The coordinates with shape (nframes, natoms, 3).
+    `precision` — float (optional)
+        The step of the fixed-point values, in the units of `coords`. (default: `0.01`)
+
+    Returns
+    -------
+    `bytes`
+        The encoded frames.
+
+    Raises
+    ------
+    `ValueError`
+        Raised if the shape is wrong, the precision is not positive or the coordinates do not fit into 32-bit integers
+    """
+    coords = np.asarray(coords)
+    if coords.ndim != 3 or coords.shape[2] != 3: raise ValueError("The coordinates must have the shape (nframes, natoms, 3)!")
+    if not precision > 0: raise ValueError("The precision must be positive!")
+    nframes, natoms, _ = coords.shape
+    scaled = np.rint(np.transpose(coords, (0, 2, 1)) / precision)
+    if scaled.size and (scaled.min() < _int32.min or scaled.max() > _int32.max):
+        raise ValueError("The coordinates do not fit into 32-bit integers at this precision!")
+    quantized = scaled.astype(np.int64)
+    deltas = quantized[1:] - quantized[:1]
+    width = 2 if not deltas.size or (deltas.min() >= _int16.min and deltas.max() <= _int16.max) else 4
+    if width == 4 and (deltas.min() < _int32.min or deltas.max() > _int32.max):
+        raise ValueError("The coordinates do not fit into 32-bit integers at this precision!")
+    header = _QUANTIZED_HEADER.pack(_QUANTIZED_MAGIC, 1, width, natoms, nframes, precision)
+    if not nframes: return header
+    return header + quantized[0].astype('<i4').tobytes() + deltas.astype('<i2' if width == 2 else '<i4').tobytes()
+
+def decode_quantized(data: bytes) -> np.ndarray:
+    """
+    Decode frames encoded by `encode_quantized` into a `float32` array of shape (nframes, natoms, 3).
+    """
+    magic, version, width, natoms, nframes, precision = _QUANTIZED_HEADER.unpack_from(data)
+    if magic != _QUANTIZED_MAGIC or version != 1: raise ValueError("The data is not a quantized trajectory!")
+    if not nframes: return np.zeros((0, natoms, 3), dtype=np.float32)
+    offset = _QUANTIZED_HEADER.size
+    reference = np.frombuffer(data, dtype='<i4', count=3 * natoms, offset=offset).reshape(1, 3, natoms)
+    deltas = np.frombuffer(data, dtype='<i2' if width == 2 else '<i4', count=(nframes - 1) * 3 * natoms, offset=offset + 12 * natoms)
+    quantized = np.concatenate([reference, reference + deltas.reshape(-1, 3, natoms)])
+    return np.ascontiguousarray(np.transpose(quantized * np.float32(precision), (0, 2, 1)), dtype=np.float32)
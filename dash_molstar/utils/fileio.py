@@ -0,0 +1,141 @@
+import binascii
+import codecs
+import mmap
+import os
+import re
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+# bytes converted per step, a multiple of 3 (no base64 padding in between) and of the page size
+default_chunk_size = 3 * 1024 * 1024
+
+@contextmanager
+def map_file(path: str) -> Iterator[memoryview]:
+    """
+    Map a file into memory and yield a read-only view of its content.
+
+    The view is backed by the page cache instead of a private copy of the file. Converting it
+    with `encode_base64` or `decode_text` releases the pages that have been consumed, so reading
+    a file this way costs about one copy of the converted result. The view is only valid inside
+    the `with` block.
+
+    Parameters
+    ----------
+    `path` — str
+        Path to the file.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files can not be mapped, neither can files on some special file systems
+            yield memoryview(f.read())
+            return
+        try:
+            with memoryview(mm) as view:
+                yield view
+        finally:
+            mm.close()
+
+def iter_chunks(data: Union[bytes, bytearray, memoryview], chunk_size: int = default_chunk_size) -> Iterator[memoryview]:
+    """
+    Iterate over a bytes-like object in chunks of at most `chunk_size` bytes without copying it.
+    If `data` is the view of a whole mapped file, the pages of consumed chunks are dropped from memory.
+    """
+    with memoryview(data) as source, source.cast('B') as view:
+        size = view.nbytes
+        mapped = view.obj if isinstance(view.obj, mmap.mmap) and len(view.obj) == size else None
+        released = 0
+        for start in range(0, size, chunk_size):
+            with view[start:start + chunk_size] as chunk:
+                yield chunk
+            end = min(start + chunk_size, size)
+            if end < size: end -= end % mmap.PAGESIZE
+            if mapped is not None and hasattr(mmap, 'MADV_DONTNEED') and end > released:
+                # the pages are clean, they are read again from the page cache if needed
+                mapped.madvise(mmap.MADV_DONTNEED, released, end - released)
+                released = end
+
+def encode_base64(data: Union[bytes, bytearray, memoryview], chunk_size: int = default_chunk_size) -> str:
+    """
+    Encode binary data with base64 in bounded chunks.
+
+    Apart from the result, only one chunk is held in memory at a time, while
+    `base64.b64encode(data).decode()` needs two full-size copies.
+
+    Parameters
+    ----------
+    `data` — bytes | bytearray | memoryview
+        The data to be encoded, e.g. the view yielded by `map_file`.
+    `chunk_size` — int (optional)
+        Number of input bytes encoded per step. Rounded down to a multiple of 3. (default: `3 MB`)
+
+    Returns
+    -------
+    `str`
+        The base64 encoded data.
+    """
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+    encoded = ''
+    for chunk in iter_chunks(data, chunk_size):
+        # CPython grows a str that has no other references in place,
+        # so no second full-size copy is made while appending
+        encoded += binascii.b2a_base64(chunk, newline=False).decode('ascii')
+    return encoded
+
+def decode_text(data: Union[bytes, bytearray, memoryview], encoding: str = 'utf-8', chunk_size: int = default_chunk_size) -> str:
+    """
+    Decode binary data into text in bounded chunks, see `encode_base64`.
+
+    Parameters
+    ----------
+    `data` — bytes | bytearray | memoryview
+        The data to be decoded, e.g. the view yielded by `map_file`.
+    `encoding` — str (optional)
+        The text encoding. (default: `'utf-8'`)
+    `chunk_size` — int (optional)
+        Number of bytes decoded per step. (default: `3 MB`)
+
+    Returns
+    -------
+    `str`
+        The decoded text.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    text = ''
+    for chunk in iter_chunks(data, chunk_size):
+        text += decoder.decode(chunk)
+    text += decoder.decode(b'', final=True)
+    return text
+
+def private_dir(*names: str) -> str:
+    """
+    Return a directory only the current user can access, `dash_molstar-<user>/<names>` in the
+    temporary directory. The directory is created with mode 0700 if it does not exist. The
+    processes of an app find the same directory, other users on the host can not read or
+    plant files in it.
+
+    Parameters
+    ----------
+    `names` — str
+        The path of the directory below the directory of the user.
+
+    Raises
+    ------
+    `RuntimeError`
+        Raised if the directory of the user exists but is not a directory owned by the user with mode 0700
+    """
+    user = os.getuid() if hasattr(os, 'getuid') else re.sub(r'[^\w.-]', '_', os.environ.get('USERNAME', 'user'))
+    base = os.path.join(tempfile.gettempdir(), f"dash_molstar-{user}")
+    try:
+        os.mkdir(base, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(base)
+    if not stat.S_ISDIR(info.st_mode) or (hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & 0o077)):
+        raise RuntimeError(f"The directory {base} is not private to the current user, remove it or pass a directory explicitly.")
+    path = os.path.join(base, *[re.sub(r'[^\w.-]', '_', name).lstrip('.') or '_' for name in names])
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
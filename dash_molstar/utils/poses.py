@@ -0,0 +1,168 @@
+import mmap
+import os
+import re
+from typing import Iterable, List, Optional
+import numpy as np
+
+# multi-record formats that can be indexed
+supported_pose_formats = ["sdf", "mol", "mol2"]
+
+_sdf_terminator = re.compile(rb'^\$\$\$\$[^\n]*\n?', re.M)
+_mol2_molecule = re.compile(rb'^@<TRIPOS>MOLECULE', re.M)
+_non_space = re.compile(rb'\S')
+
+class PoseLibrary(object):
+    """
+    A multi-record SDF or MOL2 file, e.g. the poses of a docking run, whose records are loaded on demand.
+
+    The byte offsets of all records are indexed once and saved next to the file, so opening the
+    library again is instant. Records are read by seeking to their byte range, which keeps memory
+    constant and lookups O(1) no matter how many poses the file holds. The index is rebuilt
+    automatically when the file changes.
+
+    Parameters
+    ----------
+    `path` — str
+        Path to the SDF or MOL2 file.
+    `fmt` — str (optional)
+        Format of the file, `sdf`, `mol` or `mol2`. Inferred from the file name if not specified. (default: `None`)
+    `index_path` — str (optional)
+        Where to save the index. If the location is not writable, the index is only kept in memory.
+        (default: `<path>.poses.npz`)
+    """
+    def __init__(self, path: str, fmt: Optional[str] = None, index_path: Optional[str] = None):
+        if not fmt:
+            name, fmt = os.path.splitext(path)
+        fmt = fmt.strip('.').lower()
+        if fmt not in supported_pose_formats:
+            raise RuntimeError(f"Indexing \"{fmt}\" files is not supported. Supported formats are {supported_pose_formats}.")
+        self.path = path
+        self.fmt = fmt
+        self.index_path = index_path or f"{path}.poses.npz"
+        self._offsets = None
+        self._stat = None
+        self._ensure_index()
+
+    def __len__(self):
+        self._ensure_index()
+        return len(self._offsets) - 1
+
+    def pages(self, size: int = 20) -> int:
+        """The number of pages with `size` records each"""
+        return -(-len(self) // size)
+
+    def read(self, record: int) -> str:
+        """
+        Read the text of a single record.
+
+        Parameters
+        ----------
+        `record` — int
+            Index of the record, starting from 0.
+        """
+        return self.read_many([record])[0]
+
+    def read_many(self, records: Iterable[int]) -> List[str]:
+        """
+        Read the text of several records, in the given order.
+        """
+        self._ensure_index()
+        records = list(records)
+        count = len(self._offsets) - 1
+        for record in records:
+            if not 0 <= record < count:
+                raise IndexError(f"Record {record} out of range, the library has {count} records.")
+        texts = []
+        with open(self.path, 'rb') as f:
+            for record in records:
+                start, end = int(self._offsets[record]), int(self._offsets[record + 1])
+                f.seek(start)
+                texts.append(f.read(end - start).decode())
+        return texts
+
+    def get(self, records: Iterable[int], **kwargs) -> List[dict]:
+        """
+        Get the records as molecules for the `data` parameter of molstar viewer.
+
+        Parameters
+        ----------
+        `records` — List[int]
+            Indices of the records, starting from 0.
+        `**kwargs`
+            Other parameters passed to `parse_molecule()`, e.g. `component` or `preset`.
+
+        Returns
+        -------
+        `List[dict]`
+            One value for the `data` parameter per record.
+        """
+        # imported here since the helpers import this module
+        from ..helpers.molstar_helper import parse_molecule
+        return [parse_molecule(text, fmt=self.fmt, **kwargs) for text in self.read_many(records)]
+
+    def page(self, number: int, size: int = 20, **kwargs) -> List[dict]:
+        """
+        Get a page of records as molecules for the `data` parameter of molstar viewer.
+        Pages past the end of the library are empty.
+
+        Parameters
+        ----------
+        `number` — int
+            Index of the page, starting from 0.
+        `size` — int (optional)
+            Number of records per page. (default: `20`)
+        `**kwargs`
+            Other parameters passed to `parse_molecule()`.
+        """
+        if number < 0 or size <= 0:
+            raise IndexError("The page number must not be negative and the page size must be positive.")
+        start = number * size
+        return self.get(range(start, min(start + size, len(self))), **kwargs)
+
+    def rebuild(self):
+        """
+        Scan the file and save the index again.
+        """
+        stat = os.stat(self.path)
+        self._offsets = self._scan()
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        try:
+            # write to a temporary file first, so that readers never see a partial index
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, offsets=self._offsets, size=stat.st_size, mtime=stat.st_mtime_ns)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _ensure_index(self):
+        stat = os.stat(self.path)
+        if self._stat == (stat.st_size, stat.st_mtime_ns):
+            return
+        if self._offsets is None and os.path.isfile(self.index_path):
+            try:
+                with np.load(self.index_path) as index:
+                    if (int(index['size']), int(index['mtime'])) == (stat.st_size, stat.st_mtime_ns):
+                        self._offsets = index['offsets']
+                        self._stat = (stat.st_size, stat.st_mtime_ns)
+                        return
+            except (OSError, ValueError, KeyError):
+                pass
+        self.rebuild()
+
+    def _scan(self) -> np.ndarray:
+        # offsets of the record boundaries, record i spans offsets[i]:offsets[i + 1]
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return np.zeros(1, dtype=np.int64)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if self.fmt == 'mol2':
+                    starts = np.fromiter((m.start() for m in _mol2_molecule.finditer(mm)), dtype=np.int64)
+                    return np.append(starts, size) if starts.size else np.zeros(1, dtype=np.int64)
+                ends = np.fromiter((m.end() for m in _sdf_terminator.finditer(mm)), dtype=np.int64)
+                last = int(ends[-1]) if ends.size else 0
+                if _non_space.search(mm, last):
+                    # the last record is not terminated by $$$$
+                    ends = np.append(ends, size)
+                return np.append(0, ends).astype(np.int64)
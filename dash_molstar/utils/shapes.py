@@ -1,4 +1,16 @@
+import numpy as np
+from .codec import encode_array
 
+def _flat(values):
+    """Flatten NumPy arrays so (N, 3) points pass the same checks as flat lists."""
+    return values.ravel() if isinstance(values, np.ndarray) else values
+
+def _vector(values):
+    # small vectors are sent as plain lists, blobs only pay off for the large arrays of batch shapes
+    return values.tolist() if isinstance(values, np.ndarray) else values
+
+def _list(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
 
 def create_box(min_xyz=(0,0,0), max_xyz=(1,1,1), radius=0.1, label="Bounding Box", color='red', opacity=1.0):
     """
@@ -35,8 +47,8 @@ def create_box(min_xyz=(0,0,0), max_xyz=(1,1,1), radius=0.1, label="Bounding Box
     return {
         'type': 'shape',
         'shape': 'box',
-        'min': min_xyz,
-        'max': max_xyz,
+        'min': _vector(min_xyz),
+        'max': _vector(max_xyz),
         'radius': radius,
         'label': label,
         'color': color,
@@ -79,7 +91,7 @@ def create_sphere(center=(0,0,0), radius=1.0, label="Sphere", color='blue', opac
     return {
         'type': 'shape',
         'shape': 'sphere',
-        'center': center,
+        'center': _vector(center),
         'radius': radius,
         'label': label,
         'color': color,
@@ -122,8 +134,8 @@ def create_cylinder(start=(0,0,0), end=(1,1,1), radius=0.1, label="Cylinder", co
     return {
         'type': 'shape',
         'shape': 'cylinder',
-        'start': start,
-        'end': end,
+        'start': _vector(start),
+        'end': _vector(end),
         'props': {
             'radiusTop': radius,
             'radiusBottom': radius,
@@ -177,9 +189,9 @@ def create_plane(center=(0,0,0), dir_major=(1,0,0), dir_minor=(0,1,0), scale_x=1
     return {
         'type': 'shape',
         'shape': 'plane',
-        'center': center,
-        'dirMajor': dir_major,
-        'dirMinor': dir_minor,
+        'center': _vector(center),
+        'dirMajor': _vector(dir_major),
+        'dirMinor': _vector(dir_minor),
         'scaleX': scale_x,
         'scaleY': scale_y,
         'label': label,
@@ -223,10 +235,10 @@ def create_axes(origin=(0,0,0), dir_a=(1,0,0), dir_b=(0,1,0), dir_c=(0,0,1), lab
     return {
         'type': 'shape',
         'shape': 'axes',
-        'origin': origin,
-        'dirA': dir_a,
-        'dirB': dir_b,
-        'dirC': dir_c,
+        'origin': _vector(origin),
+        'dirA': _vector(dir_a),
+        'dirB': _vector(dir_b),
+        'dirC': _vector(dir_c),
         'label': label,
         'color': color,
         'alpha': opacity,
@@ -268,10 +280,10 @@ def create_ellipsoid(center=(0,0,0), dir_major=(1,0,0), dir_minor=(0,1,0), radiu
     return {
         'type': 'shape',
         'shape': 'ellipsoid',
-        'center': center,
-        'dirMajor': dir_major,
-        'dirMinor': dir_minor,
-        'radiusScale': radius_scale,
+        'center': _vector(center),
+        'dirMajor': _vector(dir_major),
+        'dirMinor': _vector(dir_minor),
+        'radiusScale': _vector(radius_scale),
         'label': label,
         'color': color,
         'alpha': opacity,
@@ -314,6 +326,7 @@ def create_ribbon(control_points, normal_vectors, binormal_vectors, width_values
     `dict`
         Dict for the `data` parameter of MolstarViewer
     """
+    control_points, normal_vectors, binormal_vectors = _flat(control_points), _flat(normal_vectors), _flat(binormal_vectors)
     if len(control_points) % 3 != 0: raise ValueError("Control points must be a flat list of 3D coordinates!")
     if len(normal_vectors) != len(control_points): raise ValueError("Normal vectors must have the same length as control points!")
     if len(binormal_vectors) != len(control_points): raise ValueError("Binormal vectors must have the same length as control points!")
@@ -327,10 +340,10 @@ def create_ribbon(control_points, normal_vectors, binormal_vectors, width_values
     return {
         'type': 'shape',
         'shape': 'ribbon',
-        'controlPoints': list(control_points),
-        'normalVectors': list(normal_vectors),
-        'binormalVectors': list(binormal_vectors),
-        'widthValues': list(width_values),
+        'controlPoints': _list(control_points),
+        'normalVectors': _list(normal_vectors),
+        'binormalVectors': _list(binormal_vectors),
+        'widthValues': _list(width_values),
         'label': label,
         'color': color,
         'alpha': opacity,
@@ -376,6 +389,7 @@ def create_sheet(control_points, normal_vectors, binormal_vectors, width_values,
     `dict`
         Dict for the `data` parameter of MolstarViewer
     """
+    control_points, normal_vectors, binormal_vectors = _flat(control_points), _flat(normal_vectors), _flat(binormal_vectors)
     if len(control_points) % 3 != 0: raise ValueError("Control points must be a flat list of 3D coordinates!")
     if len(normal_vectors) != len(control_points): raise ValueError("Normal vectors must have the same length as control points!")
     if len(binormal_vectors) != len(control_points): raise ValueError("Binormal vectors must have the same length as control points!")
@@ -390,11 +404,11 @@ def create_sheet(control_points, normal_vectors, binormal_vectors, width_values,
     return {
         'type': 'shape',
         'shape': 'sheet',
-        'controlPoints': list(control_points),
-        'normalVectors': list(normal_vectors),
-        'binormalVectors': list(binormal_vectors),
-        'widthValues': list(width_values),
-        'heightValues': list(height_values),
+        'controlPoints': _list(control_points),
+        'normalVectors': _list(normal_vectors),
+        'binormalVectors': _list(binormal_vectors),
+        'widthValues': _list(width_values),
+        'heightValues': _list(height_values),
         'label': label,
         'color': color,
         'alpha': opacity,
@@ -446,6 +460,7 @@ def create_tube(control_points, normal_vectors, binormal_vectors, width_values,
     `dict`
         Dict for the `data` parameter of MolstarViewer
     """
+    control_points, normal_vectors, binormal_vectors = _flat(control_points), _flat(normal_vectors), _flat(binormal_vectors)
     if len(control_points) % 3 != 0: raise ValueError("Control points must be a flat list of 3D coordinates!")
     if len(normal_vectors) != len(control_points): raise ValueError("Normal vectors must have the same length as control points!")
     if len(binormal_vectors) != len(control_points): raise ValueError("Binormal vectors must have the same length as control points!")
@@ -463,11 +478,11 @@ def create_tube(control_points, normal_vectors, binormal_vectors, width_values,
     return {
         'type': 'shape',
         'shape': 'tube',
-        'controlPoints': list(control_points),
-        'normalVectors': list(normal_vectors),
-        'binormalVectors': list(binormal_vectors),
-        'widthValues': list(width_values),
-        'heightValues': list(height_values),
+        'controlPoints': _list(control_points),
+        'normalVectors': _list(normal_vectors),
+        'binormalVectors': _list(binormal_vectors),
+        'widthValues': _list(width_values),
+        'heightValues': _list(height_values),
         'label': label,
         'color': color,
         'alpha': opacity,
@@ -477,4 +492,133 @@ def create_tube(control_points, normal_vectors, binormal_vectors, width_values,
         'endCap': end_cap,
         'crossSection': cross_section,
         'roundCap': round_cap
-    }
\ No newline at end of file
+    }
+
+def _batch_points(points, name):
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError(f"{name} must be an array of 3-dimensional coordinates with shape (N, 3)!")
+    return points
+
+def _batch_values(values, count, name):
+    """Send a scalar as is and an array with one value per instance, encoded if it is numeric."""
+    values = np.asarray(values)
+    if values.ndim == 0:
+        return values.item()
+    if values.shape != (count,):
+        raise ValueError(f"{name} must be a scalar or have one value per instance ({count})!")
+    return encode_array(values) if values.dtype.kind in 'biuf' else values.tolist()
+
+def _batch_colors(colors, count):
+    """Colors are X11 names or 0xRRGGBB integers, and RGB rows are packed into integers."""
+    if isinstance(colors, (str, int, np.integer)):
+        return colors if isinstance(colors, str) else int(colors)
+    colors = np.asarray(colors)
+    if colors.ndim == 2 and colors.shape[1] == 3:
+        if colors.dtype.kind == 'f':
+            colors = np.round(np.clip(colors, 0, 1) * 255)
+        colors = colors.astype(np.int64)
+        colors = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+    return _batch_values(colors, count, "Colors")
+
+def create_sphere_batch(centers, radii=1.0, colors='blue', label="Spheres", opacity=1.0, detail=2):
+    """
+    Generate a batch of spheres in the viewer, drawn as a single instanced mesh.
+
+    Thousands of spheres can be shown this way at the cost of a single shape. Clicking
+    on a sphere reports its index in `centers` through the `shapeclick` property.
+
+    Parameters
+    ----------
+    `centers` — array-like
+        Centers of the spheres with shape (N, 3)
+    `radii` — float or array-like (optional)
+        Sphere radius in angstrom, either one for all spheres or one per sphere (default: `1.0`)
+    `colors` — str, int or array-like (optional)
+        Color of all spheres or one per sphere, given as X11 color names, 0xRRGGBB integers
+        or an (N, 3) array of RGB values, from 0 to 255 for integers and from 0 to 1 for
+        floats (default: `'blue'`)
+    `label` — str (optional)
+        The label of the batch to be shown in the viewer (default: `"Spheres"`)
+    `opacity` — float (optional)
+        Transparency of the spheres. The value is ranging from 0 to 1.0. (default: `1.0`)
+    `detail` — int (optional)
+        Controls the subdivision surface of the spheres. Keep it low for large batches. (default: `2`)
+
+    Returns
+    -------
+    `dict`
+        Dict for the `data` parameter of MolstarViewer
+
+    Raises
+    ------
+    `ValueError`
+        Raised if the centers are not 3-dimensional, or the radii or colors do not match the centers
+    """
+    centers = _batch_points(centers, "Centers")
+    count = len(centers)
+    return {
+        'type': 'shape',
+        'shape': 'sphere_batch',
+        'count': count,
+        'centers': encode_array(centers),
+        'radii': _batch_values(radii, count, "Radii"),
+        'colors': _batch_colors(colors, count),
+        'label': label,
+        'alpha': opacity,
+        'detail': detail
+    }
+
+def create_cylinder_batch(starts, ends, radii=0.1, colors='yellow', label="Cylinders", opacity=1.0, radial_segments=16):
+    """
+    Generate a batch of cylinders in the viewer, drawn as a single instanced mesh.
+
+    Thousands of cylinders can be shown this way at the cost of a single shape. Clicking
+    on a cylinder reports its index in `starts` through the `shapeclick` property.
+
+    Parameters
+    ----------
+    `starts` — array-like
+        Start points of the cylinders with shape (N, 3)
+    `ends` — array-like
+        End points of the cylinders with shape (N, 3)
+    `radii` — float or array-like (optional)
+        Cylinder radius in angstrom, either one for all cylinders or one per cylinder (default: `0.1`)
+    `colors` — str, int or array-like (optional)
+        Color of all cylinders or one per cylinder, given as X11 color names, 0xRRGGBB integers
+        or an (N, 3) array of RGB values, from 0 to 255 for integers and from 0 to 1 for
+        floats (default: `'yellow'`)
+    `label` — str (optional)
+        The label of the batch to be shown in the viewer (default: `"Cylinders"`)
+    `opacity` — float (optional)
+        Transparency of the cylinders. The value is ranging from 0 to 1.0. (default: `1.0`)
+    `radial_segments` — int (optional)
+        Number of radial segments of the cylinders (default: `16`)
+
+    Returns
+    -------
+    `dict`
+        Dict for the `data` parameter of MolstarViewer
+
+    Raises
+    ------
+    `ValueError`
+        Raised if the points are not 3-dimensional or do not match, or the radii or colors
+        do not match the points
+    """
+    starts = _batch_points(starts, "Start points")
+    ends = _batch_points(ends, "End points")
+    if starts.shape != ends.shape: raise ValueError("Start and end points must have the same shape!")
+    count = len(starts)
+    return {
+        'type': 'shape',
+        'shape': 'cylinder_batch',
+        'count': count,
+        'starts': encode_array(starts),
+        'ends': encode_array(ends),
+        'radii': _batch_values(radii, count, "Radii"),
+        'colors': _batch_colors(colors, count),
+        'label': label,
+        'alpha': opacity,
+        'radialSegments': radial_segments
+    }
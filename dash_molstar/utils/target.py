@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import numpy as np
 
 class Box(object):
@@ -44,13 +44,13 @@ class Box(object):
     @property
     def min_y(self):
         if self.__min is not None:
-            return self.__min[0]
+            return self.__min[1]
         return None
 
     @property
     def min_z(self):
         if self.__min is not None:
-            return self.__min[0]
+            return self.__min[2]
         return None
 
     @property
@@ -180,15 +180,29 @@ class Boundary(object):
         self.__sphere = None
         try:
             if coords is not None:
-                min = (np.min(coords[:, 0]), np.min(coords[:, 1]), np.min(coords[:, 2]))
-                max = (np.max(coords[:, 0]), np.max(coords[:, 1]), np.max(coords[:, 2]))
-                center = ((min[0] + max[0]) / 2, (min[1] + max[1]) / 2, (min[2] + max[2]) / 2)
-                radius = np.max(np.linalg.norm(coords - center, axis=1))
-                self.__box = Box(min, max)
-                self.__sphere = Sphere(center, radius)
+                coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+                min = coords.min(axis=0)
+                max = coords.max(axis=0)
+                center = (min + max) / 2
+                diff = coords - center
+                radius = np.sqrt(np.einsum('ij,ij->i', diff, diff).max())
+                self.__set(min, max, radius)
         except:
             raise ValueError("Invalid coordinates provided to Boundary object")
 
+    @classmethod
+    def from_extent(cls, min, max, radius: float) -> 'Boundary':
+        """
+        Create a boundary from a computed bounding box and the radius of the sphere around its center.
+        """
+        boundary = cls()
+        boundary.__set(np.asarray(min, dtype=np.float64), np.asarray(max, dtype=np.float64), radius)
+        return boundary
+
+    def __set(self, min: np.ndarray, max: np.ndarray, radius: float):
+        self.__box = Box(tuple(min.tolist()), tuple(max.tolist()))
+        self.__sphere = Sphere(tuple(((min + max) / 2).tolist()), float(radius))
+
     @property
     def box(self):
         return self.__box
@@ -198,6 +212,97 @@ class Boundary(object):
         return self.__sphere
 
 
+def _group_boundaries(coords: np.ndarray, counts: np.ndarray) -> List[Optional[Boundary]]:
+    # boundaries of consecutive groups of coordinates, None for empty groups
+    counts = np.asarray(counts, dtype=np.int64)
+    boundaries = [None] * len(counts)
+    filled = np.flatnonzero(counts > 0)
+    if filled.size == 0:
+        return boundaries
+    # empty groups add no rows, so the starts of the other groups are strictly increasing
+    starts = (np.cumsum(counts) - counts)[filled]
+    mins = np.minimum.reduceat(coords, starts, axis=0)
+    maxs = np.maximum.reduceat(coords, starts, axis=0)
+    diff = coords - np.repeat((mins + maxs) / 2, counts[filled], axis=0)
+    radii = np.sqrt(np.maximum.reduceat(np.einsum('ij,ij->i', diff, diff), starts))
+    for position, min, max, radius in zip(filled.tolist(), mins, maxs, radii.tolist()):
+        boundaries[position] = Boundary.from_extent(min, max, radius)
+    return boundaries
+
+class _Lookup(object):
+    """
+    Items of a list grouped by key for O(1) finds. Kept up to date by the owner of the list on
+    every add and remove, and rebuilt on the next find after the key of an item has been changed.
+    """
+    def __init__(self, key):
+        self.__key = key
+        self.__items = None
+
+    def invalidate(self):
+        self.__items = None
+
+    def add(self, item):
+        # items with the same key are kept by identity, in the order they were added
+        if self.__items is not None:
+            self.__items.setdefault(self.__key(item), {})[id(item)] = item
+
+    def remove(self, item):
+        if self.__items is not None:
+            key = self.__key(item)
+            items = self.__items.get(key, {})
+            items.pop(id(item), None)
+            if not items:
+                self.__items.pop(key, None)
+
+    def find(self, key, items: Iterable):
+        if self.__items is None:
+            self.__items = {}
+            for item in items:
+                self.__items.setdefault(self.__key(item), {})[id(item)] = item
+        found = self.__items.get(key)
+        return next(iter(found.values())) if found else None
+
+class _Members(object):
+    """
+    The items of a chain, residue or atom list in the order they were added, with O(1) removal.
+    Every item knows its position, and a removed item leaves a hole that is compacted away the
+    next time the list is read, or once half of the list is holes.
+    """
+    def __init__(self):
+        self.__items = []
+        self.__holes = 0
+
+    def __len__(self):
+        return len(self.__items) - self.__holes
+
+    def __iter__(self):
+        # skips the holes without compacting
+        return (item for item in self.__items if item is not None)
+
+    def append(self, item):
+        item._position = len(self.__items)
+        self.__items.append(item)
+
+    def remove(self, item):
+        self.__items[item._position] = None
+        item._position = None
+        self.__holes += 1
+        if self.__holes * 2 > len(self.__items):
+            self.__compact()
+
+    def __compact(self):
+        # in place, so the list returned by `items` stays the same object
+        self.__items[:] = [item for item in self.__items if item is not None]
+        for position, item in enumerate(self.__items):
+            item._position = position
+        self.__holes = 0
+
+    @property
+    def items(self) -> list:
+        if self.__holes:
+            self.__compact()
+        return self.__items
+
 class Atom(object):
     def __init__(self, index: int = None, name: str = None, x: float = None, y: float = None, z: float = None):
         self.__name = name
@@ -206,6 +311,15 @@ class Atom(object):
         self.__y = round(y, 6) if y is not None else None
         self.__z = round(z, 6) if z is not None else None
         self.__valid = self.__index is not None
+        # the residue this atom was added to, notified when the atom changes, its position there and its row
+        # in the coordinate buffer of the residue
+        self._owner = None
+        self._position = None
+        self._row = None
+
+    def _notify(self):
+        if self._owner is not None:
+            self._owner._changed(True, self)
 
     @property
     def valid(self):
@@ -219,6 +333,7 @@ class Atom(object):
     @name.setter
     def name(self, value):
         self.__name = value
+        self._notify()
 
     @property
     def index(self):
@@ -239,6 +354,7 @@ class Atom(object):
             self.__valid = True
         else:
             raise TypeError("number must be a string or integer")
+        self._notify()
 
     @property
     def x(self):
@@ -260,13 +376,60 @@ class Residue(object):
         if index is not None and number is None:
             self.__number = index
         self.__ins_code = ins_code
-        self.__atoms = []
+        self.__atoms = _Members()
+        self.__atom_lookup = _Lookup(lambda atom: atom.name)
+        # coordinates of the valid atoms, one row per atom in `__rows`, grown by doubling
+        self.__coords = np.empty((0, 3), dtype=np.float64)
+        self.__rows = []
+        self._owner = None
+        self._position = None
         self.__parse_data(atoms)
         self.__valid = (self.__number is not None) or (self.__index is not None)
 
     def __len__(self):
         return len(self.__atoms)
 
+    def _changed(self, renamed: bool = False, atom: 'Atom' = None):
+        # the atoms of this residue have changed. An atom that has become valid gets its row
+        if renamed: self.__atom_lookup.invalidate()
+        if atom is not None: self.__place(atom)
+        if self._owner is not None:
+            self._owner._changed()
+
+    def __place(self, atom: 'Atom'):
+        # atoms without coordinates are left out
+        if atom._row is not None or not atom.valid:
+            return
+        xyz = (atom.x, atom.y, atom.z)
+        if any(value is None or value != value for value in xyz):
+            return
+        row = len(self.__rows)
+        if row == len(self.__coords):
+            self.__coords = np.concatenate([self.__coords, np.empty((max(row, 4), 3), dtype=np.float64)])
+        self.__coords[row] = xyz
+        atom._row = row
+        self.__rows.append(atom)
+
+    def __unplace(self, atom: 'Atom'):
+        # the last row moves into the freed one, the order of the rows does not matter for boundaries
+        if atom._row is None:
+            return
+        last = self.__rows.pop()
+        if last is not atom:
+            self.__coords[atom._row] = self.__coords[len(self.__rows)]
+            self.__rows[atom._row] = last
+            last._row = atom._row
+        atom._row = None
+
+    @property
+    def _coords(self) -> np.ndarray:
+        # a view of the rows in use, kept up to date by add_atom and remove_atom
+        return self.__coords[:len(self.__rows)]
+
+    def _notify(self):
+        if self._owner is not None:
+            self._owner._changed(True)
+
     def __parse_data(self, atoms: List['Atom']):
         if atoms:
             for atom in atoms:
@@ -288,6 +451,7 @@ class Residue(object):
     @name.setter
     def name(self, value):
         self.__name = value
+        self._notify()
 
     @property
     def index(self):
@@ -308,6 +472,7 @@ class Residue(object):
             self.__valid = True
         else:
             raise TypeError("number must be a string or integer")
+        self._notify()
 
     @property
     def number(self):
@@ -328,6 +493,7 @@ class Residue(object):
             self.__valid = True
         else:
             raise TypeError("number must be a string or integer")
+        self._notify()
 
     @property
     def ins_code(self):
@@ -337,37 +503,36 @@ class Residue(object):
     def ins_code(self, value):
         self.__ins_code = value
         self.__valid = bool(value)
+        self._notify()
 
     @property
     def atoms(self) -> List[Atom]:
-        return self.__atoms
+        return self.__atoms.items
 
     def find_atom(self, name: str) -> 'Atom':
         if not self.valid:
             raise ValueError('Cannot call find_atom on invalid Residue object')
-        for atom in self.__atoms:
-            if atom.name == name:
-                return atom
-        return Atom()
+        atom = self.__atom_lookup.find(name, self.__atoms)
+        return atom if atom is not None else Atom()
 
     def add_atom(self, index: int, name: str = None, x: float = None, y: float = None, z: float = None):
         atom = Atom(index, name, x, y, z)
+        atom._owner = self
         self.__atoms.append(atom)
+        self.__atom_lookup.add(atom)
+        self.__place(atom)
+        self._changed()
     
     def remove_atom(self, name: Union[str, 'Atom']) -> bool:
-        if isinstance(name, Atom):
-            try:
-                atom_index = self.__atoms.index(name)
-                del self.__atoms[atom_index]
-                return True
-            except ValueError: pass
-        else:
-            atom = self.find_atom(name)
-            if atom.valid:
-                atom_index = self.__atoms.index(atom)
-                del self.__atoms[atom_index]
-                return True
-        return False
+        atom = name if isinstance(name, Atom) else self.find_atom(name)
+        if atom._owner is not self:
+            return False
+        self.__atoms.remove(atom)
+        self.__atom_lookup.remove(atom)
+        self.__unplace(atom)
+        atom._owner = None
+        self._changed()
+        return True
 
 class Chain(object):
     def __init__(self, chain_name: str = None, residues: List['Residue'] = [], auth_name: str = ''):
@@ -375,13 +540,55 @@ class Chain(object):
         self.__auth_name = auth_name
         if chain_name and not auth_name:
             self.__auth_name = chain_name
-        self.__residues = []
+        self.__residues = _Members()
+        self.__residue_lookup = _Lookup(lambda residue: (residue.number, residue.ins_code or ""))
+        self.__coords = None
+        self.__residue_coords = None
+        self._owner = None
+        self._position = None
         self.__parse_data(residues)
         self.__valid = (self.__name is not None) or (self.__auth_name is not None)
 
     def __len__(self):
         return len(self.__residues)
 
+    def _changed(self, renamed: bool = False):
+        # the residues of this chain, or their atoms, have changed
+        if renamed: self.__residue_lookup.invalidate()
+        self.__coords = None
+        self.__residue_coords = None
+        if self._owner is not None:
+            self._owner._changed()
+
+    def __gather(self):
+        # the coordinate buffers of the residues joined into one, cached until the chain changes
+        residues = self.residues
+        counts = np.array([len(residue._coords) for residue in residues], dtype=np.int64)
+        self.__coords = np.concatenate([np.empty((0, 3))] + [residue._coords for residue in residues])
+        valid = np.array([residue.valid for residue in residues], dtype=bool)
+        if valid.all():
+            self.__residue_coords = (self.__coords, counts)
+        else:
+            self.__residue_coords = (self.__coords[np.repeat(valid, counts)], counts[valid])
+
+    @property
+    def _coords(self) -> np.ndarray:
+        # coordinates of the valid atoms. Atoms without coordinates are left out
+        if self.__coords is None:
+            self.__gather()
+        return self.__coords
+
+    @property
+    def _residue_coords(self) -> Tuple[np.ndarray, np.ndarray]:
+        # coordinates of the valid atoms of the valid residues, and how many rows each of those residues has
+        if self.__residue_coords is None:
+            self.__gather()
+        return self.__residue_coords
+
+    def _notify(self):
+        if self._owner is not None:
+            self._owner._changed(True)
+
     def __parse_data(self, residues: List['Residue']):
         if residues:
             for residue in residues:
@@ -405,6 +612,7 @@ class Chain(object):
     def name(self, value):
         self.__name = value
         self.__valid = bool(value)
+        self._notify()
 
     @property
     def auth_name(self):
@@ -415,15 +623,16 @@ class Chain(object):
     def auth_name(self, value):
         self.__auth_name = value
         self.__valid = bool(value)
+        self._notify()
 
     @property
     def residues(self) -> List[Residue]:
-        return self.__residues
+        return self.__residues.items
 
     @property
     def atoms(self) -> List[Atom]:
         atoms = []
-        for residue in self.__residues:
+        for residue in self.residues:
             for atom in residue.atoms:
                 if atom.valid:
                     atoms.append(atom)
@@ -432,10 +641,8 @@ class Chain(object):
     def find_residue(self, number, ins_code="") -> 'Residue':
         if not self.valid:
             raise ValueError('Cannot call find_residue on invalid Chain object')
-        for residue in self.__residues:
-            if residue.number == number and (residue.ins_code or "") == ins_code:
-                return residue
-        return Residue()
+        residue = self.__residue_lookup.find((number, ins_code), self.__residues)
+        return residue if residue is not None else Residue()
 
     def find_atom(self, residue_number, atom_name, ins_code="") -> 'Atom':
         if not self.valid:
@@ -447,27 +654,27 @@ class Chain(object):
 
     def add_residue(self, index: int, number: int = None, ins_code: str = '', name: str = '', atoms: List['Atom'] = []):
         residue = Residue(index, number, ins_code, name, atoms)
+        residue._owner = self
         self.__residues.append(residue)
+        self.__residue_lookup.add(residue)
+        self._changed()
     
     def remove_residue(self, number: Union[int, 'Residue'], ins_code: str = '') -> bool:
-        if isinstance(number, Residue):
-            try:
-                residue_index = self.__residues.index(number)
-                del self.__residues[residue_index]
-                return True
-            except ValueError: pass
-        else:
-            residue = self.find_residue(number, ins_code)
-            if residue.valid:
-                residue_index = self.__residues.index(residue)
-                del self.__residues[residue_index]
-                return True
-        return False
+        residue = number if isinstance(number, Residue) else self.find_residue(number, ins_code)
+        if residue._owner is not self:
+            return False
+        self.__residues.remove(residue)
+        self.__residue_lookup.remove(residue)
+        residue._owner = None
+        self._changed()
+        return True
 
 class Target(object):
     def __init__(self, data: Dict = {}):
-        self.__chains = []
-        self.auth = False
+        self.__chains = _Members()
+        self.__chain_lookup = _Lookup(lambda chain: chain.name)
+        # compact ranges are residue numbers in auth mode
+        self.auth = data.get('auth', False)
         self.__parse_data(data)
         self.__boundary = None
         self.__valid = len(self.__chains) > 0
@@ -475,13 +682,25 @@ class Target(object):
     def __len__(self):
         return len(self.__chains)
 
+    def __or__(self, other):
+        if not _is_target(other): return NotImplemented
+        return self.union(other)
+
+    def __and__(self, other):
+        if not _is_target(other): return NotImplemented
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        if not _is_target(other): return NotImplemented
+        return self.difference(other)
+
     def __parse_data(self, data: Dict):
         chains = data.get('chains', [])
         if chains:
             for chain in chains:
                 chain_name = chain.get('name')
                 auth_name = chain.get('auth_name', '')
-                residues = chain.get('residues', [])
+                residues = _expand_ranges(chain, self.auth)
                 self.add_chain(chain_name, residues, auth_name)
 
     @property
@@ -490,12 +709,12 @@ class Target(object):
 
     @property
     def chains(self) -> List[Chain]:
-        return self.__chains
+        return self.__chains.items
 
     @property
     def residues(self) -> List[Residue]:
         residues = []
-        for chain in self.__chains:
+        for chain in self.chains:
             for residue in chain.residues:
                 if residue.valid:
                     residues.append(residue)
@@ -504,7 +723,7 @@ class Target(object):
     @property
     def atoms(self) -> List[Atom]:
         atoms = []
-        for chain in self.__chains:
+        for chain in self.chains:
             for residue in chain.residues:
                 for atom in residue.atoms:
                     if atom.valid:
@@ -515,25 +734,62 @@ class Target(object):
     def boundary(self) -> Optional[Boundary]:
         if self.valid:
             if not self.__boundary:
-                coords = np.array([[atom.x, atom.y, atom.z] for atom in self.atoms])
-                self.__boundary = Boundary(coords)
+                # the coordinates of every chain are cached until the chain changes
+                self.__boundary = Boundary(np.concatenate([chain._coords for chain in self.chains]))
             return self.__boundary
         raise ValueError('Cannot access boundary on invalid Target object')
 
+    def boundaries_by_chain(self) -> List[Optional[Boundary]]:
+        """
+        The boundary of every chain, in the order of `chains`. `None` for chains without coordinates.
+        """
+        coords = [chain._coords for chain in self.chains]
+        return _group_boundaries(np.concatenate([np.empty((0, 3))] + coords), [len(c) for c in coords])
+
+    def boundaries_by_residue(self) -> List[Optional[Boundary]]:
+        """
+        The boundary of every residue, in the order of `residues`. `None` for residues without coordinates.
+        """
+        # the per-residue row counts of every chain are cached together with its coordinate buffer
+        residue_coords = [chain._residue_coords for chain in self.chains]
+        coords = np.concatenate([np.empty((0, 3))] + [coords for coords, _ in residue_coords])
+        counts = np.concatenate([np.empty(0, dtype=np.int64)] + [counts for _, counts in residue_coords])
+        return _group_boundaries(coords, counts)
+
+    def union(self, other) -> 'Target':
+        """
+        The chains, residues and atoms in this target or in `other`, which is a `Target` or `TargetArray`.
+        See `TargetArray.union` for how they are matched.
+        """
+        return self.__combine(other, 'union')
+
+    def intersection(self, other) -> 'Target':
+        """
+        The chains, residues and atoms in both this target and `other`.
+        """
+        return self.__combine(other, 'intersection')
+
+    def difference(self, other) -> 'Target':
+        """
+        The chains, residues and atoms of this target that are not in `other`.
+        """
+        return self.__combine(other, 'difference')
+
+    def __combine(self, other, operation: str) -> 'Target':
+        # merged on NumPy columns, which avoids comparing the objects pairwise
+        from .target_array import TargetArray
+        return getattr(TargetArray.from_target(self), operation)(other).to_target()
+
     def find_chain(self, name) -> 'Chain':
         if not self.__valid:
             raise ValueError('Cannot call find_chain on invalid Target object')
-        for chain in self.__chains:
-            if chain.name == name:
-                return chain
-        return Chain()
+        chain = self.__chain_lookup.find(name, self.__chains)
+        return chain if chain is not None else Chain()
 
     def find_residue(self, chain_name, residue_number, ins_code="") -> 'Residue':
         chain = self.find_chain(chain_name)
         if chain.valid:
-            for residue in chain.residues:
-                if residue.number == residue_number and (residue.ins_code or "") == ins_code:
-                    return residue
+            return chain.find_residue(residue_number, ins_code)
         return Residue()
 
     def find_atom(self, chain_name, residue_number, atom_name, ins_code="") -> 'Atom':
@@ -546,34 +802,49 @@ class Target(object):
 
     def add_chain(self, chain_name: str, residues: List = [], auth_name: str = ''):
         chain = Chain(chain_name, residues, auth_name)
+        chain._owner = self
         self.__chains.append(chain)
+        self.__chain_lookup.add(chain)
         self.__valid = True
+        self._changed()
 
     def remove_chain(self, chain_name: Union[str, 'Chain']) -> bool:
-        if isinstance(chain_name, Chain):
-            try:
-                chain_index = self.__chains.index(chain_name)
-                del self.__chains[chain_index]
-                if not self.__chains:
-                    self.__valid = False
-                return True
-            except ValueError: pass
-        else:
-            chain = self.find_chain(chain_name)
-            if chain.valid:
-                chain_index = self.__chains.index(chain)
-                del self.__chains[chain_index]
-                if not self.__chains:
-                    self.__valid = False
-                return True
-        return False
+        chain = chain_name if isinstance(chain_name, Chain) else self.find_chain(chain_name)
+        if chain._owner is not self:
+            return False
+        self.__chains.remove(chain)
+        self.__chain_lookup.remove(chain)
+        chain._owner = None
+        if not self.__chains:
+            self.__valid = False
+        self._changed()
+        return True
+
+    def _changed(self, renamed: bool = False):
+        # the chains of this target, or their residues or atoms, have changed
+        if renamed: self.__chain_lookup.invalidate()
+        self.__boundary = None
     
-    def to_dict(self) -> Dict:
+    def to_dict(self, compact: bool = False) -> Dict:
+        """
+        Export the target to a dict, which is sent to the viewer and can be loaded by `Target`.
+
+        Parameters
+        ----------
+        `compact` — bool (optional)
+            Write residues without atoms as `seq_ranges` of the chain, and atoms as `atom_ranges` of their
+            residue, e.g. `{'name': 'A', 'seq_ranges': [[10, 250]], 'residues': []}`. The ranges are inclusive
+            and use the label residue index, or the author residue number when `auth` is set. Names and
+            coordinates are left out, so the size grows with the number of ranges instead of atoms.
+            (default: `False`)
+        """
+        if compact:
+            return {'chains': [_compact_chain(chain, self.auth) for chain in self.chains], 'auth': self.auth}
         data = {
             'chains': [],
             'auth': self.auth
         }
-        for chain in self.__chains:
+        for chain in self.chains:
             chain_data = {
                 'name': chain.name,
                 'auth_name': chain.auth_name,
@@ -600,6 +871,53 @@ class Target(object):
             data['chains'].append(chain_data)
         return data
 
+def _is_target(value) -> bool:
+    from .target_array import TargetArray
+    return isinstance(value, (Target, TargetArray))
+
+def _ranges(values) -> List[List[int]]:
+    # inclusive ranges of consecutive integers
+    ranges = []
+    for value in sorted(set(values)):
+        if ranges and value == ranges[-1][1] + 1:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+    return ranges
+
+def _compact_chain(chain: Chain, auth: bool) -> Dict:
+    seq_ids = []
+    residues = []
+    for residue in chain.residues:
+        if not residue.valid: continue
+        atoms = [atom.index for atom in residue.atoms if atom.valid]
+        seq_id = residue.number if auth else residue.index
+        # author numbers with insertion codes can not be part of a range
+        if not atoms and seq_id is not None and not (auth and residue.ins_code):
+            seq_ids.append(seq_id)
+            continue
+        data = {'index': residue.index, 'number': residue.number, 'ins_code': residue.ins_code}
+        if atoms: data['atom_ranges'] = _ranges(atoms)
+        residues.append(data)
+    data = {'name': chain.name, 'auth_name': chain.auth_name, 'residues': residues}
+    if seq_ids: data['seq_ranges'] = _ranges(seq_ids)
+    return data
+
+def _expand_ranges(chain: Dict, auth: bool) -> List[Dict]:
+    # the residues of a chain written by `to_dict(compact=True)`, as they are written without it
+    residues = chain.get('residues') or []
+    seq_ranges = chain.get('seq_ranges')
+    if not seq_ranges and not any('atom_ranges' in residue for residue in residues):
+        return residues
+    key = 'number' if auth else 'index'
+    expanded = [{key: seq_id} for first, last in seq_ranges or [] for seq_id in range(first, last + 1)]
+    for residue in residues:
+        if residue.get('atom_ranges'):
+            atoms = [{'index': index} for first, last in residue['atom_ranges'] for index in range(first, last + 1)]
+            residue = dict(residue, atoms=(residue.get('atoms') or []) + atoms)
+        expanded.append(residue)
+    return expanded
+
 if __name__ == "__main__":
     sample_data = {'chains': [{'name': 'L', 'auth_name': 'L', 'residues': [{'name': 'GLY', 'index': 62, 'number': 62, 'ins_code': '', 'atoms': [{'name': 'N', 'index': 4817, 'x': 3.759000062942505, 'y': -11.343000411987305, 'z': -5.960999965667725}, {'name': 'CA', 'index': 4818, 'x': 4.876999855041504, 'y': -12.213000297546387, 'z': -6.27400016784668}, {'name': 'C', 'index': 4819, 'x': 6.201000213623047, 'y': -11.520999908447266, 'z': -6.026000022888184}, {'name': 'O', 'index': 4820, 'x': 6.288000106811523, 'y': -10.29699993133545, 'z': -6.059000015258789}]}, {'name': 'ASN', 'index': 133, 'number': 133, 'ins_code': '', 'atoms': [{'name': 'N', 'index': 5366, 'x': -15.53499984741211, 'y': -41.314998626708984, 'z': 11.765999794006348}, {'name': 'CA', 'index': 5367, 'x': -16.469999313354492, 'y': -40.20199966430664, 'z': 11.64799976348877}, {'name': 'C', 'index': 5368, 'x': -16.136999130249023, 'y': -38.9630012512207, 'z': 12.482000350952148}, {'name': 'O', 'index': 5369, 'x': -15.72700023651123, 'y': -39.069000244140625, 'z': 13.640000343322754}, {'name': 'CB', 'index': 5370, 'x': -17.892000198364258, 'y': -40.66999816894531, 'z': 11.961000442504883}, {'name': 'CG', 'index': 5371, 'x': -18.92799949645996, 'y': -39.95800018310547, 'z': 11.12399959564209}, {'name': 'OD1', 'index': 5372, 'x': -18.735000610351562, 'y': -39.75400161743164, 'z': 9.925000190734863}, {'name': 'ND2', 'index': 5373, 'x': -20.030000686645508, 'y': -39.5620002746582, 'z': 11.75100040435791}]}]}, {'name': 'H', 'auth_name': 'H', 'residues': [{'name': 'ARG', 'index': 105, 'number': 99, 'ins_code': 'B', 'atoms': [{'name': 'N', 'index': 825, 'x': 1.0479999780654907, 'y': -5.711999893188477, 'z': -34.37200164794922}, {'name': 'CA', 'index': 826, 'x': 2.497999906539917, 'y': -5.5329999923706055, 'z': -34.34299850463867}, {'name': 'C', 'index': 827, 'x': 3.2239999771118164, 'y': -6.763000011444092, 'z': -33.80699920654297}, {'name': 'O', 'index': 828, 'x': 4.064000129699707, 'y': -7.335999965667725, 'z': -34.49399948120117}, {'name': 'CB', 'index': 829, 'x': 2.881999969482422, 'y': -4.296999931335449, 'z': -33.5260009765625}, {'name': 'CG', 'index': 830, 'x': 2.4560000896453857, 'y': -2.9779999256134033, 'z': -34.152000427246094}, {'name': 'CD', 'index': 831, 'x': 2.986999988555908, 'y': -1.7869999408721924, 'z': -33.358001708984375}, {'name': 'NE', 'index': 832, 'x': 4.429999828338623, 'y': -1.6050000190734863, 'z': -33.513999938964844}, {'name': 'CZ', 'index': 833, 'x': 4.988999843597412, 'y': -0.7549999952316284, 'z': -34.37200164794922}, {'name': 'NH1', 'index': 834, 'x': 4.22599983215332, 'y': -0.003000000026077032, 'z': -35.154998779296875}, {'name': 'NH2', 'index': 835, 'x': 6.309999942779541, 'y': -0.6520000100135803, 'z': -34.446998596191406}]}, {'name': 'GLY', 'index': 116, 'number': 108, 'ins_code': '', 'atoms': [{'name': 'N', 'index': 942, 'x': -10.392000198364258, 'y': -21.732999801635742, 'z': -22.767000198364258}, {'name': 'CA', 'index': 943, 'x': -11.680999755859375, 'y': -22.361000061035156, 'z': -22.992000579833984}, {'name': 'C', 'index': 944, 'x': -12.182999610900879, 'y': -22.957000732421875, 'z': -21.683000564575195}, {'name': 'O', 'index': 945, 'x': -11.437999725341797, 'y': -23.02899932861328, 'z': -20.70199966430664}]}, {'name': 'CYS', 'index': 204, 'number': 200, 'ins_code': '', 'atoms': [{'name': 'N', 'index': 1558, 'x': -31.833999633789062, 'y': -45.24300003051758, 'z': 0.6779999732971191}, {'name': 'CA', 'index': 1559, 'x': -30.711000442504883, 'y': -44.742000579833984, 'z': -0.10599999874830246}, {'name': 'C', 'index': 1560, 'x': -31.20800018310547, 'y': -44.34600067138672, 'z': -1.4950000047683716}, {'name': 'O', 'index': 1561, 'x': -31.722000122070312, 'y': -45.1870002746582, 'z': -2.2300000190734863}, {'name': 'CB', 'index': 1562, 'x': -29.65999984741211, 'y': -45.847999572753906, 'z': -0.23800000548362732}, {'name': 'SG', 'index': 1563, 'x': -27.940000534057617, 'y': -45.314998626708984, 'z': -0.17599999904632568}]}]}]}
     target = Target(sample_data)
@@ -0,0 +1,589 @@
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Union
+import numpy as np
+from .target import Target, Chain, Residue, Atom, Boundary, _expand_ranges
+
+# stored for residue numbers and atom indices that are None
+missing = np.iinfo(np.int64).min
+
+class TargetArray(object):
+    """
+    A `Target` stored as NumPy columns instead of a tree of chain, residue and atom objects.
+
+    Chains, residues and atoms are kept in three flat tables, residues are grouped by chain and atoms
+    by residue, so the children of every item are a contiguous slice. The `chains`, `residues` and
+    `atoms` accessors return lightweight views that read from the columns, which keeps large
+    selections returned by the viewer cheap to load and to query. `TargetArray` is read-only,
+    convert it with `to_target` for editing.
+
+    Parameters
+    ----------
+    `data` — dict (optional)
+        The target data, e.g. the `selection` or `focus` returned by the viewer, or `Target.to_dict()`.
+    """
+    def __init__(self, data: Dict = {}):
+        chains = data.get('chains') or []
+        self.auth = data.get('auth', False)
+        residues = [_expand_ranges(chain, self.auth) for chain in chains]
+        flat_residues = [residue for items in residues for residue in items]
+        atoms = [residue.get('atoms') or [] for residue in flat_residues]
+        flat_atoms = [atom for items in atoms for atom in items]
+        self.__chain_names = _strings([chain.get('name') for chain in chains])
+        self.__chain_auth_names = _strings([chain.get('auth_name') or chain.get('name') for chain in chains])
+        self.__residue_starts = _starts([len(items) for items in residues])
+        self.__residue_names = _strings([residue.get('name') for residue in flat_residues])
+        indices = [residue.get('index') for residue in flat_residues]
+        numbers = [residue.get('number') for residue in flat_residues]
+        self.__residue_indices = _integers(indices)
+        self.__residue_numbers = _integers([index if number is None else number for index, number in zip(indices, numbers)])
+        self.__residue_ins_codes = _strings([residue.get('ins_code') for residue in flat_residues])
+        self.__atom_starts = _starts([len(items) for items in atoms])
+        self.__atom_names = _strings([atom.get('name') for atom in flat_atoms])
+        self.__atom_indices = _integers([atom.get('index') for atom in flat_atoms])
+        # None becomes nan
+        self.__coords = np.empty((len(flat_atoms), 3), dtype=np.float64)
+        for axis, key in enumerate('xyz'):
+            self.__coords[:, axis] = np.array([atom.get(key) for atom in flat_atoms], dtype=np.float64)
+        self.__boundary = None
+        self.__lookups = {}
+
+    @classmethod
+    def from_target(cls, target: Target) -> 'TargetArray':
+        """Convert a `Target` into columns"""
+        return cls(target.to_dict())
+
+    def to_target(self) -> Target:
+        """Convert the columns into an editable `Target`"""
+        target = Target(self.to_dict())
+        target.auth = self.auth
+        return target
+
+    @classmethod
+    def _from_columns(cls, columns: Dict, auth: bool = False) -> 'TargetArray':
+        # build from finished columns, keyed by the names of the column properties
+        array = cls.__new__(cls)
+        array.auth = auth
+        array.__chain_names = columns['chain_names']
+        array.__chain_auth_names = columns['chain_auth_names']
+        array.__residue_starts = columns['residue_starts']
+        array.__residue_names = columns['residue_names']
+        array.__residue_indices = columns['residue_indices']
+        array.__residue_numbers = columns['residue_numbers']
+        array.__residue_ins_codes = columns['residue_ins_codes']
+        array.__atom_starts = columns['atom_starts']
+        array.__atom_names = columns['atom_names']
+        array.__atom_indices = columns['atom_indices']
+        array.__coords = columns['coords']
+        array.__boundary = None
+        array.__lookups = {}
+        return array
+
+    def __len__(self):
+        return len(self.__chain_names)
+
+    def __or__(self, other):
+        if not isinstance(other, (Target, TargetArray)): return NotImplemented
+        return self.union(other)
+
+    def __and__(self, other):
+        if not isinstance(other, (Target, TargetArray)): return NotImplemented
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, (Target, TargetArray)): return NotImplemented
+        return self.difference(other)
+
+    @property
+    def valid(self) -> bool:
+        return len(self.__chain_names) > 0
+
+    # columns of the chain, residue and atom tables
+
+    @property
+    def chain_names(self) -> np.ndarray:
+        return self.__chain_names
+
+    @property
+    def chain_auth_names(self) -> np.ndarray:
+        return self.__chain_auth_names
+
+    @property
+    def residue_chains(self) -> np.ndarray:
+        """Position of the chain of every residue"""
+        return np.repeat(np.arange(len(self.__chain_names)), np.diff(self.__residue_starts))
+
+    @property
+    def residue_names(self) -> np.ndarray:
+        return self.__residue_names
+
+    @property
+    def residue_indices(self) -> np.ndarray:
+        """Label residue numbers, `missing` where unknown"""
+        return self.__residue_indices
+
+    @property
+    def residue_numbers(self) -> np.ndarray:
+        """Author residue numbers, `missing` where unknown"""
+        return self.__residue_numbers
+
+    @property
+    def residue_ins_codes(self) -> np.ndarray:
+        return self.__residue_ins_codes
+
+    @property
+    def residue_starts(self) -> np.ndarray:
+        """Residues of chain `i` are `residue_starts[i]:residue_starts[i + 1]`"""
+        return self.__residue_starts
+
+    @property
+    def atom_residues(self) -> np.ndarray:
+        """Position of the residue of every atom"""
+        return np.repeat(np.arange(len(self.__residue_names)), np.diff(self.__atom_starts))
+
+    @property
+    def atom_names(self) -> np.ndarray:
+        return self.__atom_names
+
+    @property
+    def atom_indices(self) -> np.ndarray:
+        """Atom indices starting from 0, `missing` where unknown"""
+        return self.__atom_indices
+
+    @property
+    def atom_starts(self) -> np.ndarray:
+        """Atoms of residue `i` are `atom_starts[i]:atom_starts[i + 1]`"""
+        return self.__atom_starts
+
+    @property
+    def coords(self) -> np.ndarray:
+        """Atom coordinates, shape `(n, 3)`, `nan` where unknown"""
+        return self.__coords
+
+    # the object API of Target, through views
+
+    @property
+    def chains(self) -> Sequence['ChainView']:
+        return _Views(self, ChainView, np.arange(len(self.__chain_names)))
+
+    @property
+    def residues(self) -> Sequence['ResidueView']:
+        valid = (self.__residue_indices != missing) | (self.__residue_numbers != missing)
+        return _Views(self, ResidueView, np.flatnonzero(valid))
+
+    @property
+    def atoms(self) -> Sequence['AtomView']:
+        return _Views(self, AtomView, np.flatnonzero(self.__atom_indices != missing))
+
+    @property
+    def boundary(self) -> Optional[Boundary]:
+        if self.valid:
+            if not self.__boundary:
+                self.__boundary = Boundary(self.__coords[self.__atom_indices != missing])
+            return self.__boundary
+        raise ValueError('Cannot access boundary on invalid TargetArray object')
+
+    def find_chain(self, name) -> Union['ChainView', Chain]:
+        if not self.valid:
+            raise ValueError('Cannot call find_chain on invalid TargetArray object')
+        position = self._lookup('chain').get(name)
+        return Chain() if position is None else ChainView(self, position)
+
+    def find_residue(self, chain_name, residue_number, ins_code="") -> Union['ResidueView', Residue]:
+        chain = self.find_chain(chain_name)
+        if chain.valid:
+            return chain.find_residue(residue_number, ins_code)
+        return Residue()
+
+    def find_atom(self, chain_name, residue_number, atom_name, ins_code="") -> Union['AtomView', Atom]:
+        residue = self.find_residue(chain_name, residue_number, ins_code)
+        if residue.valid:
+            return residue.find_atom(atom_name)
+        return Atom()
+
+    def union(self, other: Union[Target, 'TargetArray']) -> 'TargetArray':
+        """
+        The chains, residues and atoms in either of the targets.
+
+        Chains are matched by name, residues by number and insertion code and atoms by index. A chain
+        without residues or a residue without atoms stands for all of its contents, as in the
+        selections of the viewer. The result has no duplicates and is sorted by these keys.
+        """
+        return _combine(self, _as_array(other), 'union')
+
+    def intersection(self, other: Union[Target, 'TargetArray']) -> 'TargetArray':
+        """
+        The chains, residues and atoms in both of the targets, matched as in `union`.
+        """
+        return _combine(self, _as_array(other), 'intersection')
+
+    def difference(self, other: Union[Target, 'TargetArray']) -> 'TargetArray':
+        """
+        The chains, residues and atoms of this target that are not in the other one, matched as in `union`.
+
+        Raises
+        ------
+        `ValueError`
+            If part of a chain without residues or of a residue without atoms is removed, as the
+            remainder can not be listed without the structure.
+        """
+        return _combine(self, _as_array(other), 'difference')
+
+    def to_dict(self, compact: bool = False) -> Dict:
+        """
+        Export the target to a dict, identical to `Target.to_dict`, see there for `compact`.
+        """
+        if compact:
+            return self._compact_dict()
+        coords = np.round(self.__coords, 6).astype(object)
+        coords[np.isnan(self.__coords)] = None
+        x, y, z = coords.T.tolist()
+        atoms = [
+            {'name': name, 'index': index, 'x': x, 'y': y, 'z': z}
+            for name, index, x, y, z in zip(self.__atom_names.tolist(), _optional(self.__atom_indices), x, y, z)
+        ]
+        atom_starts = self.__atom_starts.tolist()
+        residues = [
+            {'name': name, 'index': index, 'number': number, 'ins_code': ins_code, 'atoms': atoms[start:end]}
+            for name, index, number, ins_code, start, end in zip(
+                self.__residue_names.tolist(), _optional(self.__residue_indices), _optional(self.__residue_numbers),
+                self.__residue_ins_codes.tolist(), atom_starts[:-1], atom_starts[1:]
+            )
+        ]
+        residue_starts = self.__residue_starts.tolist()
+        chains = [
+            {'name': name, 'auth_name': auth_name, 'residues': residues[start:end]}
+            for name, auth_name, start, end in zip(
+                self.__chain_names.tolist(), self.__chain_auth_names.tolist(), residue_starts[:-1], residue_starts[1:]
+            )
+        ]
+        return {'chains': chains, 'auth': self.auth}
+
+    def _compact_dict(self) -> Dict:
+        residue_valid = (self.__residue_indices != missing) | (self.__residue_numbers != missing)
+        atom_valid = self.__atom_indices != missing
+        atom_residues = self.atom_residues[atom_valid]
+        atom_counts = np.bincount(atom_residues, minlength=len(self.__residue_names))
+        seq_ids = self.__residue_numbers if self.auth else self.__residue_indices
+        ranged = residue_valid & (atom_counts == 0) & (seq_ids != missing)
+        if self.auth:
+            # author numbers with insertion codes can not be part of a range
+            ranged &= self.__residue_ins_codes == ''
+        residue_chains = self.residue_chains
+        seq_ranges = [[] for _ in range(len(self.__chain_names))]
+        for chain, first, last in zip(*_range_table(residue_chains[ranged], seq_ids[ranged])):
+            seq_ranges[chain].append([first, last])
+        atom_ranges = {}
+        for residue, first, last in zip(*_range_table(atom_residues, self.__atom_indices[atom_valid])):
+            atom_ranges.setdefault(residue, []).append([first, last])
+        residues = [[] for _ in range(len(self.__chain_names))]
+        listed = np.flatnonzero(residue_valid & ~ranged)
+        for position, chain, index, number, ins_code in zip(
+            listed.tolist(), residue_chains[listed].tolist(), _optional(self.__residue_indices[listed]),
+            _optional(self.__residue_numbers[listed]), self.__residue_ins_codes[listed].tolist()
+        ):
+            data = {'index': index, 'number': number, 'ins_code': ins_code}
+            if position in atom_ranges: data['atom_ranges'] = atom_ranges[position]
+            residues[chain].append(data)
+        chains = []
+        for name, auth_name, chain_residues, chain_ranges in zip(
+            self.__chain_names.tolist(), self.__chain_auth_names.tolist(), residues, seq_ranges
+        ):
+            data = {'name': name, 'auth_name': auth_name, 'residues': chain_residues}
+            if chain_ranges: data['seq_ranges'] = chain_ranges
+            chains.append(data)
+        return {'chains': chains, 'auth': self.auth}
+
+    def _lookup(self, level: str) -> Dict:
+        # dicts from names and numbers to positions, built on first use
+        if level not in self.__lookups:
+            if level == 'chain':
+                lookup = {}
+                for position, name in enumerate(self.__chain_names.tolist()):
+                    lookup.setdefault(name, position)
+            elif level == 'residue':
+                lookup = {}
+                keys = zip(self.residue_chains.tolist(), self.__residue_numbers.tolist(), self.__residue_ins_codes.tolist())
+                for position, key in enumerate(keys):
+                    lookup.setdefault(key, position)
+            else:
+                lookup = {}
+                for position, key in enumerate(zip(self.atom_residues.tolist(), self.__atom_names.tolist())):
+                    lookup.setdefault(key, position)
+            self.__lookups[level] = lookup
+        return self.__lookups[level]
+
+class ChainView(object):
+    """A chain of a `TargetArray`, with the read-only API of `Chain`"""
+    __slots__ = ('_array', '_position')
+
+    def __init__(self, array: TargetArray, position: int):
+        self._array = array
+        self._position = position
+
+    def __len__(self):
+        starts = self._array.residue_starts
+        return int(starts[self._position + 1] - starts[self._position])
+
+    @property
+    def valid(self) -> bool:
+        return True
+
+    @property
+    def name(self) -> str:
+        return str(self._array.chain_names[self._position])
+
+    @property
+    def auth_name(self) -> str:
+        return str(self._array.chain_auth_names[self._position])
+
+    @property
+    def residues(self) -> Sequence['ResidueView']:
+        starts = self._array.residue_starts
+        return _Views(self._array, ResidueView, np.arange(starts[self._position], starts[self._position + 1]))
+
+    @property
+    def atoms(self) -> Sequence['AtomView']:
+        residue_starts, atom_starts = self._array.residue_starts, self._array.atom_starts
+        positions = np.arange(atom_starts[residue_starts[self._position]], atom_starts[residue_starts[self._position + 1]])
+        return _Views(self._array, AtomView, positions[self._array.atom_indices[positions] != missing])
+
+    def find_residue(self, number, ins_code="") -> Union['ResidueView', Residue]:
+        position = self._array._lookup('residue').get((self._position, number, ins_code or ''))
+        return Residue() if position is None else ResidueView(self._array, position)
+
+    def find_atom(self, residue_number, atom_name, ins_code="") -> Union['AtomView', Atom]:
+        residue = self.find_residue(residue_number, ins_code)
+        if residue.valid:
+            return residue.find_atom(atom_name)
+        return Atom()
+
+class ResidueView(object):
+    """A residue of a `TargetArray`, with the read-only API of `Residue`"""
+    __slots__ = ('_array', '_position')
+
+    def __init__(self, array: TargetArray, position: int):
+        self._array = array
+        self._position = position
+
+    def __len__(self):
+        starts = self._array.atom_starts
+        return int(starts[self._position + 1] - starts[self._position])
+
+    @property
+    def valid(self) -> bool:
+        return self.index is not None or self.number is not None
+
+    @property
+    def name(self) -> str:
+        return str(self._array.residue_names[self._position])
+
+    @property
+    def index(self) -> Optional[int]:
+        value = int(self._array.residue_indices[self._position])
+        return None if value == missing else value
+
+    @property
+    def number(self) -> Optional[int]:
+        value = int(self._array.residue_numbers[self._position])
+        return None if value == missing else value
+
+    @property
+    def ins_code(self) -> str:
+        return str(self._array.residue_ins_codes[self._position])
+
+    @property
+    def atoms(self) -> Sequence['AtomView']:
+        starts = self._array.atom_starts
+        return _Views(self._array, AtomView, np.arange(starts[self._position], starts[self._position + 1]))
+
+    def find_atom(self, name: str) -> Union['AtomView', Atom]:
+        position = self._array._lookup('atom').get((self._position, name))
+        return Atom() if position is None else AtomView(self._array, position)
+
+class AtomView(object):
+    """An atom of a `TargetArray`, with the read-only API of `Atom`"""
+    __slots__ = ('_array', '_position')
+
+    def __init__(self, array: TargetArray, position: int):
+        self._array = array
+        self._position = position
+
+    @property
+    def valid(self) -> bool:
+        return self.index is not None
+
+    @property
+    def name(self) -> str:
+        return str(self._array.atom_names[self._position])
+
+    @property
+    def index(self) -> Optional[int]:
+        value = int(self._array.atom_indices[self._position])
+        return None if value == missing else value
+
+    @property
+    def x(self) -> Optional[float]:
+        return self._coord(0)
+
+    @property
+    def y(self) -> Optional[float]:
+        return self._coord(1)
+
+    @property
+    def z(self) -> Optional[float]:
+        return self._coord(2)
+
+    def _coord(self, axis: int) -> Optional[float]:
+        value = float(self._array.coords[self._position, axis])
+        return None if np.isnan(value) else value
+
+class _Views(Sequence):
+    # a list-like sequence that creates the views on access
+    def __init__(self, array: TargetArray, view, positions: np.ndarray):
+        self.__array = array
+        self.__view = view
+        self.__positions = positions
+
+    def __len__(self):
+        return len(self.__positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return _Views(self.__array, self.__view, self.__positions[item])
+        return self.__view(self.__array, int(self.__positions[item]))
+
+    def __iter__(self):
+        for position in self.__positions.tolist():
+            yield self.__view(self.__array, position)
+
+def _strings(values: List[Optional[str]]) -> np.ndarray:
+    return np.array(['' if value is None else str(value) for value in values], dtype=str)
+
+def _integers(values: List[Optional[int]]) -> np.ndarray:
+    return np.array([missing if value is None else value for value in values], dtype=np.int64)
+
+def _optional(values: np.ndarray) -> List[Optional[int]]:
+    return [None if value == missing else value for value in values.tolist()]
+
+def _range_table(groups: np.ndarray, values: np.ndarray):
+    # inclusive ranges of consecutive values within every group, as lists of groups, firsts and lasts
+    if not len(values):
+        return [], [], []
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    unique = np.ones(len(values), dtype=bool)
+    unique[1:] = (groups[1:] != groups[:-1]) | (values[1:] != values[:-1])
+    groups, values = groups[unique], values[unique]
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = (groups[1:] != groups[:-1]) | (values[1:] != values[:-1] + 1)
+    firsts = np.flatnonzero(starts)
+    lasts = np.r_[firsts[1:], len(values)] - 1
+    return groups[firsts].tolist(), values[firsts].tolist(), values[lasts].tolist()
+
+def _starts(counts: List[int]) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64)
+
+def _as_array(target: Union[Target, TargetArray]) -> TargetArray:
+    if isinstance(target, TargetArray):
+        return target
+    if isinstance(target, Target):
+        return TargetArray.from_target(target)
+    raise TypeError(f"Expected a Target or TargetArray, got {type(target).__name__}")
+
+def _group(keys: List[np.ndarray], side: np.ndarray):
+    # number the groups of equal keys in the sorted order of the keys, the first row of every
+    # group is taken from the first target if it has one
+    order = np.lexsort([side] + keys[::-1])
+    change = np.zeros(len(side), dtype=bool)
+    change[:1] = True
+    for key in keys:
+        ordered = key[order]
+        change[1:] |= ordered[1:] != ordered[:-1]
+    ids = np.empty(len(side), dtype=np.int64)
+    ids[order] = np.cumsum(change) - 1
+    return ids, order[change]
+
+def _members(ids: np.ndarray, side: np.ndarray, count: int, rows: np.ndarray = None) -> np.ndarray:
+    # (2, count) flags of the groups with a row in the first and the second target
+    flags = np.zeros((2, count), dtype=bool)
+    if rows is not None:
+        ids, side = ids[rows], side[rows]
+    flags[side, ids] = True
+    return flags
+
+def _combine(first: TargetArray, second: TargetArray, operation: str) -> TargetArray:
+    if first.auth != second.auth:
+        raise ValueError("Cannot combine targets with different auth settings")
+    arrays = (first, second)
+    # rows of both targets, chains are grouped by name
+    chain_side = np.repeat([0, 1], [len(array.chain_names) for array in arrays])
+    chain_names = np.concatenate([array.chain_names for array in arrays])
+    chain_empty = np.concatenate([np.diff(array.residue_starts) == 0 for array in arrays])
+    chain_ids, chain_first = _group([chain_names], chain_side)
+    chain_in = _members(chain_ids, chain_side, len(chain_first))
+    chain_whole = _members(chain_ids, chain_side, len(chain_first), chain_empty)
+    # residues are grouped by chain, number and insertion code
+    residue_side = np.repeat([0, 1], [len(array.residue_names) for array in arrays])
+    residue_rows = np.concatenate([first.residue_chains, second.residue_chains + len(first.chain_names)])
+    residue_chains = chain_ids[residue_rows]
+    residue_numbers = np.concatenate([array.residue_numbers for array in arrays])
+    residue_ins_codes = np.concatenate([array.residue_ins_codes for array in arrays])
+    residue_empty = np.concatenate([np.diff(array.atom_starts) == 0 for array in arrays])
+    residue_valid = residue_numbers != missing
+    residue_ids, residue_first = _group([residue_chains, residue_numbers, residue_ins_codes], residue_side)
+    residue_in = _members(residue_ids, residue_side, len(residue_first), residue_valid)
+    residue_whole = _members(residue_ids, residue_side, len(residue_first), residue_valid & residue_empty)
+    residue_parents = residue_chains[residue_first]
+    # atoms are grouped by residue and index
+    atom_side = np.repeat([0, 1], [len(array.atom_names) for array in arrays])
+    atom_rows = np.concatenate([first.atom_residues, second.atom_residues + len(first.residue_names)])
+    atom_residues = residue_ids[atom_rows]
+    atom_indices = np.concatenate([array.atom_indices for array in arrays])
+    atom_valid = (atom_indices != missing) & residue_valid[atom_rows]
+    atom_ids, atom_first = _group([atom_residues, atom_indices], atom_side)
+    atom_in = _members(atom_ids, atom_side, len(atom_first), atom_valid)
+    atom_parents = atom_residues[atom_first]
+    # a chain without residues contains all of its residues, and a residue without atoms all of its atoms
+    residue_whole |= chain_whole[:, residue_parents]
+    residue_in |= residue_whole
+    atom_in |= residue_whole[:, atom_parents]
+
+    chain_kept, chain_all = _apply(operation, chain_in, chain_whole)
+    residue_kept, residue_all = _apply(operation, residue_in, residue_whole)
+    atom_kept, _ = _apply(operation, atom_in, atom_in)
+    # list the contents only when the parent is not kept as a whole, and drop the parents whose
+    # contents are all gone, as an empty parent would stand for everything
+    atom_kept &= residue_kept[atom_parents] & ~residue_all[atom_parents] & ~chain_all[residue_parents[atom_parents]]
+    residue_kept &= chain_kept[residue_parents] & ~chain_all[residue_parents]
+    residue_kept &= residue_all | (np.bincount(atom_parents[atom_kept], minlength=len(residue_kept)) > 0)
+    chain_kept &= chain_all | (np.bincount(residue_parents[residue_kept], minlength=len(chain_kept)) > 0)
+
+    # the groups are numbered in sorted order, so the kept rows are already grouped by parent
+    chains, residues, atoms = chain_first[chain_kept], residue_first[residue_kept], atom_first[atom_kept]
+    residue_counts = np.bincount(residue_parents[residue_kept], minlength=len(chain_kept))[chain_kept]
+    atom_counts = np.bincount(atom_parents[atom_kept], minlength=len(residue_kept))[residue_kept]
+    columns = {
+        'chain_names': chain_names[chains],
+        'chain_auth_names': np.concatenate([array.chain_auth_names for array in arrays])[chains],
+        'residue_starts': _starts(residue_counts),
+        'residue_names': np.concatenate([array.residue_names for array in arrays])[residues],
+        'residue_indices': np.concatenate([array.residue_indices for array in arrays])[residues],
+        'residue_numbers': residue_numbers[residues],
+        'residue_ins_codes': residue_ins_codes[residues],
+        'atom_starts': _starts(atom_counts),
+        'atom_names': np.concatenate([array.atom_names for array in arrays])[atoms],
+        'atom_indices': atom_indices[atoms],
+        'coords': np.concatenate([array.coords for array in arrays])[atoms],
+    }
+    return TargetArray._from_columns(columns, first.auth)
+
+def _apply(operation: str, members: np.ndarray, whole: np.ndarray):
+    # the kept groups, and the groups kept with all of their contents
+    if operation == 'union':
+        return members[0] | members[1], whole[0] | whole[1]
+    if operation == 'intersection':
+        return members[0] & members[1], whole[0] & whole[1]
+    partial = whole[0] & members[1] & ~whole[1]
+    if partial.any():
+        raise ValueError("Cannot remove part of a chain without residues or of a residue without atoms")
+    return members[0] & ~whole[1], whole[0] & ~members[1]
@@ -0,0 +1,524 @@
+import hashlib
+import os
+import struct
+from typing import Iterable, Optional, Union
+import numpy as np
+from .fileio import private_dir
+
+# coordinate formats whose frames can be located without decoding the coordinates
+indexed_formats = ["dcd", "trr", "xtc"]
+
+_TRR_MAGIC = 1993
+_XTC_MAGIC = 1995
+# frames read and written at a time while reducing a trajectory
+_REDUCE_CHUNK = 64
+# GROMACS files are in nanometers, the coordinates are read in angstroms like molstar shows them
+_NM = 10.0
+
+class FrameIndex(object):
+    """
+    The byte offsets of the frames in a DCD, TRR or XTC file.
+
+    `offsets` has one entry more than there are frames, frame `i` is stored in
+    `offsets[i]:offsets[i+1]`. For DCD files, the bytes before the first frame are the
+    header of the file, which is written in front of every window of frames.
+    """
+    def __init__(self, fmt: str, natoms: int, offsets: np.ndarray, header: bytes = b'', endian: str = '>'):
+        self.fmt = fmt
+        self.natoms = natoms
+        self.offsets = offsets
+        self.header = header
+        self.endian = endian
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def frames(self) -> int:
+        return len(self)
+
+    def read_window(self, path: str, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """
+        Read the frames `start` to `stop` (exclusive) as a valid file of the same format.
+
+        The frames are stored back to back, so a window costs one seek and one read no
+        matter how long the trajectory is.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        with open(path, 'rb') as f:
+            f.seek(int(self.offsets[start]))
+            frames = f.read(int(self.offsets[stop] - self.offsets[start]))
+        if self.fmt != 'dcd': return frames
+        # the number of frames is the second word of the first record of the header
+        header = bytearray(self.header)
+        struct.pack_into(f'{self.endian}i', header, 8, stop - start)
+        return bytes(header) + frames
+
+def index_frames(path: str, fmt: Optional[str] = None) -> FrameIndex:
+    """
+    Build the frame index of a DCD, TRR or XTC file by reading the frame headers only.
+
+    Parameters
+    ----------
+    `path` — str
+        Path to the coordinate file.
+    `fmt` — str (optional)
+        Format of the file, inferred from the file extension if not given. (default: `None`)
+
+    Returns
+    -------
+    `FrameIndex`
+        The byte offsets of all frames.
+
+    Raises
+    ------
+    `RuntimeError`
+        Raised if the format is not supported or the file is not a valid coordinate file
+    """
+    if not fmt: fmt = os.path.splitext(path)[1]
+    fmt = fmt.strip('.').lower()
+    if fmt not in indexed_formats:
+        raise RuntimeError(f"The coordinate file format \"{fmt}\" can not be indexed. Supported formats are {', '.join(indexed_formats)}.")
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if fmt == 'dcd': return _index_dcd(f, size)
+        if fmt == 'trr': return _index_trr(f, size)
+        return _index_xtc(f, size)
+
+def _record(f, endian):
+    # a fortran unformatted record: the length, the data and the length again
+    raw = f.read(4)
+    if len(raw) < 4: raise RuntimeError("Unexpected end of the DCD file.")
+    length, = struct.unpack(f'{endian}i', raw)
+    data = f.read(length)
+    if len(data) < length or f.read(4) != raw: raise RuntimeError("Malformed record in the DCD file.")
+    return data
+
+def _index_dcd(f, size):
+    raw = f.read(4)
+    if len(raw) < 4: raise RuntimeError("The file is not a DCD file.")
+    endian = '<' if struct.unpack('<i', raw)[0] == 84 else '>'
+    f.seek(0)
+    first = _record(f, endian)
+    if len(first) != 84 or first[:4] != b'CORD': raise RuntimeError("The file is not a DCD file.")
+    icntrl = struct.unpack(f'{endian}20i', first[4:])
+    _record(f, endian)  # title
+    natoms, = struct.unpack(f'{endian}i', _record(f, endian))
+    if icntrl[8] > 0: raise RuntimeError("DCD files with fixed atoms are not supported.")
+    header_size = f.tell()
+    f.seek(0)
+    header = f.read(header_size)
+    # CHARMM files (non-zero version) flag a unit cell record and a fourth dimension
+    charmm = icntrl[19] != 0
+    has_cell = charmm and icntrl[10] != 0
+    dims = 4 if charmm and icntrl[11] != 0 else 3
+    frame_size = (56 if has_cell else 0) + dims * (8 + 4 * natoms)
+    frames = (size - header_size) // frame_size
+    offsets = header_size + frame_size * np.arange(frames + 1, dtype=np.int64)
+    return FrameIndex('dcd', natoms, offsets, header, endian)
+
+def _index_trr(f, size):
+    offsets = []
+    natoms = 0
+    position = 0
+    while position < size:
+        raw = f.read(76)
+        if len(raw) < 76: break
+        magic, _, _, _, *sizes = struct.unpack('>iii12s13i', raw)
+        if magic != _TRR_MAGIC: raise RuntimeError(f"Invalid frame header at byte {position} of the TRR file.")
+        ir, e, box, vir, pres, top, sym, x, v, f_size, natoms, _, _ = sizes
+        # the time and lambda are stored in the precision of the coordinates
+        precision = 8 if (box and box // 9 == 8) or (natoms and (x or v or f_size) // (3 * natoms) == 8) else 4
+        frame_size = 76 + 2 * precision + ir + e + box + vir + pres + top + sym + x + v + f_size
+        if position + frame_size > size: break
+        offsets.append(position)
+        position += frame_size
+        f.seek(position)
+    offsets.append(position)
+    return FrameIndex('trr', natoms, np.array(offsets, dtype=np.int64))
+
+def _index_xtc(f, size):
+    offsets = []
+    natoms = 0
+    position = 0
+    while position < size:
+        raw = f.read(92)
+        if len(raw) < 56: break
+        magic, natoms = struct.unpack('>ii', raw[:8])
+        if magic != _XTC_MAGIC: raise RuntimeError(f"Invalid frame header at byte {position} of the XTC file.")
+        if natoms <= 9:
+            # few atoms are stored uncompressed
+            frame_size = 56 + 12 * natoms
+        else:
+            if len(raw) < 92: break
+            nbytes, = struct.unpack('>i', raw[88:92])
+            frame_size = 92 + (nbytes + 3) // 4 * 4
+        if position + frame_size > size: break
+        offsets.append(position)
+        position += frame_size
+        f.seek(position)
+    offsets.append(position)
+    return FrameIndex('xtc', natoms, np.array(offsets, dtype=np.int64))
+
+class TrajectoryFile(object):
+    """
+    A DCD, TRR or XTC trajectory whose frames are read on demand into NumPy arrays.
+
+    The byte offsets of all frames are indexed once and saved next to the file, so opening the
+    trajectory again is instant and reading frame `i` costs a single seek. Consecutive frames
+    are read with one read call and decoded straight into a preallocated `float32` array.
+    The index is rebuilt automatically when the file changes.
+
+    The coordinates are returned in angstroms, GROMACS files (TRR and XTC) are converted from
+    nanometers. XTC frames are decompressed in Python, which takes about a second per
+    100k atoms, while DCD and TRR frames are read with NumPy only.
+
+    Parameters
+    ----------
+    `path` — str
+        Path to the coordinate file.
+    `fmt` — str (optional)
+        Format of the file, `dcd`, `trr` or `xtc`. Inferred from the file name if not specified. (default: `None`)
+    `index_path` — str (optional)
+        Where to save the index. If the location is not writable, the index is only kept in memory.
+        (default: `<path>.frames.npz`)
+    """
+    def __init__(self, path: str, fmt: Optional[str] = None, index_path: Optional[str] = None):
+        if not fmt:
+            name, fmt = os.path.splitext(path)
+        fmt = fmt.strip('.').lower()
+        if fmt not in indexed_formats:
+            raise RuntimeError(f"The coordinate file format \"{fmt}\" can not be indexed. Supported formats are {', '.join(indexed_formats)}.")
+        self.path = path
+        self.fmt = fmt
+        self.index_path = index_path or f"{path}.frames.npz"
+        self._index = None
+        self._stat = None
+        self._ensure_index()
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def index(self) -> FrameIndex:
+        self._ensure_index()
+        return self._index
+
+    @property
+    def natoms(self) -> int:
+        return self.index.natoms
+
+    def __getitem__(self, key: Union[int, slice, Iterable[int]]) -> np.ndarray:
+        """
+        Read a frame as an (natoms, 3) array, or several frames as an (nframes, natoms, 3) array.
+        """
+        if isinstance(key, (int, np.integer)):
+            count = len(self)
+            if key < 0: key += count
+            if not 0 <= key < count:
+                raise IndexError(f"Frame {key} out of range, the trajectory has {count} frames.")
+            return self.read_frames([key])[0]
+        if isinstance(key, slice):
+            return self.read_frames(range(*key.indices(len(self))))
+        return self.read_frames(key)
+
+    def read(self, start: int = 0, stop: Optional[int] = None, step: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Read the frames `start` to `stop` (exclusive) with the given `step`.
+
+        Parameters
+        ----------
+        `start` — int (optional)
+            The first frame. (default: `0`)
+        `stop` — int (optional)
+            The frame after the last one, until the end of the trajectory if not specified. (default: `None`)
+        `step` — int (optional)
+            Read every `step`-th frame. (default: `1`)
+        `out` — numpy.ndarray (optional)
+            A C-contiguous `float32` array of shape (nframes, natoms, 3) to read the frames into. (default: `None`)
+
+        Returns
+        -------
+        `numpy.ndarray`
+            The coordinates in angstroms with shape (nframes, natoms, 3).
+        """
+        return self.read_frames(range(*slice(start, stop, step).indices(len(self))), out)
+
+    def read_frames(self, frames: Iterable[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Read the given frames, in the given order, see `read`.
+        """
+        index = self.index
+        frames = np.asarray(list(frames) if not isinstance(frames, np.ndarray) else frames, dtype=np.int64).reshape(-1)
+        count = len(index)
+        if len(frames) and (frames.min() < 0 or frames.max() >= count):
+            raise IndexError(f"Frames out of range, the trajectory has {count} frames.")
+        shape = (len(frames), index.natoms, 3)
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        elif out.shape != shape or out.dtype != np.float32 or not out.flags.c_contiguous:
+            raise ValueError(f"The output array must be a C-contiguous float32 array with shape {shape}.")
+        decode = {'dcd': _decode_dcd, 'trr': _decode_trr, 'xtc': _decode_xtc}[self.fmt]
+        with open(self.path, 'rb') as f:
+            i = 0
+            while i < len(frames):
+                # consecutive frames are read at once
+                j = i + 1
+                while j < len(frames) and frames[j] == frames[j - 1] + 1: j += 1
+                begin = int(index.offsets[frames[i]])
+                f.seek(begin)
+                data = memoryview(f.read(int(index.offsets[frames[j - 1] + 1]) - begin))
+                for k in range(i, j):
+                    start = int(index.offsets[frames[k]]) - begin
+                    end = int(index.offsets[frames[k] + 1]) - begin
+                    decode(data[start:end], index, out[k])
+                i = j
+        return out
+
+    def read_window(self, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """
+        Read the frames `start` to `stop` (exclusive) as a valid file of the same format, see `FrameIndex.read_window`.
+        """
+        return self.index.read_window(self.path, start, stop)
+
+    def rebuild(self):
+        """
+        Index the frames and save the index again.
+        """
+        stat = os.stat(self.path)
+        self._index = index_frames(self.path, self.fmt)
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        try:
+            # write to a temporary file first, so that readers never see a partial index
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, offsets=self._index.offsets, header=np.frombuffer(self._index.header, dtype=np.uint8),
+                         natoms=self._index.natoms, endian=self._index.endian, size=stat.st_size, mtime=stat.st_mtime_ns)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _ensure_index(self):
+        stat = os.stat(self.path)
+        if self._stat == (stat.st_size, stat.st_mtime_ns):
+            return
+        if self._index is None and os.path.isfile(self.index_path):
+            try:
+                with np.load(self.index_path) as index:
+                    if (int(index['size']), int(index['mtime'])) == (stat.st_size, stat.st_mtime_ns):
+                        self._index = FrameIndex(self.fmt, int(index['natoms']), index['offsets'],
+                                                 index['header'].tobytes(), str(index['endian']))
+                        self._stat = (stat.st_size, stat.st_mtime_ns)
+                        return
+            except (OSError, ValueError, KeyError):
+                pass
+        self.rebuild()
+
+def reduce_trajectory(path: str, fmt: Optional[str] = None, start: int = 0, stop: Optional[int] = None, stride: int = 1,
+                      atoms: Optional[np.ndarray] = None, cache_dir: Optional[str] = None) -> str:
+    """
+    Write every `stride`-th frame between `start` and `stop` of a trajectory, with only the
+    given atoms, into a DCD file.
+
+    The frames are read once, in chunks, so the memory use does not depend on the length of
+    the trajectory. The reduced file is cached by the file, its size and modification time,
+    the frame range and the atoms, so the same reduction is only written once.
+
+    Parameters
+    ----------
+    `path` — str
+        Path to the DCD, TRR or XTC file.
+    `fmt` — str (optional)
+        Format of the file, inferred from the file name if not specified. (default: `None`)
+    `start` — int (optional)
+        The first frame. (default: `0`)
+    `stop` — int (optional)
+        The frame after the last one, until the end of the trajectory if not specified. (default: `None`)
+    `stride` — int (optional)
+        Keep every `stride`-th frame. (default: `1`)
+    `atoms` — numpy.ndarray (optional)
+        The indices of the atoms to keep, in the order of the file, or a boolean mask. (default: all atoms)
+    `cache_dir` — str (optional)
+        Where to write the reduced files. By default, a directory only the current user can access,
+        see `private_dir`. (default: `None`)
+
+    Returns
+    -------
+    `str`
+        The path to the reduced DCD file, in angstroms.
+
+    Raises
+    ------
+    `ValueError`
+        Raised if the stride is not positive or the atoms are out of range
+    """
+    if stride < 1: raise ValueError("The stride must be at least 1.")
+    trajectory = TrajectoryFile(path, fmt)
+    frames = range(*slice(start, stop, stride).indices(len(trajectory)))
+    if atoms is not None:
+        atoms = np.asarray(atoms)
+        if atoms.dtype == bool:
+            if atoms.shape != (trajectory.natoms,):
+                raise ValueError(f"The atom mask must have one value per atom ({trajectory.natoms}).")
+            atoms = np.flatnonzero(atoms)
+        atoms = atoms.astype(np.int64).reshape(-1)
+        if atoms.size and (atoms.min() < 0 or atoms.max() >= trajectory.natoms):
+            raise ValueError(f"Atom indices out of range, the trajectory has {trajectory.natoms} atoms.")
+    stat = os.stat(trajectory.path)
+    digest = hashlib.sha1(f"{os.path.realpath(trajectory.path)}:{stat.st_size}:{stat.st_mtime_ns}:{frames.start}:{frames.stop}:{frames.step}".encode())
+    if atoms is not None: digest.update(atoms.tobytes())
+    cache_dir = cache_dir or private_dir('reduced')
+    reduced_path = os.path.join(cache_dir, f"{digest.hexdigest()}.dcd")
+    if os.path.isfile(reduced_path): return reduced_path
+    os.makedirs(cache_dir, exist_ok=True)
+    natoms = trajectory.natoms if atoms is None else len(atoms)
+    # write to a temporary file first, so that readers never see a partial file
+    temp_path = f"{reduced_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_dcd_header(natoms, len(frames)))
+        marker = struct.pack('<i', 4 * natoms)
+        for begin in range(0, len(frames), _REDUCE_CHUNK):
+            coords = trajectory.read_frames(frames[begin:begin + _REDUCE_CHUNK])
+            if atoms is not None: coords = coords[:, atoms]
+            for frame in coords:
+                for axis in range(3):
+                    f.write(marker)
+                    f.write(np.ascontiguousarray(frame[:, axis], dtype='<f4').tobytes())
+                    f.write(marker)
+    os.replace(temp_path, reduced_path)
+    return reduced_path
+
+def _dcd_header(natoms, frames):
+    # a CHARMM style header without unit cells or fixed atoms
+    def record(data):
+        return struct.pack('<i', len(data)) + data + struct.pack('<i', len(data))
+    icntrl = [0] * 20
+    icntrl[0], icntrl[2], icntrl[19] = frames, 1, 24
+    first = b'CORD' + struct.pack('<9i', *icntrl[:9]) + struct.pack('<f', 1.0) + struct.pack('<10i', *icntrl[10:])
+    title = struct.pack('<i', 1) + b'Reduced by dash-molstar'.ljust(80)
+    return record(first) + record(title) + record(struct.pack('<i', natoms))
+
+def _decode_dcd(data, index, out):
+    natoms = index.natoms
+    words = np.frombuffer(data, dtype=f'{index.endian}f4')
+    # each axis is a record of its own, behind the unit cell record of CHARMM files
+    icntrl = struct.unpack_from(f'{index.endian}20i', index.header, 8)
+    first = (14 if icntrl[19] and icntrl[10] else 0) + 1
+    for axis in range(3):
+        begin = first + axis * (natoms + 2)
+        out[:, axis] = words[begin:begin + natoms]
+
+def _decode_trr(data, index, out):
+    sizes = struct.unpack_from('>13i', data, 24)
+    ir, e, box, vir, pres, top, sym, x, v, f_size, natoms, _, _ = sizes
+    if not x:
+        raise RuntimeError("The TRR frame has no coordinates.")
+    precision = x // (3 * natoms)
+    begin = 76 + 2 * precision + ir + e + box + vir + pres + top + sym
+    coords = np.frombuffer(data, dtype='>f4' if precision == 4 else '>f8', count=3 * natoms, offset=begin)
+    np.multiply(coords.reshape(natoms, 3), _NM, out=out, casting='unsafe')
+
+def _decode_xtc(data, index, out):
+    natoms, = struct.unpack_from('>i', data, 4)
+    if natoms <= 9:
+        coords = np.frombuffer(data, dtype='>f4', count=3 * natoms, offset=56)
+        np.multiply(coords.reshape(natoms, 3), _NM, out=out, casting='unsafe')
+        return
+    precision, = struct.unpack_from('>f', data, 56)
+    minint = struct.unpack_from('>3i', data, 60)
+    maxint = struct.unpack_from('>3i', data, 72)
+    smallidx, nbytes = struct.unpack_from('>2i', data, 84)
+    coords = _xtc_decompress(bytes(data[92:92 + nbytes]), natoms, minint, maxint, smallidx)
+    np.multiply(coords, _NM / precision, out=out, casting='unsafe')
+
+# sizes of the small integers of the XTC compression, indexed by their number of bits times three
+_XTC_MAGICINTS = (
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 10, 12, 16, 20, 25, 32, 40, 50, 64,
+    80, 101, 128, 161, 203, 256, 322, 406, 512, 645, 812, 1024, 1290,
+    1625, 2048, 2580, 3250, 4096, 5060, 6501, 8192, 10321, 13003,
+    16384, 20642, 26007, 32768, 41285, 52015, 65536, 82570, 104031,
+    131072, 165140, 208063, 262144, 330280, 416127, 524287, 660561,
+    832255, 1048576, 1321122, 1664510, 2097152, 2642245, 3329021,
+    4194304, 5284491, 6658042, 8388607, 10568983, 13316085, 16777216,
+)
+_XTC_FIRSTIDX = 9
+
+def _xtc_decompress(buf, natoms, minint, maxint, smallidx):
+    """
+    Decompress the integer coordinates of an XTC frame, following `xdrfile_decompress_coord_float`
+    of the GROMACS xdrfile library.
+    """
+    bitpos = 0
+
+    def receivebits(nbits):
+        # the bits are read from the most significant bit of each byte onwards
+        nonlocal bitpos
+        first = bitpos >> 3
+        last = (bitpos + nbits + 7) >> 3
+        value = int.from_bytes(buf[first:last], 'big')
+        value >>= (last << 3) - bitpos - nbits
+        bitpos += nbits
+        return value & ((1 << nbits) - 1)
+
+    def receiveints(nbits, sizes):
+        # three integers packed as a single number, written in bytes from the least significant one
+        full, rest = divmod(nbits, 8)
+        value = receivebits(8 * full) if full else 0
+        value = int.from_bytes(value.to_bytes(full, 'big'), 'little')
+        if rest: value |= receivebits(rest) << (8 * full)
+        value, z = divmod(value, sizes[2])
+        x, y = divmod(value, sizes[1])
+        return [x, y, z]
+
+    coords = np.empty((natoms, 3), dtype=np.int64)
+    sizeint = [maxint[k] - minint[k] + 1 for k in range(3)]
+    large = (sizeint[0] | sizeint[1] | sizeint[2]) > 0xffffff
+    if large:
+        bitsizeint = [size.bit_length() if size > 0 else 0 for size in sizeint]
+    else:
+        bitsize = (sizeint[0] * sizeint[1] * sizeint[2]).bit_length()
+    magicints = _XTC_MAGICINTS
+    smaller = magicints[max(_XTC_FIRSTIDX, smallidx - 1)] // 2
+    smallnum = magicints[smallidx] // 2
+    sizesmall = [magicints[smallidx]] * 3
+    i = 0
+    run = 0
+    while i < natoms:
+        if large:
+            this = [receivebits(bitsizeint[0]), receivebits(bitsizeint[1]), receivebits(bitsizeint[2])]
+        else:
+            this = receiveints(bitsize, sizeint)
+        this = [this[0] + minint[0], this[1] + minint[1], this[2] + minint[2]]
+        prev = this
+        is_smaller = 0
+        if receivebits(1):
+            run = receivebits(5)
+            is_smaller = run % 3
+            run -= is_smaller
+            is_smaller -= 1
+        if run > 0:
+            for k in range(0, run, 3):
+                small = receiveints(smallidx, sizesmall)
+                this = [small[0] + prev[0] - smallnum, small[1] + prev[1] - smallnum, small[2] + prev[2] - smallnum]
+                if k == 0:
+                    # the first two atoms of a run are swapped, for a better compression of water
+                    coords[i] = this
+                    this, prev = prev, this
+                    i += 1
+                else:
+                    prev = this
+                coords[i] = this
+                i += 1
+        else:
+            coords[i] = this
+            i += 1
+        smallidx += is_smaller
+        if is_smaller < 0:
+            smallnum = smaller
+            smaller = magicints[smallidx - 1] // 2 if smallidx > _XTC_FIRSTIDX else 0
+        elif is_smaller > 0:
+            smaller = smallnum
+            smallnum = magicints[smallidx] // 2
+        sizesmall = [magicints[smallidx]] * 3
+    return coords
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from .fileio import private_dir
+from .trajectory import FrameIndex, TrajectoryFile
+
+_key_pattern = re.compile(r'[0-9a-f]{40}')
+
+class TrajectoryServer(object):
+    """
+    Serves windows of frames of large trajectory files over HTTP from the Dash/Flask server.
+
+    Registered files stay on disk. Their frame index is built once from the frame headers
+    and saved next to the file (see `TrajectoryFile`). Every request for
+    `<prefix>_molstar/trajectories/<key>?start=<i>&stop=<j>` reads the frames `i` to `j`
+    with a single seek and returns them as a file of the original format. The time to the
+    first frame therefore does not depend on the length of the trajectory.
+
+    The key of a file is derived from its path, size and modification time, so a file that
+    changes on disk gets a new key and the responses can be cached by the browser.
+
+    Every registration is also written to a manifest in `directory`, so any worker of a
+    multi-process server (e.g. gunicorn or uwsgi) can serve a file registered by another one.
+    Workers on different machines need a shared `directory` and the same paths to the files.
+
+    Parameters
+    ----------
+    `directory` — str (optional)
+        The directory of the manifest. By default, a directory only the current user can access,
+        named after the app the server is mounted on, see `private_dir`. (default: `None`)
+    """
+    route = '_molstar/trajectories/'
+
+    def __init__(self, directory: Optional[str] = None):
+        self._files: Dict[str, TrajectoryFile] = {}
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._requests_prefix = '/'
+        self._mounted = False
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, key: str):
+        return key in self._files
+
+    @property
+    def mounted(self) -> bool:
+        return self._mounted
+
+    @property
+    def directory(self) -> str:
+        # resolved when the server is mounted, unless the server is used before that
+        if self._directory is None:
+            self._directory = private_dir('default', 'trajectories')
+        return self._directory
+
+    def init_app(self, app):
+        """
+        Mount the trajectory route on a Dash app or a Flask server.
+
+        Parameters
+        ----------
+        `app` — dash.Dash | flask.Flask
+            The app to serve the trajectories from. Path prefixes of Dash apps are respected.
+        """
+        server = getattr(app, 'server', app)
+        routes_prefix = '/'
+        config = getattr(app, 'config', None)
+        if server is not app and config is not None:
+            routes_prefix = config.get('routes_pathname_prefix') or '/'
+            self._requests_prefix = config.get('requests_pathname_prefix') or '/'
+        if self._directory is None:
+            self._directory = private_dir(server.name, 'trajectories')
+        server.add_url_rule(
+            f"{routes_prefix}{self.route}<key>",
+            endpoint=f"dash_molstar_trajectories_{id(self)}",
+            view_func=self._serve
+        )
+        self._mounted = True
+        return self
+
+    def register(self, path: str, fmt: Optional[str] = None) -> str:
+        """
+        Register a coordinate file and return its key. The frame index is loaded or built on the
+        first registration of the file, registering it again is a cheap no-op.
+        """
+        path = os.path.realpath(path)
+        key = self._key(path)
+        with self._lock:
+            if key not in self._files:
+                self._files[key] = TrajectoryFile(path, fmt)
+                self._write_manifest(key, path, fmt)
+        return key
+
+    def index(self, key: str) -> Optional[FrameIndex]:
+        trajectory = self._lookup(key)
+        return None if trajectory is None else trajectory.index
+
+    def read(self, key: str, start: int = 0, stop: Optional[int] = None) -> Optional[bytes]:
+        """Read the frames `start` to `stop` (exclusive) of a registered file."""
+        trajectory = self._lookup(key)
+        return None if trajectory is None else trajectory.read_window(start, stop)
+
+    def url_for(self, key: str) -> str:
+        return f"{self._requests_prefix}{self.route}{key}"
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            removed = self._files.pop(key, None) is not None
+        if _key_pattern.fullmatch(key):
+            try:
+                os.remove(os.path.join(self.directory, key))
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+        if not os.path.isdir(self.directory): return
+        for name in os.listdir(self.directory):
+            if _key_pattern.fullmatch(name):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _key(path: str) -> str:
+        stat = os.stat(path)
+        return hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+    def _write_manifest(self, key: str, path: str, fmt: Optional[str]):
+        # the format and the path of the file, renamed into place so other processes never read a partial entry
+        manifest = os.path.join(self.directory, key)
+        if os.path.isfile(manifest): return
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(f"{fmt or ''}\n{path}")
+            os.replace(temp_path, manifest)
+        except BaseException:
+            if os.path.exists(temp_path): os.remove(temp_path)
+            raise
+
+    def _read_manifest(self, key: str) -> Optional[Tuple[Optional[str], str]]:
+        try:
+            with open(os.path.join(self.directory, key), encoding='utf-8') as f:
+                fmt, path = f.read().split('\n', 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        return fmt or None, path
+
+    def _lookup(self, key: str) -> Optional[TrajectoryFile]:
+        # the files registered in this process, or in any process sharing the manifest
+        trajectory = self._files.get(key)
+        if trajectory is not None or not _key_pattern.fullmatch(key): return trajectory
+        entry = self._read_manifest(key)
+        if entry is None: return None
+        fmt, path = entry
+        # a file that changed on disk has a new key, its old entry is dropped
+        try:
+            current = self._key(path)
+        except FileNotFoundError:
+            current = None
+        if current != key:
+            self.remove(key)
+            return None
+        self.register(path, fmt)
+        return self._files.get(key)
+
+    def _serve(self, key):
+        from flask import Response, abort, request
+        if self._lookup(key) is None:
+            abort(404)
+        start = request.args.get('start', 0, type=int)
+        stop = request.args.get('stop', None, type=int)
+        if start < 0 or (stop is not None and stop < start):
+            abort(400)
+        response = Response(self.read(key, start, stop), mimetype='application/octet-stream')
+        response.set_etag(f"{key}-{start}-{stop}")
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+
+# the server used by `get_trajectory(..., stream=True)`
+trajectory_server = TrajectoryServer()
@@ -13,7 +13,7 @@ setup(
     version=package["version"],
     author=package['author'],
     packages=[package_name],
-    package_data={package_name: ['helpers/*', 'utils/*', 'rcsb-molstar.js']},
+    package_data={package_name: ['helpers/*', 'utils/*', 'structure/*', 'rcsb-molstar.js']},
     include_package_data=True,
     license=package['license'],
     description=package.get('description', package_name),
@@ -19,21 +19,47 @@ with mouse keys, or scrolling.
 - `data` (Bool | Real | String | Dict | Array; optional): Data containing the structure info that should be loaded into molstar viewer, as well as some control flags.
 The data can be generated with python method `parse_molecule`.
 - `focus` (Dict; optional): The structure region to let the camera focus on in the molstar viewer.
-- `frame` (Real; optional): The trajectory frame in the molstar viewer.
+- `fps` (Real; optional): The frames per second of the playback. Default is 30.
+- `frame` (Real; optional): The trajectory frame in the molstar viewer. The frames of a streamed trajectory are
+counted from the start of the file.
+- `framethrottle` (Real; optional): Minimum time in milliseconds between two updates of `frame` sent to dash while playing.
+Set to 0 to send every frame. Default is 250ms.
 - `hover` (Dict; optional): The structure region to be hovered in the molstar viewer.
 - `layout` (Dict; optional): The layout of the molstar viewer. Determining what controls to be displayed. 
 
 The layout is not allowed to be changed once the component has been initialized.
+- `loadconcurrency` (Real; optional): The maximum number of `data` entries downloaded and decompressed at the same time.
+The entries are still added to the viewer one by one, in their order. Default is 4.
+- `loadtimings` (Dict; optional): Timings of the last update of `data` in milliseconds, set by the viewer: the `total`
+time, and for every loaded entry the time to `fetch` and decompress it and the time
+to `commit` it to the viewer.
+- `loop` (Bool; optional): Whether the playback starts over at the end of the range. Default is true.
 - `measurement` (Bool | Real | String | Dict | Array; optional): The measurements in the molstar viewer.
+- `playbackrange` (Array of Reals; optional): The frames to play as `[start, stop]`, the stop frame is not included.
+Default is the whole trajectory.
+- `playing` (Bool; optional): Whether the trajectory is playing. The viewer advances `frame` by itself at `fps`
+frames per second, without any callback, and sets `playing` to false when it stops
+at the end of a range that does not `loop`.
+- `prefetchframes` (Real; optional): Number of frames of a streamed trajectory downloaded ahead of the playhead.
+The downloaded windows are kept in a cache of about the same size. Default is 100.
 - `screenshot` (Dict; optional): The screenshot object containing the options for taking 
 screenshot of the current view in molstar viewer.
 - `selection` (Dict; optional): The structure region to be selected in the molstar viewer.
+- `selectioncoordinates` (Bool; optional): Whether to include the atom coordinates in the `selection` and `focus` sent back to Dash.
+Default is true.
+- `selectiongranularity` (a value equal to: 'chain', 'residue', 'atom'; optional): The level of detail of the `selection` and `focus` sent back to Dash: 'chain' lists the
+chains only, 'residue' the residues without their atoms, and 'atom' every atom.
+Default is 'atom'.
+- `selectionmaxatoms` (Real; optional): The maximum number of atoms listed in the `selection` and `focus` sent back to Dash.
+Larger selections are sent with 'residue' granularity. Unlimited by default.
+- `shapeclick` (Dict; optional): The last clicked instance of a batch of spheres or cylinders, set by the viewer:
+the `label` of the batch and the index of the `instance`.
 - `style` (Dict; optional): The HTML property `style` to control the appearence of the container of molstar viewer.
 - `updatefocusonframechange` (Bool; optional): Update focus data when frame index have changed.
 - `updateselectiononframechange` (Bool; optional): Update selection data when frame index have changed.
 """
 function molstarviewer(; kwargs...)
-        available_props = Symbol[:id, :camera, :cameradebounce, :cameraresponddrag, :className, :data, :focus, :frame, :hover, :layout, :measurement, :screenshot, :selection, :style, :updatefocusonframechange, :updateselectiononframechange]
+        available_props = Symbol[:id, :camera, :cameradebounce, :cameraresponddrag, :className, :data, :focus, :fps, :frame, :framethrottle, :hover, :layout, :loadconcurrency, :loadtimings, :loop, :measurement, :playbackrange, :playing, :prefetchframes, :screenshot, :selection, :selectioncoordinates, :selectiongranularity, :selectionmaxatoms, :shapeclick, :style, :updatefocusonframechange, :updateselectiononframechange]
         wild_props = Symbol[]
         return Component("molstarviewer", "MolstarViewer", "dash_molstar", available_props, wild_props; kwargs...)
 end
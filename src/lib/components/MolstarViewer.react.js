@@ -2,7 +2,158 @@ import React, {Component, createRef} from 'react';
 import PropTypes from 'prop-types';
 import {ColorNames} from 'molstar/lib/mol-util/color/names';
 import { Camera } from 'molstar/lib/mol-canvas3d/camera';
-import { Mat4 } from 'molstar/lib/mol-math/linear-algebra';
+import { Mat4, Vec3 } from 'molstar/lib/mol-math/linear-algebra';
+import { PluginCommands } from 'molstar/lib/mol-plugin/commands';
+import { Color } from 'molstar/lib/mol-util/color';
+import { ParamDefinition as PD } from 'molstar/lib/mol-util/param-definition';
+import { OrderedSet } from 'molstar/lib/mol-data/int';
+import { Shape } from 'molstar/lib/mol-model/shape';
+import { Mesh } from 'molstar/lib/mol-geo/geometry/mesh/mesh';
+import { MeshBuilder } from 'molstar/lib/mol-geo/geometry/mesh/mesh-builder';
+import { addSphere } from 'molstar/lib/mol-geo/geometry/mesh/builder/sphere';
+import { addCylinder } from 'molstar/lib/mol-geo/geometry/mesh/builder/cylinder';
+import { PluginStateObject } from 'molstar/lib/mol-plugin-state/objects';
+import { PluginStateTransform } from 'molstar/lib/mol-plugin-state/transforms/helpers';
+import { StateTransforms } from 'molstar/lib/mol-plugin-state/transforms';
+import { StateSelection } from 'molstar/lib/mol-state';
+import { Asset } from 'molstar/lib/mol-util/assets';
+
+/**
+ * The transform matrix of every instance of a batch shape. The unit sphere is scaled by the
+ * radius, the unit cylinder along z is scaled by the radius and the length and rotated onto
+ * the segment.
+ */
+function batchTransforms(data) {
+    const transforms = [];
+    const count = data.count;
+    const radius = (i) => typeof data.radii === 'number' ? data.radii : data.radii[i];
+    const zAxis = Vec3.create(0, 0, 1);
+    for (let i = 0; i < count; i++) {
+        const r = radius(i);
+        if (data.shape === 'sphere_batch') {
+            const center = Vec3.create(data.centers[3*i], data.centers[3*i+1], data.centers[3*i+2]);
+            const m = Mat4.fromTranslation(Mat4(), center);
+            transforms.push(Mat4.mul(m, m, Mat4.fromScaling(Mat4(), Vec3.create(r, r, r))));
+            continue;
+        }
+        const start = Vec3.create(data.starts[3*i], data.starts[3*i+1], data.starts[3*i+2]);
+        const dir = Vec3.sub(Vec3(), Vec3.create(data.ends[3*i], data.ends[3*i+1], data.ends[3*i+2]), start);
+        const length = Vec3.magnitude(dir);
+        const rotation = Mat4.identity();
+        if (length > 0) {
+            Vec3.scale(dir, dir, 1 / length);
+            const axis = Vec3.cross(Vec3(), zAxis, dir);
+            if (Vec3.magnitude(axis) > 1e-6) {
+                Mat4.fromRotation(rotation, Math.acos(Math.min(1, Math.max(-1, Vec3.dot(zAxis, dir)))), axis);
+            } else if (dir[2] < 0) {
+                Mat4.fromRotation(rotation, Math.PI, Vec3.create(1, 0, 0));
+            }
+        }
+        const m = Mat4.fromTranslation(Mat4(), start);
+        Mat4.mul(m, m, rotation);
+        transforms.push(Mat4.mul(m, m, Mat4.fromScaling(Mat4(), Vec3.create(r, r, length))));
+    }
+    return transforms;
+}
+
+/**
+ * Build a batch of spheres or cylinders as a single mesh drawn once per instance.
+ * Colors and labels are resolved per instance so picking reports the instance index.
+ */
+function createBatchShape(data) {
+    const builder = MeshBuilder.createState(512, 256);
+    builder.currentGroup = 0;
+    if (data.shape === 'sphere_batch') {
+        addSphere(builder, Vec3.create(0, 0, 0), 1, data.detail ?? 2);
+    } else {
+        addCylinder(builder, Vec3.create(0, 0, 0), Vec3.create(0, 0, 1), 1, {
+            radiusTop: 1, radiusBottom: 1, radialSegments: data.radialSegments ?? 16, topCap: true, bottomCap: true,
+        });
+    }
+    const mesh = MeshBuilder.getMesh(builder);
+    const toColor = (c) => typeof c === 'number' ? Color(c) : (ColorNames[c] ?? ColorNames.grey);
+    const colors = typeof data.colors === 'object' ? Array.from(data.colors, toColor) : null;
+    const color = colors ? (_, instance) => colors[instance] : () => toColor(data.colors);
+    return Shape.create(data.label, data, mesh, color, () => 1,
+        (_, instance) => `${data.label} #${instance}`, batchTransforms(data));
+}
+
+const BatchShapeProvider = PluginStateTransform.BuiltIn({
+    name: 'dash-molstar-batch-shape',
+    display: {name: 'Batch Shape'},
+    from: PluginStateObject.Root,
+    to: PluginStateObject.Shape.Provider,
+    params: {
+        data: PD.Value(undefined, {isHidden: true}),
+    },
+})({
+    apply({params}) {
+        return new PluginStateObject.Shape.Provider({
+            label: params.data.label,
+            data: params.data,
+            params: Mesh.Params,
+            geometryUtils: Mesh.Utils,
+            getShape: (_, data) => createBatchShape(data),
+        }, {label: params.data.label});
+    },
+});
+
+/**
+ * Decode the frames written by `dash_molstar.utils.codec.encode_quantized` into a DCD file, which
+ * Mol* reads as a trajectory. The first frame is stored as 32-bit integers and the other frames
+ * as 16 or 32-bit differences to it, all in units of the precision and with the x, y and z
+ * values of a frame stored one after the other.
+ */
+function quantizedToDcd(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const magic = String.fromCharCode(...bytes.subarray(0, 4));
+    if (magic !== 'DMQC' || view.getUint16(4, true) !== 1) throw new Error('The data is not a quantized trajectory.');
+    const width = view.getUint16(6, true);
+    const natoms = view.getUint32(8, true);
+    const frames = view.getUint32(12, true);
+    const precision = view.getFloat32(16, true);
+    const values = 3 * natoms;
+    // copy the payload so the typed arrays are aligned whatever the offset of the bytes
+    const payload = bytes.slice(20);
+    const reference = new Int32Array(payload.buffer, 0, frames ? values : 0);
+    const deltas = frames > 1
+        ? new (width === 2 ? Int16Array : Int32Array)(payload.buffer, 4 * values, (frames - 1) * values)
+        : new Int32Array(0);
+    // CHARMM style header without unit cells: title, atom count, then one record per axis and frame
+    const headerSize = 92 + 92 + 12;
+    const frameSize = 3 * (8 + 4 * natoms);
+    const out = new DataView(new ArrayBuffer(headerSize + frames * frameSize));
+    out.setInt32(0, 84, true);
+    'CORD'.split('').forEach((c, i) => out.setUint8(4 + i, c.charCodeAt(0)));
+    out.setInt32(8, frames, true);
+    out.setInt32(16, 1, true);
+    out.setFloat32(44, 1.0, true);
+    out.setInt32(84, 24, true);
+    out.setInt32(88, 84, true);
+    out.setInt32(92, 84, true);
+    out.setInt32(96, 1, true);
+    'Decoded by dash-molstar'.padEnd(80).split('').forEach((c, i) => out.setUint8(100 + i, c.charCodeAt(0)));
+    out.setInt32(180, 84, true);
+    out.setInt32(184, 4, true);
+    out.setInt32(188, natoms, true);
+    out.setInt32(192, 4, true);
+    const coords = new Float32Array(out.buffer);
+    for (let frame = 0; frame < frames; frame++) {
+        for (let axis = 0; axis < 3; axis++) {
+            const offset = headerSize + frame * frameSize + axis * (8 + 4 * natoms);
+            out.setInt32(offset, 4 * natoms, true);
+            out.setInt32(offset + 4 + 4 * natoms, 4 * natoms, true);
+            const first = (offset + 4) / 4;
+            const base = axis * natoms;
+            const delta = (frame - 1) * values + base;
+            for (let i = 0; i < natoms; i++) {
+                const value = frame ? reference[base + i] + deltas[delta + i] : reference[base + i];
+                coords[first + i] = value * precision;
+            }
+        }
+    }
+    return out.buffer;
+}
 
 /**
  * The Molstar viewer component for dash
@@ -58,9 +209,30 @@ export default class MolstarViewer extends Component {
             screenshot: props.screenshot,
             updatefocusonframechange: props.updatefocusonframechange,
             updateselectiononframechange: props.updateselectiononframechange,
+            loadtimings: null,
+            shapeclick: null,
         };
         this.loadedShapes = {};
         this.loadedStructures = {};
+        // entries of `data` that are in the viewer, see `handleDataChange`
+        this.loadedEntries = new Map();
+        // updates of `data` are applied one after the other, see `handleDataChange`
+        this.dataQueue = Promise.resolve();
+        this.dataGeneration = 0;
+        this.structureCount = 0;
+        // the streamed trajectory whose frames follow `frame`, see `setStreamFrame`
+        this.activeStream = null;
+        this.streamQueue = Promise.resolve();
+        // trajectory playback driven by requestAnimationFrame, see `startPlayback`
+        this.playbackHandle = null;
+        this.playbackClock = null;
+        this.playbackBusy = false;
+        this.playhead = null;
+        // `frame` is reported to dash at most once per `framethrottle` while playing
+        this.frameReportTimer = null;
+        this.lastFrameReport = 0;
+        this.pendingFrame = undefined;
+        this.reportedFrame = undefined;
         this.prevCameraSnapshot = null;
         this.cameraDebounceTimer = null;
         this.isInternalCameraUpdate = false;
@@ -91,52 +263,160 @@ export default class MolstarViewer extends Component {
                vec3Equal(a.up, b.up) &&
                vec3Equal(a.target, b.target);
     }
-    async handleDataChange(data) {
-        // if new molecule was loaded into the viewer, clear the stage before loading
-        if (Array.isArray(data)) {
-            for (let d of data) {
-                if (d.type === 'mol' || d.type === 'url') {
-                    this.viewer.clear();
-                    this.loadedShapes = {};
-                    this.loadedStructures = {};
-                    break;
-                }
-            }
-        } else if (typeof data === "object" && (data.type === "mol" || data.type === "url")) {
+    handleDataChange(data) {
+        // every update is compared to the entries the previous one left in the viewer, so the updates
+        // are chained. Only the latest of the updates that arrive while one is running is applied
+        const generation = ++this.dataGeneration;
+        this.dataQueue = this.dataQueue.then(() => {
+            if (generation === this.dataGeneration && this.viewer) return this.applyDataChange(data);
+        }).catch((error) => console.error('Failed to update the data', error));
+        return this.dataQueue;
+    }
+    async applyDataChange(data) {
+        const entries = Array.isArray(data) ? data : (data && typeof data === "object" ? [data] : []);
+        // entries are matched by their id, shapes by their label, the others by their position
+        const next = new Map();
+        entries.forEach((entry, position) => {
+            let key = this.entryKey(entry, position);
+            while (next.has(key)) key += '+';
+            next.set(key, entry);
+        });
+        // as before, data with a structure replaces everything, otherwise the entries are added to the scene
+        const replace = entries.some((entry) => entry.type === 'mol' || entry.type === 'url');
+        const changed = [...next].filter(([key, entry]) => !this.loadedEntries.has(key) || !this.isSameEntry(this.loadedEntries.get(key).entry, entry));
+        if (changed.some(([key, entry]) => entry.type === 'url' && entry.urlfor === 'snapshot')) {
+            // a snapshot replaces the whole state of the plugin
             this.viewer.clear();
+            this.loadedEntries.clear();
             this.loadedShapes = {};
             this.loadedStructures = {};
-        }
-
-        // loading data
-        if (data) {
-            const molecules = [];
-            const shapes = [];
-
-            if (Array.isArray(data)) {
-                for (const obj of data) {
-                    if (obj.type === 'shape') {
-                        shapes.push(obj);
-                    } else {
-                        molecules.push(obj);
-                    }
-                }
-            } else if (typeof data === "object") {
-                if (data.type === 'shape') {
-                    shapes.push(data);
-                } else {
-                    molecules.push(data);
+            this.activeStream = null;
+            changed.splice(0, changed.length, ...next);
+        } else {
+            for (const [key, loaded] of [...this.loadedEntries]) {
+                const entry = next.get(key);
+                if (entry ? !this.isSameEntry(loaded.entry, entry) : replace) {
+                    await this.removeEntry(loaded);
+                    this.loadedEntries.delete(key);
                 }
             }
+        }
 
-            for (const mol of molecules) {
-                await this.loadData(mol);
+        // loading data, the molecules before the shapes. Files are downloaded and decompressed
+        // concurrently, but committed to the state tree one by one in their order in `data`
+        const started = performance.now();
+        const molecules = changed.filter(([key, entry]) => entry.type !== 'shape');
+        const shapes = changed.filter(([key, entry]) => entry.type === 'shape');
+        const concurrency = Math.max(1, this.props.loadconcurrency ?? 4);
+        const prefetched = this.runConcurrently(molecules, concurrency, async ([key, entry]) => {
+            const start = performance.now();
+            const prepared = await this.prefetchData(entry);
+            return {prepared: prepared, fetch: performance.now() - start};
+        });
+        const timings = [];
+        for (const [[key, entry], pending] of molecules.map((item, i) => [item, prefetched[i]])) {
+            const timing = {key: key, type: entry.type};
+            try {
+                const {prepared, fetch} = await pending;
+                timing.fetch = fetch;
+                const start = performance.now();
+                this.loadedEntries.set(key, await this.loadEntry(entry, prepared));
+                timing.commit = performance.now() - start;
+            } catch (error) {
+                // the other entries are still loaded
+                console.error(`Failed to load data entry ${key}`, error);
+                timing.error = String(error);
+            }
+            timings.push(timing);
+        }
+        for (const [key, entry] of shapes) {
+            const start = performance.now();
+            this.loadedEntries.set(key, await this.loadEntry(entry));
+            timings.push({key: key, type: entry.type, fetch: 0, commit: performance.now() - start});
+        }
+        const loadtimings = {total: performance.now() - started, concurrency: concurrency, entries: timings};
+        this.setState({data: data, loadtimings: loadtimings});
+        if (this.props.setProps) {
+            this.props.setProps({loadtimings: loadtimings});
+        }
+    }
+    runConcurrently(items, limit, task) {
+        // run the task for every item with at most `limit` of them at once, the promises are in the order of the items
+        const queue = [];
+        let running = 0;
+        const next = () => {
+            while (running < limit && queue.length) {
+                running++;
+                queue.shift()();
             }
-            for (const shape of shapes) {
-                await this.loadShape(shape);
+        };
+        return items.map((item) => new Promise((resolve, reject) => {
+            queue.push(() => task(item).then(resolve, reject).finally(() => {
+                running--;
+                next();
+            }));
+            next();
+        }));
+    }
+    async prefetchData(data) {
+        // download and decompress the files of an entry, so that committing it does not wait for the network
+        data = await this.inflateData(data);
+        if (data.type === 'url' && data.urlfor === 'mol') {
+            const response = await fetch(data.data);
+            if (!response.ok) throw new Error(`Failed to fetch ${data.data}: ${response.status} ${response.statusText}`);
+            const content = data.isBinary ? new Uint8Array(await response.arrayBuffer()) : await response.text();
+            return {...data, type: 'mol', urlfor: undefined, data: content};
+        }
+        if (data.type === 'url' && data.urlfor === 'coords' && !data.data.startsWith('blob:')) {
+            const response = await fetch(data.data);
+            if (!response.ok) throw new Error(`Failed to fetch ${data.data}: ${response.status} ${response.statusText}`);
+            return {...data, data: URL.createObjectURL(await response.blob())};
+        }
+        if (data.type === 'traj') {
+            const [topo, coords] = await Promise.all([this.prefetchData(data.topo), this.prefetchData(data.coords)]);
+            return {...data, topo: topo, coords: coords};
+        }
+        return data;
+    }
+    entryKey(entry, position) {
+        if (entry.id !== undefined && entry.id !== null) return `id:${entry.id}`;
+        if (entry.type === 'shape' && entry.label) return `shape:${entry.label}`;
+        return `position:${position}`;
+    }
+    isSameEntry(a, b) {
+        // the python helpers hash the content of the entries, the others are compared as a whole
+        if (a.hash && b.hash) return a.hash === b.hash;
+        return JSON.stringify(a) === JSON.stringify(b);
+    }
+    rootRefs() {
+        const state = this.viewer._plugin.state.data;
+        return new Set(state.tree.children.get(state.tree.root.ref).toArray());
+    }
+    async loadEntry(entry, prepared) {
+        if (entry.type === 'shape') {
+            await this.loadShape(this.decodeArrays(entry));
+            return {entry: entry, label: entry.label};
+        }
+        // the nodes added under the root of the state tree belong to this entry
+        const before = this.rootRefs();
+        const modelIndex = await this.loadData(this.decodeArrays(prepared ?? entry));
+        const refs = [...this.rootRefs()].filter((ref) => !before.has(ref));
+        return {entry: entry, refs: refs, modelIndex: modelIndex};
+    }
+    async removeEntry(loaded) {
+        if (loaded.label !== undefined) {
+            if (this.loadedShapes[loaded.label]) {
+                this.viewer.removeRef(this.loadedShapes[loaded.label]);
+                delete this.loadedShapes[loaded.label];
             }
+            return;
         }
-        this.setState({data: data});
+        const plugin = this.viewer._plugin;
+        for (const ref of loaded.refs) {
+            await PluginCommands.State.RemoveObject(plugin, {state: plugin.state.data, ref: ref, removeParentGhosts: true});
+        }
+        if (loaded.modelIndex !== undefined) delete this.loadedStructures[loaded.modelIndex];
+        if (this.activeStream && this.activeStream.modelIndex === loaded.modelIndex) this.activeStream = null;
     }
     async handleComponentChange(component) {
         if (component) {
@@ -197,11 +477,184 @@ export default class MolstarViewer extends Component {
     handleFrameChange(frame_index) {
         if (Object.keys(this.loadedStructures).length != 0) {
             if (typeof frame_index === 'number') {
-                this.viewer.setFrame(frame_index);
+                // playback continues from the frame set by dash
+                this.playhead = frame_index;
+                if (this.activeStream) {
+                    // only the latest of the frames requested while a window is downloading is shown
+                    const stream = this.activeStream;
+                    stream.requested = frame_index;
+                    this.streamQueue = this.streamQueue.then(() => {
+                        if (stream.requested === frame_index) return this.setStreamFrame(stream, frame_index);
+                    }).catch((error) => console.error('Failed to load the trajectory frames', error));
+                } else {
+                    this.viewer.setFrame(frame_index);
+                }
             }
             this.setState({frame: frame_index});
         }
     }
+    streamWindowUrl(stream, start) {
+        const stop = Math.min(start + stream.window, stream.frames);
+        return `${stream.data}${stream.data.includes('?') ? '&' : '?'}start=${start}&stop=${stop}`;
+    }
+    async setStreamFrame(stream, frame) {
+        frame = Math.max(0, Math.min(frame, stream.frames - 1));
+        const start = Math.floor(frame / stream.window) * stream.window;
+        if (start !== stream.start) {
+            // download the window of the frame into the loaded trajectory, the representations are kept
+            const plugin = this.viewer._plugin;
+            const cell = plugin.state.data.select(StateSelection.Generators.ofTransformer(StateTransforms.Data.Download))
+                .find((c) => (c.transform.params.url.url ?? c.transform.params.url) === stream.url);
+            if (!cell) return;
+            const url = URL.createObjectURL(await this.fetchStreamWindow(stream, start));
+            const params = cell.transform.params;
+            stream.loading = true;
+            try {
+                await plugin.build().to(cell.transform.ref)
+                    .update({...params, url: typeof params.url === 'string' ? url : Asset.Url(url)}).commit();
+                stream.start = start;
+                stream.url = url;
+            } finally {
+                stream.loading = false;
+                URL.revokeObjectURL(url);
+            }
+        }
+        await this.viewer.setFrame(frame - stream.start);
+    }
+    fetchStreamWindow(stream, start) {
+        // the downloaded windows are kept in a small LRU cache, so the windows prefetched
+        // during playback are loaded without waiting for the network
+        let blob = stream.cache.get(start);
+        if (blob) {
+            stream.cache.delete(start);
+        } else {
+            blob = fetch(this.streamWindowUrl(stream, start)).then((response) => {
+                if (!response.ok) throw new Error(`Failed to download the frames from ${start} (${response.status})`);
+                return response.blob();
+            });
+            // a failed download is not kept, it is tried again the next time the window is needed
+            blob.catch(() => {
+                if (stream.cache.get(start) === blob) stream.cache.delete(start);
+            });
+        }
+        stream.cache.set(start, blob);
+        const size = Math.ceil((this.props.prefetchframes ?? 100) / stream.window) + 2;
+        while (stream.cache.size > size) stream.cache.delete(stream.cache.keys().next().value);
+        return blob;
+    }
+    prefetchStream(stream, frame) {
+        // download the windows of the next `prefetchframes` frames of the playback range
+        const [first, stop] = this.playbackRange(stream.frames);
+        const loop = this.props.loop ?? true;
+        let remaining = this.props.prefetchframes ?? 100;
+        let next = frame + 1;
+        for (let windows = 0; remaining > 0 && windows * stream.window < stream.frames; windows++) {
+            if (next >= stop) {
+                if (!loop) break;
+                next = first;
+            }
+            const start = Math.floor(next / stream.window) * stream.window;
+            if (start !== stream.start) this.fetchStreamWindow(stream, start).catch(() => {});
+            const end = Math.min(start + stream.window, stop);
+            remaining -= end - next;
+            next = end;
+        }
+    }
+    trajectoryFrameCount() {
+        if (this.activeStream) return this.activeStream.frames;
+        const cells = this.viewer._plugin.state.data.select(StateSelection.Generators.ofType(PluginStateObject.Molecule.Trajectory));
+        return cells.reduce((count, cell) => Math.max(count, cell.obj ? cell.obj.data.frameCount : 0), 0);
+    }
+    playbackRange(frames) {
+        // `playbackrange` is [start, stop] with the stop frame excluded, like `get_trajectory`
+        const range = this.props.playbackrange ?? [];
+        const start = Math.max(0, Math.min(range[0] ?? 0, frames - 1));
+        const stop = Math.max(start + 1, Math.min(range[1] ?? frames, frames));
+        return [start, stop];
+    }
+    startPlayback() {
+        if (this.playbackHandle !== null) return;
+        // start over if the last playback stopped at the end of the range
+        if (this.viewer && typeof this.playhead === 'number' && this.playhead >= this.playbackRange(this.trajectoryFrameCount())[1] - 1) {
+            this.playhead = null;
+        }
+        this.playbackClock = null;
+        const tick = (time) => {
+            this.playbackHandle = requestAnimationFrame(tick);
+            this.playbackTick(time);
+        };
+        this.playbackHandle = requestAnimationFrame(tick);
+    }
+    stopPlayback(report = true) {
+        if (this.playbackHandle !== null) cancelAnimationFrame(this.playbackHandle);
+        this.playbackHandle = null;
+        if (report) {
+            this.flushFrameReport();
+        } else {
+            clearTimeout(this.frameReportTimer);
+            this.frameReportTimer = null;
+            this.pendingFrame = undefined;
+        }
+    }
+    playbackTick(time) {
+        // a frame that takes longer than its interval to show slows the playback down, no frames are skipped
+        if (!this.viewer || this.playbackBusy) return;
+        const frames = this.trajectoryFrameCount();
+        if (frames < 2) return;
+        const interval = 1000 / Math.max(this.props.fps ?? 30, 0.1);
+        if (this.playbackClock !== null && time - this.playbackClock < interval) return;
+        this.playbackClock = this.playbackClock === null || time - this.playbackClock > 2 * interval ? time : this.playbackClock + interval;
+        const [start, stop] = this.playbackRange(frames);
+        let frame = typeof this.playhead === 'number' ? this.playhead + 1 : start;
+        if (frame >= stop && !(this.props.loop ?? true)) {
+            this.stopPlayback();
+            if (this.props.setProps) this.props.setProps({playing: false});
+            return;
+        }
+        if (frame < start || frame >= stop) frame = start;
+        this.playbackBusy = true;
+        this.showFrame(frame)
+            .catch((error) => console.error('Failed to play the trajectory', error))
+            .finally(() => { this.playbackBusy = false; });
+    }
+    async showFrame(frame) {
+        this.playhead = frame;
+        const stream = this.activeStream;
+        if (!stream) {
+            await this.viewer.setFrame(frame);
+            return;
+        }
+        const shown = this.streamQueue.then(() => this.setStreamFrame(stream, frame));
+        this.streamQueue = shown.catch(() => {});
+        await shown;
+        this.prefetchStream(stream, frame);
+    }
+    reportFrame(frame) {
+        if (!this.props.setProps) return;
+        const throttle = this.props.framethrottle ?? 250;
+        if (this.playbackHandle === null || throttle <= 0) {
+            this.sendFrame(frame);
+            return;
+        }
+        // while playing, send the latest frame at most once per `framethrottle` milliseconds
+        this.pendingFrame = frame;
+        if (this.frameReportTimer !== null) return;
+        const wait = Math.max(0, this.lastFrameReport + throttle - performance.now());
+        this.frameReportTimer = setTimeout(() => this.flushFrameReport(), wait);
+    }
+    flushFrameReport() {
+        clearTimeout(this.frameReportTimer);
+        this.frameReportTimer = null;
+        if (this.pendingFrame === undefined) return;
+        const frame = this.pendingFrame;
+        this.pendingFrame = undefined;
+        if (this.props.setProps) this.sendFrame(frame);
+    }
+    sendFrame(frame) {
+        this.lastFrameReport = performance.now();
+        this.reportedFrame = frame;
+        this.props.setProps({frame: frame});
+    }
     async handleMeasurementChange(measurements) {
         if (measurements) {
             if (Array.isArray(measurements)) {
@@ -290,25 +743,33 @@ export default class MolstarViewer extends Component {
         }
     }
     parseTargetsForPython(targets) {
+        // the detail sent to python is limited by the selection* props
+        let granularity = this.props.selectiongranularity ?? 'atom';
+        const coordinates = this.props.selectioncoordinates ?? true;
+        const maxAtoms = this.props.selectionmaxatoms;
+        if (granularity === 'atom' && typeof maxAtoms === 'number' && targets.length > maxAtoms) {
+            granularity = 'residue';
+        }
         const chainsMap = new Map();
+        const residueMaps = new Map();
 
         for (const t of targets) {
             const chainKey = t.labelAsymId ?? '';
-            if (!chainsMap.has(chainKey)) {
-                chainsMap.set(chainKey, {
+            let chainObj = chainsMap.get(chainKey);
+            if (!chainObj) {
+                chainObj = {
                     name: t.labelAsymId,
                     auth_name: t.authAsymId,
                     residues: []
-                });
+                };
+                chainsMap.set(chainKey, chainObj);
+                residueMaps.set(chainKey, new Map());
             }
-            const chainObj = chainsMap.get(chainKey);
-
-            let residueObj = chainObj.residues.find((r) =>
-                r.index === t.labelSeqId &&
-                r.ins_code === t.pdbxInsCode &&
-                r.number === t.authSeqId &&
-                r.name === t.labelCompId
-            );
+            if (granularity === 'chain') continue;
+
+            const residueMap = residueMaps.get(chainKey);
+            const residueKey = `${t.labelSeqId}|${t.authSeqId}|${t.pdbxInsCode}|${t.labelCompId}`;
+            let residueObj = residueMap.get(residueKey);
             if (!residueObj) {
                 residueObj = {
                     name: t.labelCompId,
@@ -317,17 +778,23 @@ export default class MolstarViewer extends Component {
                     ins_code: t.pdbxInsCode,
                     atoms: []
                 };
+                residueMap.set(residueKey, residueObj);
                 chainObj.residues.push(residueObj);
             }
-            residueObj.atoms.push({
+            if (granularity === 'residue') continue;
+
+            const atomObj = {
                 name: t.labelAtomId,
-                index: t.atomIndex,
-                x: t.x,
-                y: t.y,
-                z: t.z
-            });
+                index: t.atomIndex
+            };
+            if (coordinates) {
+                atomObj.x = t.x;
+                atomObj.y = t.y;
+                atomObj.z = t.z;
+            }
+            residueObj.atoms.push(atomObj);
         }
-        return {chains: Array.from(chainsMap.values())};
+        return {chains: Array.from(chainsMap.values()), granularity: granularity};
     }
     parseTargetsFromPython(targets, modelId) {
         const parsedTargets = [];
@@ -337,9 +804,20 @@ export default class MolstarViewer extends Component {
             const auth = ('auth' in target) ? target.auth : false;
             for (const chain of chains) {
                 const residues = chain.residues;
+                const seqRanges = chain.seq_ranges || [];
+                // compact targets list whole residues as inclusive ranges of label indices, or author numbers in auth mode
+                for (const [beg, end] of seqRanges) {
+                    parsedTargets.push({
+                        auth: auth,
+                        modelId: modelId,
+                        labelAsymId: chain.name,
+                        authAsymId: chain.auth_name,
+                        [auth ? 'authSeqRange' : 'labelSeqRange']: {beg: beg, end: end},
+                    });
+                }
                 // when residues are empty, push chain level object
                 // if no residues are provided, we assume the user wants to select the whole chain
-                if (!residues || residues.length === 0) {
+                if ((!residues || residues.length === 0) && seqRanges.length === 0) {
                     parsedTargets.push({
                         auth: auth,
                         modelId: modelId,
@@ -348,8 +826,15 @@ export default class MolstarViewer extends Component {
                     });
                     continue;
                 }
-                for (const residue of residues) {
-                    const atoms = residue.atoms;
+                for (const residue of residues || []) {
+                    let atoms = residue.atoms;
+                    if (residue.atom_ranges) {
+                        // compact targets list atoms as inclusive ranges of atom indices
+                        atoms = [...(atoms || [])];
+                        for (const [first, last] of residue.atom_ranges) {
+                            for (let index = first; index <= last; index++) atoms.push({index: index});
+                        }
+                    }
                     // when atoms are empty, push residue level object
                     // if no atoms are provided, we assume the user wants to select the whole residue
                     if (!atoms || atoms.length === 0) {
@@ -394,14 +879,75 @@ export default class MolstarViewer extends Component {
             for (let color of preset.colors)
                 color.targets = this.parseTargetsFromPython(color.targets, null);
     }
+    base64ToBytes(base64) {
+        const binary = atob(base64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return bytes;
+    }
+    decodeArray(payload) {
+        // arrays encoded by `dash_molstar.utils.codec` are read as typed arrays without parsing any numbers
+        const bytes = this.base64ToBytes(payload.__ndarray__);
+        const TypedArray = payload.dtype === 'int32' ? Int32Array : Float32Array;
+        return new TypedArray(bytes.buffer, bytes.byteOffset, bytes.byteLength / TypedArray.BYTES_PER_ELEMENT);
+    }
+    decodeArrays(value) {
+        // replace the encoded arrays anywhere in an entry, the original entry is left untouched
+        if (Array.isArray(value)) return value.map((item) => this.decodeArrays(item));
+        if (!value || Object.getPrototypeOf(value) !== Object.prototype) return value;
+        if (value.__ndarray__ !== undefined) return this.decodeArray(value);
+        const decoded = {};
+        for (const key of Object.keys(value)) decoded[key] = this.decodeArrays(value[key]);
+        return decoded;
+    }
+    async decompressPayload(base64, compression) {
+        // 'gzip' and 'deflate' (zlib) streams are both handled natively by the browser
+        const stream = new Blob([this.base64ToBytes(base64)]).stream().pipeThrough(new DecompressionStream(compression));
+        return new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+    async inflateData(data) {
+        // decompress payloads compressed by the python helpers, the original data is left untouched
+        if (!data || typeof data !== "object") return data;
+        if (data.type === 'mol' && data.format === 'bcif') {
+            // BinaryCIF is loaded by the mmcif parser from the raw bytes
+            const bytes = data.compression ? await this.decompressPayload(data.data, data.compression) : this.base64ToBytes(data.data);
+            return {...data, data: bytes, format: 'mmcif', isBinary: true, compression: undefined};
+        }
+        if (data.type === 'url' && data.urlfor === 'mol' && data.format === 'bcif') {
+            return {...data, format: 'mmcif', isBinary: true};
+        }
+        if (data.type === 'mol' && data.compression) {
+            const bytes = await this.decompressPayload(data.data, data.compression);
+            return {...data, data: new TextDecoder().decode(bytes), compression: undefined};
+        }
+        if (data.type === 'coord' && data.format === 'quantized') {
+            // fixed-point frames are decoded into a DCD file, which is loaded like any other coordinate file
+            const bytes = data.compression ? await this.decompressPayload(data.data, data.compression) : this.base64ToBytes(data.data);
+            return {type: 'url', urlfor: 'coords', data: URL.createObjectURL(new Blob([quantizedToDcd(bytes)])), format: 'dcd'};
+        }
+        if (data.type === 'coord' && data.compression) {
+            // hand the binary coordinates over as a blob URL instead of encoding them with base64 again
+            const bytes = await this.decompressPayload(data.data, data.compression);
+            return {type: 'url', urlfor: 'coords', data: URL.createObjectURL(new Blob([bytes])), format: data.format};
+        }
+        if (data.type === 'traj') {
+            const [topo, coords] = await Promise.all([this.inflateData(data.topo), this.inflateData(data.coords)]);
+            return {...data, topo: topo, coords: coords};
+        }
+        return data;
+    }
     async loadData(data) {
+        data = await this.inflateData(data);
         if (typeof data === "object") {
-            const model_index = Object.keys(this.loadedStructures).length + 1;
+            // indices are never reused, entries can be removed in any order
+            const model_index = ++this.structureCount;
             if (data.type === "mol") { // loading a structure
                 // handle the target key in preset
                 this.parseTargetsForMoleculePresets(data.preset);
                 const matrix = data.matrix ? Mat4.fromArray(Mat4.identity(), data.matrix, 0) : undefined;
-                const result = await this.viewer.loadStructureFromData(data.data, data.format, false, {props: data.preset, matrix: matrix});
+                const result = await this.viewer.loadStructureFromData(data.data, data.format, !!data.isBinary, {props: data.preset, matrix: matrix});
                 // add the structure ID to this.loadedStructures
                 this.loadedStructures[model_index] = result.structure.cell.obj.data.units[0].model.id;
                 // if user specified component(s), add them to the structure
@@ -415,7 +961,7 @@ export default class MolstarViewer extends Component {
                     // handle the target key in preset
                     this.parseTargetsForMoleculePresets(data.preset);
                     const matrix = data.matrix ? Mat4.fromArray(Mat4.identity(), data.matrix, 0) : undefined;
-                    const result = await this.viewer.loadStructureFromUrl(data.data, data.format, false, {props: data.preset, matrix: matrix});
+                    const result = await this.viewer.loadStructureFromUrl(data.data, data.format, !!data.isBinary, {props: data.preset, matrix: matrix});
                     // add the structure ID to this.loadedStructures
                     this.loadedStructures[model_index] = result.structure.cell.obj.data.units[0].model.id;
                     // if user specified component(s), add them to the structure
@@ -427,12 +973,23 @@ export default class MolstarViewer extends Component {
                     await this.viewer.loadSnapshotFromUrl(data.data, data.format);
                 }
             } else if (data.type === 'traj') {
-                const { topo, coords } = data;
+                const { topo } = data;
+                let { coords } = data;
+                // a streamed trajectory starts with the first window of frames from the trajectory server
+                const stream = coords.type === 'stream' ? {...coords, start: 0, url: this.streamWindowUrl(coords, 0), cache: new Map()} : null;
+                if (stream) coords = {type: 'url', urlfor: 'coords', data: stream.url, format: coords.format};
                 // handle the target key in preset
                 this.parseTargetsForMoleculePresets(topo.preset);
                 const matrix = topo.matrix ? Mat4.fromArray(Mat4.identity(), topo.matrix, 0) : undefined;
                 // inside molstar viewer, the data source will be checked to load from url or from raw data
                 const result = await this.viewer.loadTrajectory(topo, coords, {props: topo.preset, matrix: matrix});
+                if (stream) {
+                    stream.modelIndex = model_index;
+                    this.activeStream = stream;
+                }
+                if (coords.type === 'url' && coords.data.startsWith('blob:')) {
+                    URL.revokeObjectURL(coords.data);
+                }
                 // add the structure ID to this.loadedStructures
                 this.loadedStructures[model_index] = result.structure.cell.obj.data.units[0].model.id;
                 // if user specified component(s), add them to the structure
@@ -441,10 +998,11 @@ export default class MolstarViewer extends Component {
                     await this.handleComponentChange(topo.component);
                 }
             } else if (data.type === 'volume') {
-                this.viewer.loadVolumeFromUrl(
+                await this.viewer.loadVolumeFromUrl(
                     {url: data.source.data, format: data.source.format, isBinary: data.isBinary},
                      data.isovalues, {entryId: data.entryId, isLazy: data.isLazy});
             }
+            if (this.loadedStructures[model_index] !== undefined) return model_index;
         }
     }
     async loadShape(data) {
@@ -473,11 +1031,33 @@ export default class MolstarViewer extends Component {
             ref = await this.viewer.createSheet(data.label, data.controlPoints, data.normalVectors, data.binormalVectors, data.widthValues, data.heightValues, data.color, data.alpha, data.linearSegments, data.arrowHeight, data.startCap, data.endCap);
         } else if (data.shape === 'tube') {
             ref = await this.viewer.createTube(data.label, data.controlPoints, data.normalVectors, data.binormalVectors, data.widthValues, data.heightValues, data.color, data.alpha, data.linearSegments, data.radialSegments, data.startCap, data.endCap, data.crossSection, data.roundCap);
+        } else if (data.shape === 'sphere_batch' || data.shape === 'cylinder_batch') {
+            ref = await this.createBatchShape(data);
         }
         if (ref) {
             this.loadedShapes[data.label] = ref;
         }
     }
+    async createBatchShape(data) {
+        const provider = this.viewer._plugin.build().toRoot().apply(BatchShapeProvider, {data: data});
+        await provider.apply(StateTransforms.Representation.ShapeRepresentation3D, {alpha: data.alpha ?? 1}).commit();
+        return provider.ref;
+    }
+    batchShapeClick(loci) {
+        // only the batch shapes report the clicked instance
+        if (loci.kind !== 'group-loci' || !loci.shape.sourceData || !loci.shape.sourceData.count) return;
+        const instances = new Set();
+        for (const group of loci.groups) {
+            if (typeof group.instance === 'number') instances.add(group.instance);
+        }
+        if (loci.instances) OrderedSet.forEach(loci.instances, (i) => instances.add(i));
+        if (instances.size === 0) return;
+        const shapeclick = {label: loci.shape.sourceData.label, instance: Math.min(...instances)};
+        this.setState({shapeclick: shapeclick});
+        if (this.props.setProps) {
+            this.props.setProps({shapeclick: shapeclick});
+        }
+    }
     async addComponent(component) {
         // construct molstar target object from python helper data
         let targets = [];
@@ -538,11 +1118,16 @@ export default class MolstarViewer extends Component {
                     if (this.viewer._plugin.disposed) {
                         return;
                     }
-                    const frameData = this.viewer.getCurrentFrame(state);
-                    this.setState({frame: frameData});
-                    if (this.props.setProps) {
-                        this.props.setProps({frame: frameData});
+                    let frameData = this.viewer.getCurrentFrame(state);
+                    if (this.activeStream) {
+                        // the frames of a streamed trajectory are counted from the start of the file
+                        if (this.activeStream.loading) return;
+                        if (typeof frameData === 'number') frameData += this.activeStream.start;
                     }
+                    // playback continues from frames set in the viewer as well
+                    if (typeof frameData === 'number') this.playhead = frameData;
+                    this.setState({frame: frameData});
+                    this.reportFrame(frameData);
                     if (this.state.updatefocusonframechange) {
                         const focusData = this.parseTargetsForPython(this.viewer.getCurrentFocus());
                         this.setState({focus: focusData});
@@ -553,6 +1138,14 @@ export default class MolstarViewer extends Component {
                     }
                 });
 
+                // subscribe to clicks on batch shapes
+                this.clickSubscription = this.viewer._plugin.behaviors.interaction.click.subscribe(({current}) => {
+                    if (this.viewer._plugin.disposed || !current.loci) {
+                        return;
+                    }
+                    this.batchShapeClick(current.loci);
+                });
+
                 // subscribe to camera change
                 if (this.state.cameraresponddrag) {
                     this.cameraSubscription = this.viewer._plugin.canvas3d.didDraw.subscribe(() => this.updateCameraParameters());
@@ -575,6 +1168,9 @@ export default class MolstarViewer extends Component {
                 if (this.state.frame) {
                     this.handleFrameChange(this.state.frame);
                 }
+                if (this.props.playing) {
+                    this.startPlayback();
+                }
                 if (this.state.measurement) {
                     this.handleMeasurementChange(this.state.measurement);
                 }
@@ -607,7 +1203,16 @@ export default class MolstarViewer extends Component {
             this.handleFocusChange(this.props.focus);
         }
         if (this.props.frame !== prevProps.frame) {
-            this.handleFrameChange(this.props.frame);
+            // the frames reported by the viewer are not set again
+            if (this.props.frame !== this.reportedFrame) this.handleFrameChange(this.props.frame);
+            this.reportedFrame = undefined;
+        }
+        if (this.props.playing !== prevProps.playing) {
+            if (this.props.playing) {
+                this.startPlayback();
+            } else {
+                this.stopPlayback();
+            }
         }
         if (this.props.measurement !== prevProps.measurement) {
             this.handleMeasurementChange(this.props.measurement);
@@ -640,6 +1245,7 @@ export default class MolstarViewer extends Component {
             clearTimeout(this.cameraDebounceTimer);
             this.cameraDebounceTimer = null;
         }
+        this.stopPlayback(false);
         // unsubscribe from all events
         this.focusSubscription.unsubscribe();
         this.focusSubscription = null;
@@ -649,11 +1255,17 @@ export default class MolstarViewer extends Component {
         this.frameSubscription = null;
         this.cameraSubscription.unsubscribe();
         this.cameraSubscription = null;
+        this.clickSubscription.unsubscribe();
+        this.clickSubscription = null;
         this.viewer._plugin.dispose();
         this.viewer = null;
 
         this.loadedShapes = {};
         this.loadedStructures = {};
+        this.loadedEntries.clear();
+        this.activeStream = null;
+        // queued updates of `data` are dropped
+        this.dataGeneration++;
     }
 
     render() {
@@ -725,10 +1337,46 @@ MolstarViewer.propTypes = {
     focus: PropTypes.object,
 
     /**
-     * The trajectory frame in the molstar viewer.
+     * The trajectory frame in the molstar viewer. The frames of a streamed trajectory are
+     * counted from the start of the file.
      */
     frame: PropTypes.number,
 
+    /**
+     * Whether the trajectory is playing. The viewer advances `frame` by itself at `fps`
+     * frames per second, without any callback, and sets `playing` to false when it stops
+     * at the end of a range that does not `loop`.
+     */
+    playing: PropTypes.bool,
+
+    /**
+     * The frames per second of the playback. Default is 30.
+     */
+    fps: PropTypes.number,
+
+    /**
+     * Whether the playback starts over at the end of the range. Default is true.
+     */
+    loop: PropTypes.bool,
+
+    /**
+     * The frames to play as `[start, stop]`, the stop frame is not included.
+     * Default is the whole trajectory.
+     */
+    playbackrange: PropTypes.arrayOf(PropTypes.number),
+
+    /**
+     * Number of frames of a streamed trajectory downloaded ahead of the playhead.
+     * The downloaded windows are kept in a cache of about the same size. Default is 100.
+     */
+    prefetchframes: PropTypes.number,
+
+    /**
+     * Minimum time in milliseconds between two updates of `frame` sent to dash while playing.
+     * Set to 0 to send every frame. Default is 250ms.
+     */
+    framethrottle: PropTypes.number,
+
     /**
      * The measurements in the molstar viewer.
      */
@@ -758,6 +1406,44 @@ MolstarViewer.propTypes = {
      */
     screenshot: PropTypes.object,
 
+    /**
+     * The level of detail of the `selection` and `focus` sent back to Dash: 'chain' lists the
+     * chains only, 'residue' the residues without their atoms, and 'atom' every atom.
+     * Default is 'atom'.
+     */
+    selectiongranularity: PropTypes.oneOf(['chain', 'residue', 'atom']),
+
+    /**
+     * Whether to include the atom coordinates in the `selection` and `focus` sent back to Dash.
+     * Default is true.
+     */
+    selectioncoordinates: PropTypes.bool,
+
+    /**
+     * The maximum number of atoms listed in the `selection` and `focus` sent back to Dash.
+     * Larger selections are sent with 'residue' granularity. Unlimited by default.
+     */
+    selectionmaxatoms: PropTypes.number,
+
+    /**
+     * The maximum number of `data` entries downloaded and decompressed at the same time.
+     * The entries are still added to the viewer one by one, in their order. Default is 4.
+     */
+    loadconcurrency: PropTypes.number,
+
+    /**
+     * Timings of the last update of `data` in milliseconds, set by the viewer: the `total`
+     * time, and for every loaded entry the time to `fetch` and decompress it and the time
+     * to `commit` it to the viewer.
+     */
+    loadtimings: PropTypes.object,
+
+    /**
+     * The last clicked instance of a batch of spheres or cylinders, set by the viewer:
+     * the `label` of the batch and the index of the `instance`.
+     */
+    shapeclick: PropTypes.object,
+
     /**
      * Update focus data when frame index have changed.
      */